@@ -3,6 +3,217 @@ console.log("Zyron Activity Monitor - Background Service Started");
 
 let nativePort = null;
 
+// Every command from Zyron carries a request_id. Echo it back on the reply so the
+// native host can route it to the caller that is waiting for it.
+function replyTo(command, payload) {
+  if (!nativePort) return;
+  nativePort.postMessage({ ...payload, request_id: command.request_id });
+}
+
+// --- PAGE READINESS ---
+// Resolves once the tab has finished loading. With expectNavigation, a load must
+// start first (used right after changing the URL).
+function waitForTabComplete(tabId, timeoutMs, expectNavigation = false) {
+  return new Promise(resolve => {
+    let started = !expectNavigation;
+    const finish = (ok) => {
+      chrome.tabs.onUpdated.removeListener(listener);
+      clearTimeout(timer);
+      resolve(ok);
+    };
+    const listener = (id, changeInfo) => {
+      if (id !== tabId) return;
+      if (changeInfo.status === "loading" || changeInfo.url) started = true;
+      else if (changeInfo.status === "complete" && started) finish(true);
+    };
+    const timer = setTimeout(() => finish(false), timeoutMs);
+    chrome.tabs.onUpdated.addListener(listener);
+    chrome.tabs.get(tabId, (tab) => {
+      if (!tab) finish(false);
+      else if (tab.status === "loading") started = true;
+      else if (started && tab.status === "complete") finish(true);
+    });
+  });
+}
+
+// After a click, Enter or an external open: give the page graceMs to start navigating.
+// Full loads are awaited until "complete"; SPA route changes (URL only) settle after a short pause.
+function waitForNavigation(tabId, graceMs, timeoutMs) {
+  return new Promise(resolve => {
+    let loading = false;
+    let timer = setTimeout(() => finish(true), graceMs); // Nothing started: the page is ready
+    const deadline = setTimeout(() => finish(false), timeoutMs);
+    function finish(ok) {
+      chrome.tabs.onUpdated.removeListener(listener);
+      clearTimeout(timer);
+      clearTimeout(deadline);
+      resolve(ok);
+    }
+    function listener(id, changeInfo) {
+      if (id !== tabId) return;
+      if (changeInfo.status === "loading") {
+        loading = true;
+        clearTimeout(timer);
+      } else if (changeInfo.status === "complete" && loading) {
+        finish(true);
+      } else if (changeInfo.url && !loading) {
+        clearTimeout(timer);
+        timer = setTimeout(() => finish(true), 300);
+      }
+    }
+    chrome.tabs.onUpdated.addListener(listener);
+    chrome.tabs.get(tabId, (tab) => {
+      if (tab && tab.status === "loading") {
+        loading = true;
+        clearTimeout(timer);
+      }
+    });
+  });
+}
+
+async function resolveTabId(tabId) {
+  if (tabId) return tabId;
+  const tabs = await chrome.tabs.query({ active: true, currentWindow: true });
+  return tabs && tabs[0] ? tabs[0].id : null;
+}
+
+// Content scripts are re-injected after every navigation, so retry briefly until one answers
+async function sendToContent(tabId, message, attempts = 10) {
+  for (let i = 0; ; i++) {
+    try {
+      return await chrome.tabs.sendMessage(tabId, message);
+    } catch (err) {
+      if (i >= attempts - 1) throw err;
+      await new Promise(r => setTimeout(r, 200));
+    }
+  }
+}
+
+// --- BATCH EXECUTION ---
+// Runs several ordered steps from one message, waiting for page loads and DOM
+// readiness here instead of fixed sleeps on the Zyron side.
+const CONTENT_ACTIONS = ["highlight", "click", "read", "scroll", "type", "scan", "press_key", "wait_for"];
+
+async function runBatch(batch) {
+  let tabId = await resolveTabId(batch.tabId);
+  const results = [];
+
+  for (let i = 0; i < (batch.steps || []).length; i++) {
+    const step = batch.steps[i];
+    const timeoutMs = step.timeout_ms || 10000;
+    let result;
+
+    try {
+      if (step.action === "create_tab") {
+        const tab = await chrome.tabs.create({ url: step.url, active: step.active !== false });
+        tabId = tab.id;
+        result = { success: await waitForTabComplete(tabId, timeoutMs), tabId: tabId };
+      } else if (step.action === "navigate") {
+        await chrome.tabs.update(tabId, { url: step.url });
+        result = { success: await waitForTabComplete(tabId, timeoutMs, true), tabId: tabId };
+      } else if (step.action === "wait_ready") {
+        result = { success: await waitForNavigation(tabId, step.grace_ms || 1500, timeoutMs) };
+      } else if (CONTENT_ACTIONS.includes(step.action)) {
+        result = await sendToContent(tabId, step);
+        if (result && result.success && step.await_navigation) {
+          await waitForNavigation(tabId, step.grace_ms || 1500, timeoutMs);
+        }
+      } else {
+        result = { success: false, error: `Unsupported batch step: ${step.action}` };
+      }
+    } catch (err) {
+      result = { success: false, error: err.message };
+    }
+
+    results.push(result);
+    if (!result || (!result.success && !step.optional)) {
+      return { success: false, failed_step: i, results: results, tabId: tabId };
+    }
+  }
+  return { success: true, results: results, tabId: tabId };
+}
+
+// --- BATCH TAB OPERATIONS ---
+// Applies one operation (close, mute, unmute, reload, screenshot) to every tab that
+// matches a predicate, and answers with a single aggregate result.
+function hostMatches(url, host) {
+  try {
+    const h = new URL(url).hostname.replace(/^www\./, "");
+    return h === host || h.endsWith("." + host);
+  } catch (e) {
+    return false;
+  }
+}
+
+function tabMatches(tab, match) {
+  if (match.tab_ids && !match.tab_ids.includes(tab.id)) return false;
+  if (match.window_id != null && tab.windowId !== match.window_id) return false;
+  if (match.host && !hostMatches(tab.url, match.host)) return false;
+  if (match.title && !match.titleRegex.test(tab.title || "")) return false;
+  if (match.audible != null && !!tab.audible !== match.audible) return false;
+  if (match.muted != null && !!(tab.mutedInfo && tab.mutedInfo.muted) !== match.muted) return false;
+  return true;
+}
+
+async function captureTabs(tabs) {
+  // captureVisibleTab only sees the active tab, so each one is brought to front in turn
+  const previouslyActive = await chrome.tabs.query({ active: true });
+  const captures = [];
+  for (const tab of tabs) {
+    try {
+      await chrome.tabs.update(tab.id, { active: true });
+      await new Promise(r => setTimeout(r, 500));
+      const data = await chrome.tabs.captureVisibleTab(tab.windowId, { format: "png" });
+      captures.push({ tabId: tab.id, data: data });
+    } catch (err) {
+      captures.push({ tabId: tab.id, error: err.message });
+    }
+  }
+  for (const tab of previouslyActive) {
+    chrome.tabs.update(tab.id, { active: true }).catch(() => {});
+  }
+  return captures;
+}
+
+async function runTabBatch(command) {
+  const match = { ...(command.match || {}) };
+  if (match.title) {
+    try {
+      match.titleRegex = new RegExp(match.title, "i");
+    } catch (err) {
+      return { success: false, error: `Bad title pattern: ${err.message}`, matched: [], results: [] };
+    }
+  }
+
+  const tabs = (await chrome.tabs.query({})).filter(tab => tabMatches(tab, match));
+  const limited = command.limit ? tabs.slice(0, command.limit) : tabs;
+  const ids = limited.map(tab => tab.id);
+  const reply = { success: true, operation: command.operation, matched: limited.map(tabInfo), results: [] };
+  if (!ids.length) return reply;
+
+  const settle = async (fn) => {
+    // One call per tab so a single failure doesn't hide the others
+    reply.results = await Promise.all(ids.map(id => fn(id)
+      .then(() => ({ tabId: id, success: true }))
+      .catch(err => ({ tabId: id, success: false, error: err.message }))));
+  };
+
+  if (command.operation === "close") {
+    await settle(id => chrome.tabs.remove(id));
+  } else if (command.operation === "mute" || command.operation === "unmute") {
+    await settle(id => chrome.tabs.update(id, { muted: command.operation === "mute" }));
+  } else if (command.operation === "reload") {
+    await settle(id => chrome.tabs.reload(id));
+  } else if (command.operation === "screenshot") {
+    reply.captures = await captureTabs(limited);
+    reply.results = reply.captures.map(c => ({ tabId: c.tabId, success: !c.error, error: c.error }));
+  } else {
+    return { success: false, error: `Unsupported tab operation: ${command.operation}`, matched: [], results: [] };
+  }
+  reply.success = reply.results.some(r => r.success);
+  return reply;
+}
+
 function connectToNativeHost() {
   nativePort = chrome.runtime.connectNative("zyron.native.host");
 
@@ -10,24 +221,55 @@ function connectToNativeHost() {
     console.log("Received from native host:", response);
 
     // --- COMMAND DISPATCHER ---
-    if (response.action === "close_tab") {
+    if (response.action === "sync_tabs") {
+      sendTabsToHost();
+    }
+    else if (response.action === "close_tab") {
       if (response.tabId) {
-        chrome.tabs.remove(response.tabId);
+        chrome.tabs.remove(response.tabId, () => {
+          replyTo(response, { action: "command_result", success: !chrome.runtime.lastError });
+        });
       }
     }
     else if (response.action === "mute_tab") {
       if (response.tabId) {
-        chrome.tabs.update(response.tabId, { muted: response.value !== false });
+        chrome.tabs.update(response.tabId, { muted: response.value !== false }, () => {
+          replyTo(response, { action: "command_result", success: !chrome.runtime.lastError });
+        });
       }
     }
     else if (response.action === "create_tab") {
-      if (response.url) {
+      if (!response.url) {
+        replyTo(response, { action: "tab_created", success: false, error: "No url given" });
+      } else {
         chrome.tabs.create({ url: response.url, active: response.active !== false }, (tab) => {
+          if (chrome.runtime.lastError || !tab) {
+            replyTo(response, { action: "tab_created", success: false,
+                                error: chrome.runtime.lastError ? chrome.runtime.lastError.message : "Tab not created" });
+            return;
+          }
           console.log("✅ Background Tab Created:", tab.id);
-          nativePort.postMessage({ action: "tab_created", tabId: tab.id });
+          // Research tabs stay out of the tab strip (Firefox tabHide API)
+          if (response.hidden && browser.tabs.hide) {
+            browser.tabs.hide(tab.id).catch(err => console.error("Tab hide failed:", err));
+          }
+          replyTo(response, { action: "tab_created", tabId: tab.id });
         });
       }
     }
+    else if (response.action === "tab_batch") {
+      runTabBatch(response)
+        .catch(err => ({ success: false, error: err.message, matched: [], results: [] }))
+        .then(result => replyTo(response, { action: "tab_batch_result", ...result }));
+    }
+    else if (response.action === "batch") {
+      runBatch(response).then(result => replyTo(response, { action: "batch_result", ...result }));
+    }
+    else if (response.action === "wait_ready") {
+      resolveTabId(response.tabId)
+        .then(tabId => tabId ? waitForNavigation(tabId, response.grace_ms || 1500, response.timeout_ms || 10000) : false)
+        .then(ok => replyTo(response, { action: "command_result", success: ok }));
+    }
     else if (response.action === "media_control") {
       // PROPER MV3 IMPLEMENTATION
       if (response.tabId) {
@@ -46,41 +288,58 @@ function connectToNativeHost() {
     }
     else if (response.action === "capture_tab") {
       // TAB SCREENSHOT
-      if (response.tabId) {
+      if (!response.tabId) {
+        replyTo(response, { action: "capture_error", error: "No tabId given" });
+      } else {
+        const requestedAt = Date.now();
         // 1. Activate the tab first (required for captureVisibleTab)
         chrome.tabs.update(response.tabId, { active: true }, () => {
           // 2. Wait for render (500ms delay)
           setTimeout(() => {
+            const captureStart = Date.now();
             chrome.tabs.captureVisibleTab(response.windowId, { format: "png" }, (dataUrl) => {
               if (chrome.runtime.lastError) {
                 console.error("Capture failed:", chrome.runtime.lastError);
-                nativePort.postMessage({ action: "capture_error", error: chrome.runtime.lastError.message });
+                replyTo(response, { action: "capture_error", error: chrome.runtime.lastError.message });
                 return;
               }
               // 3. Send back to native host
-              nativePort.postMessage({ action: "capture_result", data: dataUrl, tabId: response.tabId });
+              replyTo(response, {
+                action: "capture_result",
+                data: dataUrl,
+                tabId: response.tabId,
+                timings: { activate_wait_ms: captureStart - requestedAt, capture_ms: Date.now() - captureStart }
+              });
             });
           }, 800); // 800ms delay to be safe
         });
       }
     }
-    else if (["highlight", "click", "read", "scroll", "type", "scan", "press_key"].includes(response.action)) {
+    else if (CONTENT_ACTIONS.includes(response.action)) {
       console.log("🧭 NAV COMMAND RECEIVED:", response);
 
       const targetTabId = response.tabId;
 
+      // Errors are replied too, so the waiting caller fails fast instead of timing out
+      const forward = (tabId) => {
+        chrome.tabs.sendMessage(tabId, response).then(reply => {
+          replyTo(response, { action: "navigation_result", data: reply || { success: false, error: "No reply from page" } });
+        }).catch(err => {
+          console.error("Nav Error on Tab", tabId, err);
+          replyTo(response, { action: "navigation_result", data: { success: false, error: err.message } });
+        });
+      };
+
       if (targetTabId) {
         // Targeted Tab Execution
-        chrome.tabs.sendMessage(targetTabId, response).then(reply => {
-          if (reply) nativePort.postMessage({ action: "navigation_result", data: reply });
-        }).catch(err => console.error("Nav Error on Tab", targetTabId, err));
+        forward(targetTabId);
       } else {
         // Fallback to Active Tab
         chrome.tabs.query({ active: true, currentWindow: true }, (tabs) => {
           if (tabs && tabs[0]) {
-            chrome.tabs.sendMessage(tabs[0].id, response).then(reply => {
-              if (reply) nativePort.postMessage({ action: "navigation_result", data: reply });
-            }).catch(err => console.error("Nav Error on Active Tab:", err));
+            forward(tabs[0].id);
+          } else {
+            replyTo(response, { action: "navigation_result", data: { success: false, error: "No active tab" } });
           }
         });
       }
@@ -108,34 +367,59 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
 });
 
 // Real-time tab monitoring
+function tabInfo(tab) {
+  return {
+    id: tab.id,
+    title: tab.title,
+    url: tab.url,
+    windowId: tab.windowId,
+    active: tab.active,
+    audible: tab.audible,
+    muted: tab.mutedInfo ? tab.mutedInfo.muted : false,
+    status: tab.status
+  };
+}
+
+// Full snapshot: sent when Zyron subscribes ("sync_tabs") and as a slow safety-net resync
 async function sendTabsToHost() {
   if (!nativePort) return;
 
   try {
     const tabs = await chrome.tabs.query({});
-    const tabData = tabs.map(tab => ({
-      id: tab.id,
-      title: tab.title,
-      url: tab.url,
-      windowId: tab.windowId,
-      active: tab.active
-    }));
-
     nativePort.postMessage({
       action: "update_tabs",
-      tabs: tabData
+      tabs: tabs.map(tabInfo)
     });
   } catch (e) {
     console.error("Error sending tabs:", e);
   }
 }
 
-// Update every 2 seconds for real-time Focus Mode support
-setInterval(sendTabsToHost, 2000);
-// Also update on tab events
-chrome.tabs.onUpdated.addListener(sendTabsToHost);
-chrome.tabs.onRemoved.addListener(sendTabsToHost);
-chrome.tabs.onActivated.addListener(sendTabsToHost);
+// Incremental updates: one small delta per tab event instead of the whole tab list
+function postTabEvent(event, payload) {
+  if (!nativePort) return;
+  nativePort.postMessage({ action: "tab_event", event: event, ...payload });
+}
+
+const TRACKED_TAB_CHANGES = ["title", "url", "status", "audible", "mutedInfo"];
+
+chrome.tabs.onCreated.addListener((tab) => postTabEvent("created", { tab: tabInfo(tab) }));
+chrome.tabs.onUpdated.addListener((tabId, changeInfo, tab) => {
+  // Skip favicon and other churn nobody on the Zyron side reads
+  if (!TRACKED_TAB_CHANGES.some(key => key in changeInfo)) return;
+  postTabEvent("updated", { tab: tabInfo(tab) });
+});
+chrome.tabs.onRemoved.addListener((tabId, removeInfo) => {
+  postTabEvent("removed", { tabId: tabId, windowId: removeInfo.windowId });
+});
+chrome.tabs.onActivated.addListener((activeInfo) => {
+  postTabEvent("activated", { tabId: activeInfo.tabId, windowId: activeInfo.windowId });
+});
+chrome.tabs.onAttached.addListener((tabId) => {
+  chrome.tabs.get(tabId, (tab) => { if (tab) postTabEvent("updated", { tab: tabInfo(tab) }); });
+});
+
+setInterval(sendTabsToHost, 30000);
 
 // Function to get all tabs from all windows
 async function getAllTabs() {
@@ -3,10 +3,130 @@
 
 console.log("👋 Zyron Content Agent Loaded!");
 
+// --- PAGE CACHE ---
+// Scan/read results are cached per page instance (pageId), URL and version.
+// A MutationObserver keeps the interactive element map current from deltas, so a
+// click command does not have to rescan the page. domVersion (scan) only moves
+// when links/buttons/inputs are added or removed, their text changes, or a
+// visibility attribute changes on or around them (menus, dropdowns);
+// contentVersion (read) moves on any change of the page text.
+const INTERACTIVE_SELECTOR = 'a[href], button, input, textarea, select, [role="button"], [onclick]';
+const VISIBILITY_ATTRIBUTES = ['class', 'style', 'hidden', 'aria-hidden', 'aria-expanded', 'disabled'];
+const MAX_DIRTY_NODES = 500;  // Past this many pending subtrees one full rescan is cheaper
+
+const pageCache = {
+    pageId: Math.random().toString(36).slice(2),
+    url: location.href,
+    domVersion: 0,
+    contentVersion: 0,
+    mapVersion: -1,          // domVersion the element map reflects
+    elements: new Map(),     // element -> { id, type, text, area, url }
+    nextId: 1,
+    dirtyNodes: new Set(),
+    fullRescan: true,
+    scan: null,              // { version, result }
+    read: null               // { version, result }
+};
+
+function resetPageCache() {
+    pageCache.url = location.href;
+    pageCache.domVersion++;
+    pageCache.contentVersion++;
+    pageCache.elements.clear();
+    pageCache.dirtyNodes.clear();
+    pageCache.fullRescan = true;
+    pageCache.scan = null;
+    pageCache.read = null;
+}
+
+// SPA navigations change the URL without reloading this script
+function checkNavigation() {
+    if (pageCache.url !== location.href) resetPageCache();
+}
+
+function isOwnTag(node) {
+    return Boolean(node.classList && node.classList.contains('zyron-tag'));
+}
+
+function hasInteractive(node) {
+    return node.nodeType === Node.ELEMENT_NODE && !isOwnTag(node) &&
+        (node.matches(INTERACTIVE_SELECTOR) || node.querySelector(INTERACTIVE_SELECTOR) !== null);
+}
+
+// Queues a subtree for the next delta refresh; a flood of them becomes one full rescan
+function markDirty(node) {
+    if (pageCache.fullRescan) return;
+    if (pageCache.dirtyNodes.size >= MAX_DIRTY_NODES) {
+        pageCache.dirtyNodes.clear();
+        pageCache.fullRescan = true;
+        return;
+    }
+    pageCache.dirtyNodes.add(node);
+}
+
+let refreshTimer = null;
+const pageObserver = new MutationObserver((mutations) => {
+    let contentChanged = false;
+    let mapChanged = false;
+    for (const m of mutations) {
+        // Ignore our own tags/highlights
+        if (isOwnTag(m.target)) continue;
+        if (m.type === 'childList' && [...m.addedNodes, ...m.removedNodes].every(isOwnTag)) continue;
+
+        if (m.type === 'attributes') {
+            // Shown/hidden/disabled: the next scan must re-check visibility below this node
+            if (hasInteractive(m.target)) {
+                if (m.target.matches(INTERACTIVE_SELECTOR)) markDirty(m.target);
+                mapChanged = true;
+            }
+            continue;
+        }
+        contentChanged = true;
+
+        if (m.type === 'characterData') {
+            // Play -> Pause inside a button re-describes it; other text edits (clocks,
+            // counters, tickers) only change what read returns
+            const parent = m.target.parentElement;
+            const owner = parent ? parent.closest(INTERACTIVE_SELECTOR) : null;
+            if (owner) {
+                markDirty(owner);
+                mapChanged = true;
+            }
+            continue;
+        }
+
+        // Children swapped inside a link/button re-describe it
+        const owner = m.target.closest ? m.target.closest(INTERACTIVE_SELECTOR) : null;
+        if (owner) {
+            markDirty(owner);
+            mapChanged = true;
+        }
+        m.addedNodes.forEach(n => {
+            if (hasInteractive(n)) {
+                markDirty(n);
+                mapChanged = true;
+            }
+        });
+        // Removed elements are dropped from the map by the isConnected sweep
+        m.removedNodes.forEach(n => { if (hasInteractive(n)) mapChanged = true; });
+    }
+    if (contentChanged) pageCache.contentVersion++;
+    if (!mapChanged) return;
+    pageCache.domVersion++;
+    // Apply deltas shortly after the page settles, ahead of the next command
+    clearTimeout(refreshTimer);
+    refreshTimer = setTimeout(refreshElementMap, 250);
+});
+pageObserver.observe(document.documentElement, {
+    childList: true, subtree: true, characterData: true,
+    attributes: true, attributeFilter: VISIBILITY_ATTRIBUTES
+});
+
 // Listen for messages from the background script
 browser.runtime.onMessage.addListener((message, sender, sendResponse) => {
     console.log("📩 Zyron received message:", message);
     let result = { success: false, error: "Unknown command" };
+    let pending = null;
 
     if (message.action === "highlight") {
         result = highlightElement(message.selector);
@@ -20,13 +140,15 @@ browser.runtime.onMessage.addListener((message, sender, sendResponse) => {
         result = scrollPage(message.direction);
     } else if (message.action === "read") {
         // Read is async, handle differently
-        return readPage();
+        pending = readPage(message.known_page, message.known_version);
     } else if (message.action === "scan") {
-        return scanPage();
+        pending = scanPage(message.known_page, message.known_version);
+    } else if (message.action === "wait_for") {
+        pending = waitForElement(message.selector, message.timeout_ms);
     }
 
-    // Return synchronous result immediately
-    return Promise.resolve(result);
+    // Echo the request id so Zyron can match this reply to the command that asked for it
+    return (pending || Promise.resolve(result)).then(reply => ({ ...reply, request_id: message.request_id }));
 });
 
 // --- NAVIGATION AGENT FUNCTIONS ---
@@ -124,6 +246,30 @@ function typeText(selector, text) {
     }
 }
 
+/**
+ * Wait until an element matching the selector exists (DOM readiness for batched steps)
+ */
+function waitForElement(selector, timeoutMs) {
+    return new Promise(resolve => {
+        if (document.querySelector(selector)) {
+            resolve({ success: true, message: `Found ${selector}` });
+            return;
+        }
+        const observer = new MutationObserver(() => {
+            if (document.querySelector(selector)) {
+                observer.disconnect();
+                clearTimeout(timer);
+                resolve({ success: true, message: `Found ${selector}` });
+            }
+        });
+        const timer = setTimeout(() => {
+            observer.disconnect();
+            resolve({ success: false, error: `Timed out waiting for ${selector}` });
+        }, timeoutMs || 5000);
+        observer.observe(document.documentElement, { childList: true, subtree: true });
+    });
+}
+
 /**
  * Scroll the page
  * @param {string} direction 'up' | 'down' | 'top' | 'bottom'
@@ -149,9 +295,17 @@ function scrollPage(direction) {
 /**
  * Extract main content intelligently
  */
-function readPage() {
+function readPage(knownPage, knownVersion) {
     console.log("📖 readPage called");
     try {
+        checkNavigation();
+        if (pageCache.read && pageCache.read.version === pageCache.contentVersion) {
+            if (knownPage === pageCache.pageId && knownVersion === pageCache.contentVersion) {
+                return Promise.resolve(pageInfo({ success: true, unchanged: true }, pageCache.contentVersion));
+            }
+            return Promise.resolve({ ...pageCache.read.result, cached: true });
+        }
+
         // 1. clone body to avoid mutating the page
         const clone = document.body.cloneNode(true);
 
@@ -218,12 +372,14 @@ function readPage() {
             cleanText = cleanText.substring(0, 100000) + "... [Truncated]";
         }
 
-        return Promise.resolve({
+        const result = pageInfo({
             success: true,
             title: document.title,
             url: window.location.href,
             content: cleanText || "No readable content found."
-        });
+        }, pageCache.contentVersion);
+        pageCache.read = { version: pageCache.contentVersion, result: result };
+        return Promise.resolve(result);
     } catch (e) {
         return Promise.resolve({ success: false, error: e.message });
     }
@@ -249,60 +405,104 @@ function pressKey(selector, key) {
     return { success: false, error: "Element not found" };
 }
 
-function scanPage() {
-    console.log("🔍 scanPage called");
-    try {
-        // 1. clean up old tags if any
-        document.querySelectorAll('.zyron-tag').forEach(el => el.remove());
+function describeElement(el) {
+    let text = el.innerText || el.value || el.placeholder || el.getAttribute('aria-label') || "Unlabeled";
+    text = text.replace(/\s+/g, ' ').trim().substring(0, 50);
 
-        // 2. find interactive elements
-        const selectors = [
-            'a[href]', 'button', 'input', 'textarea', 'select', '[role="button"]', '[onclick]'
-        ];
+    // Area detection (is it in a nav, aside, etc?)
+    const areaEl = el.closest('nav, aside, header, footer, [role="navigation"], [role="banner"], [role="contentinfo"]');
+    const area = areaEl ? areaEl.tagName.toLowerCase() || areaEl.getAttribute('role') : 'main';
 
-        const elements = document.querySelectorAll(selectors.join(','));
-        const interactables = [];
-        let idCounter = 1;
+    return { type: el.tagName.toLowerCase(), text: text, area: area, url: el.href || "" };
+}
 
-        elements.forEach(el => {
-            // skip hidden elements
-            if (el.offsetParent === null) return;
+function registerElement(el) {
+    // Keep ids stable across scans so "click 12" keeps meaning the same element
+    let zyronId = Number(el.dataset.zyronId);
+    if (!zyronId) {
+        zyronId = pageCache.nextId++;
+        el.dataset.zyronId = zyronId;
+    }
+    pageCache.elements.set(el, { id: zyronId, ...describeElement(el) });
+}
 
-            // assign id
-            const zyronId = idCounter++;
-            el.dataset.zyronId = zyronId;
+/**
+ * Bring the element map up to date: a full walk the first time (or after navigation),
+ * afterwards only the subtrees the MutationObserver reported.
+ */
+function refreshElementMap() {
+    checkNavigation();
+    if (pageCache.mapVersion === pageCache.domVersion) return;
+
+    if (pageCache.fullRescan) {
+        document.querySelectorAll(INTERACTIVE_SELECTOR).forEach(registerElement);
+        pageCache.fullRescan = false;
+    } else {
+        pageCache.dirtyNodes.forEach(node => {
+            if (!node.isConnected || !node.querySelectorAll) return;
+            // Text changes inside a link/button re-describe the element itself
+            const owner = node.closest(INTERACTIVE_SELECTOR);
+            if (owner) registerElement(owner);
+            node.querySelectorAll(INTERACTIVE_SELECTOR).forEach(registerElement);
+        });
+    }
+    pageCache.dirtyNodes.clear();
+
+    // Drop elements that left the DOM
+    for (const el of pageCache.elements.keys()) {
+        if (!el.isConnected) pageCache.elements.delete(el);
+    }
+    pageCache.mapVersion = pageCache.domVersion;
+}
+
+function pageInfo(extra, version = pageCache.domVersion) {
+    return { page_id: pageCache.pageId, dom_version: version, url: location.href, ...extra };
+}
 
-            // get metadata
-            let text = el.innerText || el.value || el.placeholder || el.getAttribute('aria-label') || "Unlabeled";
-            text = text.replace(/\s+/g, ' ').trim().substring(0, 50);
+function scanPage(knownPage, knownVersion) {
+    console.log("🔍 scanPage called");
+    try {
+        checkNavigation();
 
-            if (!text) return; // skip empty elements
+        // Caller already holds this exact result
+        if (knownPage === pageCache.pageId && knownVersion === pageCache.domVersion && pageCache.scan &&
+            pageCache.scan.version === pageCache.domVersion) {
+            return Promise.resolve(pageInfo({ success: true, unchanged: true }));
+        }
+        if (pageCache.scan && pageCache.scan.version === pageCache.domVersion) {
+            return Promise.resolve({ ...pageCache.scan.result, cached: true });
+        }
+
+        // 1. clean up old tags if any
+        document.querySelectorAll('.zyron-tag').forEach(el => el.remove());
 
-            // Area detection (is it in a nav, aside, etc?)
-            const areaEl = el.closest('nav, aside, header, footer, [role="navigation"], [role="banner"], [role="contentinfo"]');
-            const area = areaEl ? areaEl.tagName.toLowerCase() || areaEl.getAttribute('role') : 'main';
+        // 2. apply pending DOM deltas to the element map
+        refreshElementMap();
 
-            interactables.push({
-                id: zyronId,
-                type: el.tagName.toLowerCase(),
-                text: text,
-                area: area,
-                url: el.href || ""
-            });
+        // 3. visible, labelled elements in document order
+        const visible = [];
+        pageCache.elements.forEach((info, el) => {
+            if (el.offsetParent === null) return; // skip hidden elements
+            if (!info.text) return; // skip empty elements
+            visible.push([el, info]);
         });
+        visible.sort((a, b) => (a[0].compareDocumentPosition(b[0]) & Node.DOCUMENT_POSITION_FOLLOWING) ? -1 : 1);
+        const interactables = visible.map(([, info]) => info);
 
-        // 3. Prioritize 'main' area elements (move them to the front)
+        // 4. Prioritize 'main' area elements (move them to the front)
         interactables.sort((a, b) => {
             if (a.area === 'main' && b.area !== 'main') return -1;
             if (a.area !== 'main' && b.area === 'main') return 1;
             return 0;
         });
 
-        return Promise.resolve({
+        const result = pageInfo({
             success: true,
             total_scanned: interactables.length,
             elements: interactables.slice(0, 400) // Support deeper pages like YouTube
         });
+        pageCache.scan = { version: pageCache.domVersion, result: result };
+        return Promise.resolve(result);
     } catch (e) {
         return Promise.resolve({ success: false, error: e.message });
     }
@@ -1,14 +1,24 @@
 import time
 import ollama
 import os
-import psutil
-import requests
+from collections import deque
 from datetime import datetime
-from zyron.features.browser_control import navigate, read_page, scan_page, click_element, create_tab, close_tab
+from urllib.parse import quote_plus
+import zyron.features.html_text as html_text
+import zyron.features.knowledge_base as knowledge_base
+import zyron.features.passage_rank as passage_rank
+import zyron.features.process_snapshot as process_snapshot
+import zyron.features.research_cache as research_cache
+import zyron.features.research_fetch as research_fetch
+import zyron.features.research_tabs as research_tabs
 from dotenv import load_dotenv
 
 load_dotenv()
 MODEL_NAME = os.getenv("MODEL_NAME", "qwen2.5-coder:7b")
+# Prompt tokens of page text given to the LLM (best BM25 passages). 0 = old behaviour, first 8000 chars
+TOKEN_BUDGET = int(os.getenv("RESEARCH_TOKEN_BUDGET", "1500"))
+SEARCH_URL = os.getenv("RESEARCH_SEARCH_URL", "https://www.google.com/search?q={query}")
+synthesis_timings = deque(maxlen=50)  # Time to first token / to complete answer per query
 
 RESEARCH_SYSTEM_PROMPT = """
 You are Zyron's Information Synthesis module.
@@ -25,82 +35,102 @@ RULES:
 
 def is_firefox_running():
     """Checks if any firefox.exe process is active."""
-    for proc in psutil.process_iter(['name']):
-        try:
-            if "firefox" in proc.info['name'].lower():
-                return True
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass
-    return False
-
-def clean_html(html):
-    """Very basic HTML text extraction for requests fallback."""
-    import re
-    # Remove script and style elements
-    text = re.sub(r'<(script|style).*?>.*?</\1>', '', html, flags=re.DOTALL)
-    # Remove all other tags
-    text = re.sub(r'<.*?>', ' ', text)
-    # Consolidate whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text[:8000] # Limit to 8k chars for LLM
-
-def perform_research(query):
-    search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
+    return process_snapshot.is_running("firefox")
+
+def clean_html(html, limit=8000, min_block_chars=html_text.MIN_BLOCK_CHARS):
+    """Readable text of an HTML page (scripts, styles and navigation dropped), up to limit chars."""
+    return html_text.extract_text(html, max_chars=limit, min_block_chars=min_block_chars)
+
+def truncate_sources(documents, limit=8000):
+    """Unranked context: sources in order, cut off after limit characters."""
+    return "\n\n".join(f"[{source}]\n{text}" for source, text in documents)[:limit]
+
+def perform_research(query, on_token=None):
+    """
+    Answers a web question, from the research cache when possible.
+    on_token(text_so_far) is called from this thread as the answer streams in.
+    """
+    entry, state = research_cache.lookup(query)
+    if state == "fresh":
+        print(f"⚡ Research cache hit ({entry['ttl_class']}): '{query}'")
+        return entry["answer"]
+    if state == "stale":
+        # Answer now with what we know (saying how old it is), and refresh it for next time
+        print(f"⚡ Research cache stale hit ({entry['ttl_class']}): '{query}' - refreshing in background")
+        research_cache.refresh_async(query, run_research)
+        created = time.localtime(entry["created"])
+        as_of = time.strftime("%H:%M" if created[:3] == time.localtime()[:3] else "%b %d, %H:%M", created)
+        return f"{entry['answer']}\n\n(As of {as_of}, checking for newer information.)"
+
+    answer, method = run_research(query, on_token)
+    if method:
+        research_cache.store(query, answer, method)
+    return answer
+
+def run_research(query, on_token=None):
+    """
+    Runs the full pipeline (browser or HTTP fetch, then LLM synthesis).
+    Returns (answer, method); method is None when the answer is an error message.
+    """
+    search_url = SEARCH_URL.format(query=quote_plus(query))
     content = ""
-    tab_id = None
     method = "None"
+    links = []
 
     print(f"🔍 Starting research for: '{query}'")
 
+    # 0. Pages read earlier (research results, read_page) may already answer it
+    _, max_age = research_cache.classify(query)
+    if max_age > 0:
+        lookup_start = time.perf_counter()
+        context = knowledge_base.local_context(query, TOKEN_BUDGET or 2000, max_age=max_age)
+        if context:
+            print(f"   📖 Answering from the local knowledge base ({len(context)} chars, "
+                  f"{(time.perf_counter() - lookup_start) * 1000:.0f}ms)")
+            return synthesize(query, context, "Local knowledge base", on_token)
+
     # 1. Decide: Browser vs Headless
     if is_firefox_running():
         print("   → Firefox is running. Attempting Stealth Browser Bridge...")
-        tab_id = create_tab(search_url, active=False)
-        if tab_id:
-            print(f"   → Created Stealth Tab (ID: {tab_id}).")
-            
-            # Robust Extraction Loop (Retry for slow loads)
-            for attempt in range(1, 4):
-                print(f"   → Load attempt {attempt}/3...")
-                time.sleep(3) # Wait between checks
-                
-                result = read_page(tab_id=tab_id)
-                if result and result.get("success"):
-                    raw_content = result.get("content", "")
-                    # Simple validation: Did we actually get search results?
-                    if len(raw_content) > 500: # Typical Google result pages are large
-                        content = raw_content
-                        method = "Stealth Browser (Firefox)"
-                        print(f"   ✅ Content extracted via Browser (Size: {len(content)} chars).")
-                        break
-                    else:
-                        print("   ⚠️ Content too short, page might still be loading...")
-                else:
-                    print(f"   ⚠️ Read failed: {result.get('error') if result else 'No response'}")
-            
-            close_tab(tab_id)
+        # Pooled hidden tab: the extension waits for the page to load, then reads it
+        result = research_tabs.fetch(search_url, with_links=True)
+        timings = result.get("timings", {})
+        if result.get("success"):
+            raw_content = result.get("content", "")
+            # Simple validation: Did we actually get search results?
+            if len(raw_content) > 500: # Typical Google result pages are large
+                content = raw_content
+                method = "Stealth Browser (Firefox)"
+                links = research_fetch.filter_result_links(result.get("links", []))
+                print(f"   ✅ Content extracted via Browser (Size: {len(content)} chars).")
+            else:
+                print("   ⚠️ Content too short, page might be a block or consent page...")
         else:
-            print("   ⚠️ Failed to create tab. Native Host might not be registered.")
+            print(f"   ⚠️ Browser read failed: {result.get('error')}")
+        if timings:
+            print(f"   ⏱️ Time to content: {timings['time_to_content_ms']}ms "
+                  f"(tab wait {timings['wait_ms']}ms, load+read {timings['load_ms']}ms)")
     
     # Fallback / Option B: Use Requests (Headless)
     if not content:
         print("   → Falling back to Headless Research (Requests)...")
         try:
-            # Randomize UA slightly for better bypass
-            headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"}
-            response = requests.get(search_url, headers=headers, timeout=10)
+            # Shared keep-alive session (browser-like UA for better bypass)
+            response = research_fetch.get_session().get(search_url, timeout=10)
             if response.status_code == 200:
                 html = response.text
                 if "unusual traffic" in html.lower() or "captcha" in html.lower():
                     print("   ❌ HEADLESS BLOCKED BY GOOGLE (CAPTCHA)")
-                    return "⚠️ Stealth Research was blocked by Google security. Please open Firefox and try again (ensure the extension is active)."
+                    return "⚠️ Stealth Research was blocked by Google security. Please open Firefox and try again (ensure the extension is active).", None
                 
-                content = clean_html(html)
+                # Search page: keep short blocks, they are the direct answers ("Sam Altman", "67,234.12 USD")
+                content = clean_html(html, limit=None, min_block_chars=0)
                 # Validation for headless too
                 if len(content) < 200:
                     print("   ⚠️ Headless extraction too small. Likely a block page.")
                 else:
                     method = "Headless Fallback (Requests)"
+                    links = research_fetch.extract_result_links(html)
                     print("   ✅ Content extracted via Headless.")
             else:
                 print(f"   ❌ Headless Failed: Status {response.status_code}")
@@ -108,28 +138,77 @@ def perform_research(query):
             print(f"   ❌ Headless error: {e}")
 
     if not content:
-        return "❌ I tried both browser and network research but couldn't get any results. Please ensure Firefox is open with the Zyron extension for the best results."
+        return "❌ I tried both browser and network research but couldn't get any results. Please ensure Firefox is open with the Zyron extension for the best results.", None
+
+    # 2. Read the top results in parallel; whatever arrives before the deadline is added
+    documents = [("Search results", content)]
+    if links:
+        pages, stats = research_fetch.fetch_pages(links)
+        print(f"   📚 Result pages: {stats['fetched']}/{stats['requested']} in {stats['ms']}ms "
+              f"({stats['bytes'] // 1024} KB read, {stats['stopped_early']} cut early, {stats['late']} late, {stats['failed']} failed)")
+        documents += [(f"SOURCE {i}: {page['url']}", page["text"]) for i, page in enumerate(pages, 1)]
+        for page in pages:
+            knowledge_base.add_page_async(page["url"], None, page["text"], "research")
 
-    # 2. Analyze with LLM
+    # 3. Keep only the passages that talk about the question
+    if TOKEN_BUDGET > 0:
+        rank_start = time.perf_counter()
+        context, stats = passage_rank.build_context(query, documents, TOKEN_BUDGET)
+        print(f"   ✂️ Prompt context: {stats['chars_before']} → {stats['chars_after']} chars "
+              f"(~{stats['tokens_before']} → ~{stats['tokens_after']} tokens, {stats['passages']} passages ranked "
+              f"in {(time.perf_counter() - rank_start) * 1000:.0f}ms)")
+    else:
+        context = truncate_sources(documents)
+        print(f"   ✂️ Prompt context: first {len(context)} chars (ranking off)")
+
+    # 4. Analyze with LLM
+    return synthesize(query, context, method, on_token)
+
+def synthesize(query, context, method, on_token=None):
+    """Streams the LLM answer for query from context. Returns (answer, method)."""
     now = datetime.now().strftime("%A, %B %d, %Y")
-    prompt = f"METHOD USED: {method}\nCURRENT DATE (Ground Truth): {now}\nUSER QUERY: {query}\n\nPAGE CONTENT (Extracted from Google Search):\n{content}"
+    prompt = f"METHOD USED: {method}\nCURRENT DATE (Ground Truth): {now}\nUSER QUERY: {query}\n\nPAGE CONTENT (most relevant passages from the search results and top result pages):\n{context}"
     
     try:
         print(f"   → Synthesizing answer using {MODEL_NAME}...")
-        response = ollama.chat(
+        synth_start = time.perf_counter()
+        first_token = None
+        parts = []
+        chunk = {}
+        for chunk in ollama.chat(
             model=MODEL_NAME,
             messages=[
                 {'role': 'system', 'content': RESEARCH_SYSTEM_PROMPT},
                 {'role': 'user', 'content': prompt},
             ],
+            stream=True,
             keep_alive=0
-        )
-        answer = response['message']['content']
-        print("✅ Research synthesis complete.")
-        return answer
+        ):
+            piece = chunk['message']['content']
+            if not piece:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter()
+            parts.append(piece)
+            if on_token:
+                on_token("".join(parts))
+        answer = "".join(parts)
+
+        # The last chunk carries the prompt/eval counters
+        timing = {
+            "query": query,
+            "ttft_ms": round((first_token - synth_start) * 1000) if first_token else None,
+            "total_ms": round((time.perf_counter() - synth_start) * 1000),
+            "prompt_tokens": chunk.get('prompt_eval_count'),
+            "answer_tokens": chunk.get('eval_count'),
+        }
+        synthesis_timings.append(timing)
+        print(f"✅ Research synthesis complete: first token {timing['ttft_ms']}ms, total {timing['total_ms']}ms "
+              f"(prompt {len(prompt)} chars, {timing['prompt_tokens'] or '?'} tokens evaluated).")
+        return answer, method
     except Exception as e:
         print(f"❌ Synthesis error: {e}")
-        return f"⚠️ I found information via {method} but had trouble processing it. Check if Ollama is running."
+        return f"⚠️ I found information via {method} but had trouble processing it. Check if Ollama is running.", None
 
 if __name__ == "__main__":
     print(perform_research("Who is CEO of OpenAI?"))
@@ -12,6 +12,9 @@ import requests
 import json
 import zyron.features.activity as activity_monitor
 import zyron.features.clipboard as clipboard_monitor
+import zyron.features.page_finder as page_finder
+import zyron.features.process_snapshot as process_snapshot
+import zyron.features.system_metrics as system_metrics
 import zyron.features.files.finder as file_finder  # Uses the new smart finder we just created
 import zyron.agents.researcher as researcher
 from src.zyron.utils.settings import settings
@@ -384,11 +387,8 @@ def get_battery_status():
 
 def get_system_health():
     try:
-        cpu_usage = psutil.cpu_percent(interval=1)
-        ram = psutil.virtual_memory()
-        ram_usage = ram.percent
-        ram_available = round(ram.available / (1024 * 1024 * 1024), 2)
-        return f"🖥️ **System Health:**\nCPU Usage: {cpu_usage}%\nRAM Usage: {ram_usage}% ({ram_available} GB free)"
+        # Served from the background sampler: current values plus 1/5/15-minute history
+        return system_metrics.format_health()
     except Exception as e:
         return f"Error reading system health: {e}"
 
@@ -555,7 +555,13 @@ def close_application(app_name):
     else:
         exe_name = f"{app_key}.exe"
         
-    print(f"💀 Killing process target: {exe_name}")
+    # The sampler's snapshot is only a hint (it may be a few seconds old, or know the
+    # process under another name): taskkill is the authority either way
+    running = process_snapshot.find(exe_name)
+    if running:
+        print(f"💀 Killing process target: {exe_name} ({len(running)} running)")
+    else:
+        print(f"💀 Killing process target: {exe_name} (not in the process snapshot, trying anyway)")
     
     try:
         os.system(f"taskkill /f /im {exe_name} /t")
@@ -868,6 +874,9 @@ def _single_execute(cmd_json):
     elif action == "find_file":
         return execute_find_file(cmd_json)
 
+    elif action == "find_page":
+        return page_finder.format_page_results(page_finder.find_pages(cmd_json.get("query") or ""))
+
     elif action == "web_research":
         return researcher.perform_research(cmd_json.get("query"))
 
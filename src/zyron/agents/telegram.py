@@ -1,18 +1,24 @@
 import logging
 import asyncio
 import os
+import time
 import re # Support regex for better scoring
 from dotenv import load_dotenv
 from telegram import Update, constants, ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ApplicationBuilder, ContextTypes, MessageHandler, CommandHandler, CallbackQueryHandler, filters
 from zyron.core.brain import process_command
 from zyron.agents.system import execute_command, capture_webcam
+import zyron.agents.researcher as researcher
 import zyron.features.browser_control as browser_control
+import zyron.features.browser_async as browser_async
+import zyron.features.tab_registry as tab_registry
+import zyron.features.tab_search as tab_search
 import zyron.core.memory as memory
 import zyron.features.activity as activity_monitor
 import zyron.features.clipboard as clipboard_monitor
 import zyron.features.files.tracker as file_tracker
 import zyron.features.focus_mode as focus_mode
+import zyron.features.system_metrics as system_metrics
 import zyron.features.zombie_reaper as zombie_reaper
 from zyron.utils.env_check import check_dependencies
 
@@ -335,6 +341,78 @@ def start_reaper_task(bot, chat_id):
     zombie_reaper.start_reaper(callback_func=reaper_bridge)
     print("🧟 Zombie Reaper attached to Telegram.")
 
+STREAM_EDIT_INTERVAL = 1.2  # Seconds between edits of a streamed answer (Telegram rate-limits message edits)
+TELEGRAM_TEXT_LIMIT = 4000
+
+async def stream_research(update, query):
+    """Runs web research and grows one Telegram message as the answer streams in."""
+    loop = asyncio.get_running_loop()
+    message = await update.message.reply_text("🔍 Researching...")
+    state = {"text": "", "shown": "", "last_edit": 0.0, "editing": False, "first_edit": None}
+    started = time.perf_counter()
+
+    async def push():
+        text = state["text"]
+        try:
+            if text and text != state["shown"]:
+                await message.edit_text(f"🔍 Research Result:\n\n{text[:TELEGRAM_TEXT_LIMIT]} ▌")
+                state["shown"] = text
+                if state["first_edit"] is None:
+                    state["first_edit"] = time.perf_counter() - started
+        except Exception as e:
+            print(f"⚠️ Streamed edit skipped: {e}")
+        finally:
+            state["last_edit"] = time.monotonic()
+            state["editing"] = False
+
+    def on_token(text):
+        # Called from the research thread: at most one edit in flight, spaced by STREAM_EDIT_INTERVAL
+        state["text"] = text
+        if not state["editing"] and time.monotonic() - state["last_edit"] >= STREAM_EDIT_INTERVAL:
+            state["editing"] = True
+            asyncio.run_coroutine_threadsafe(push(), loop)
+
+    result = await loop.run_in_executor(None, lambda: researcher.perform_research(query, on_token=on_token))
+    while state["editing"]:
+        await asyncio.sleep(0.05)
+
+    final = f"🔍 **Research Result:**\n\n{result}"[:TELEGRAM_TEXT_LIMIT]
+    try:
+        await message.edit_text(final, parse_mode='Markdown')
+    except Exception:
+        # Unbalanced Markdown in the answer: send it as plain text
+        await message.edit_text(final.replace("**", ""))
+    first = f"{state['first_edit']:.1f}s" if state["first_edit"] is not None else "n/a"
+    print(f"📨 Research delivered: first visible text after {first}, complete after {time.perf_counter() - started:.1f}s")
+
+async def run_tab_batch(update, command, words):
+    """Runs close/mute/unmute/reload/screenshot on every tab matching the query words in one round trip."""
+    match = tab_search.batch_filter(command, words)
+    if not any(value is not None for value in match.values()) and command != "close":
+        # "refresh all my tabs": every tab we know of (closing everything needs a site named)
+        match["tab_ids"] = [tab['id'] for tab in tab_registry.get_tabs()]
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(None, lambda: browser_control.batch_tabs(
+        command, **match, limit=10 if command == "screenshot" else None
+    ))
+
+    if not result.get("matched"):
+        error = result.get("error") or "No tabs matched"
+        await update.message.reply_text(f"❌ {error}.", reply_markup=get_main_keyboard())
+        return
+
+    for shot in result.get("images", []):
+        await update.message.reply_photo(photo=shot["image"], caption=f"📸 **{shot.get('title')}**")
+
+    done = [r for r in result["results"] if r.get("success")]
+    icons = {"close": "🗑️", "mute": "🔇", "unmute": "🔊", "reload": "🔄", "screenshot": "📸"}
+    titles = "\n".join(f"• {tab.get('title', 'Unknown')}" for tab in result["matched"])
+    await update.message.reply_text(
+        f"{icons.get(command, '✅')} {command.capitalize()}: {len(done)}/{len(result['matched'])} tabs\n{titles}",
+        reply_markup=get_main_keyboard()
+    )
+
 @auth_required
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     global CAMERA_ACTIVE
@@ -735,6 +813,10 @@ Longitude: {location_data['longitude']}
             report = execute_command(command_json)
             if status_msg: await status_msg.delete()
             await update.message.reply_text(report, reply_markup=get_main_keyboard())
+            # CPU/RAM over the last 15 minutes, once the sampler has some history (PNG bytes, no file)
+            graph = await asyncio.get_running_loop().run_in_executor(None, system_metrics.render_graph)
+            if graph:
+                await update.message.reply_photo(photo=graph, caption="📈 CPU and RAM, last 15 minutes")
             
         elif action == "take_screenshot":
             # Screenshot
@@ -969,6 +1051,18 @@ Longitude: {location_data['longitude']}
                 await search_msg.edit_text(f"❌ Search error: {e}", reply_markup=get_main_keyboard())
         # ---------------------------------------------------------
 
+        # --- FIND PAGE HANDLER (visited pages from browser history) ---
+        elif action == "find_page":
+            if status_msg: await status_msg.delete()
+            loop = asyncio.get_running_loop()
+            try:
+                report = await loop.run_in_executor(None, execute_command, command_json)
+                await update.message.reply_text(report, parse_mode='Markdown', disable_web_page_preview=True,
+                                                reply_markup=get_main_keyboard())
+            except Exception as e:
+                print(f"Find page error: {e}")
+                await update.message.reply_text(f"❌ Page search error: {e}", reply_markup=get_main_keyboard())
+
         # --- FEATURE #11: FOCUS MODE HANDLERS ---
         elif action == "focus_mode":
             sub_action = command_json.get("sub_action")
@@ -1012,8 +1106,12 @@ Longitude: {location_data['longitude']}
             query = command_json.get("query", "").lower()
             
             # Proceed with standard Tab Management
-            # 1. Get all open tabs
-            tabs = activity_monitor.get_firefox_tabs()
+            # 1. Make sure the live tab registry (and its search index) is fed
+            loop = asyncio.get_running_loop()
+            live = await loop.run_in_executor(
+                None, lambda: browser_control.watch_tabs() and tab_registry.wait_until_live(timeout=1.0)
+            )
+            tabs = tab_registry.get_tabs() if live else []
             
             if not tabs:
                 await update.message.reply_text("❌ No Firefox tabs found (or bridge not connected).", reply_markup=get_main_keyboard())
@@ -1023,6 +1121,12 @@ Longitude: {location_data['longitude']}
             interaction_verbs = ["click", "type", "press", "search", "scroll", "read", "first", "there", "the"]
             stop_words = ["close", "mute", "unmute", "the", "tab", "window", "browser", "video", "music", "about", "play", "pause"] + interaction_verbs
             query_words = [w for w in query.split() if w not in stop_words and len(w) > 2]
+
+            # 3. "close all youtube tabs", "mute every tab playing sound" -> one batch in the extension
+            if command in browser_control.TAB_OPERATIONS and any(w in tab_search.BATCH_WORDS for w in query.split()):
+                print(f"🗂️ Batch tab {command}: {query_words}")
+                await run_tab_batch(update, command, query_words)
+                return
             
             # --- FAILOVER TO STICKY TAB ---
             best_match = None
@@ -1041,16 +1145,8 @@ Longitude: {location_data['longitude']}
                      await update.message.reply_text("❓ Please specify which tab (e.g., 'Close YouTube').", reply_markup=get_main_keyboard())
                      return
                 print(f"🔍 Searching tabs for keywords: {query_words}")
-                for tab in tabs:
-                    score = 0
-                    title = tab.get('title', '').lower()
-                    url = tab.get('url', '').lower()
-                    for word in query_words:
-                        if word in title: score += 2
-                        elif word in url: score += 1
-                    if " ".join(query_words) in title: score += 5
-                    
-                    print(f"   - Checking: {title[:20]}... Score: {score}")
+                for score, tab in tab_search.search(" ".join(query_words)):
+                    print(f"   - Match: {tab.get('title', '')[:20]}... Score: {score}")
                     if score > highest_score:
                         highest_score = score
                         best_match = tab
@@ -1071,27 +1167,25 @@ Longitude: {location_data['longitude']}
                     elif command == "unmute":
                         browser_control.mute_tab(tab_id, False)
                         await update.message.reply_text(f"🔊 Unmuted: **{best_match.get('title')}**", parse_mode='Markdown', reply_markup=get_main_keyboard())
+                    elif command == "reload":
+                        await loop.run_in_executor(None, lambda: browser_control.batch_tabs("reload", tab_ids=[tab_id]))
+                        await update.message.reply_text(f"🔄 Reloaded: **{best_match.get('title')}**", parse_mode='Markdown', reply_markup=get_main_keyboard())
                     elif command in ["play", "pause"]:
                         await update.message.reply_text(f"🎬 Command {command} sent to **{tab_title}**", reply_markup=get_main_keyboard())
                     elif command == "screenshot":
                         window_id = best_match.get('windowId')
-                        browser_control.capture_tab_with_window(tab_id, window_id)
                         loader = await update.message.reply_text("📸 Capturing tab...", reply_markup=get_main_keyboard())
-                        shot_path = os.path.join(os.environ.get('TEMP', ''), 'zyron_tab_screenshot.png')
-                        if os.path.exists(shot_path):
-                            try: os.remove(shot_path)
-                            except: pass
-                        found = False
-                        for _ in range(10):
-                            if os.path.exists(shot_path):
-                                found = True
-                                break
-                            await asyncio.sleep(0.5)
-                        if found:
-                            await update.message.reply_photo(photo=open(shot_path, 'rb'), caption=f"📸 **{best_match.get('title')}**")
+                        shot = await loop.run_in_executor(
+                            None, lambda: browser_control.capture_tab(tab_id, window_id, max_width=1920, jpeg_quality=85)
+                        )
+                        if shot.get("success"):
+                            upload_start = time.perf_counter()
+                            await update.message.reply_photo(photo=shot["image"], caption=f"📸 **{best_match.get('title')}**")
+                            shot["stats"]["upload_ms"] = round((time.perf_counter() - upload_start) * 1000, 1)
+                            print(f"📸 Tab screenshot stats: {shot['stats']}")
                             await loader.delete()
                         else:
-                            await loader.edit_text("❌ Screenshot timeout.")
+                            await loader.edit_text(f"❌ Screenshot failed: {shot.get('error')}")
                 else:
                     await update.message.reply_text(f"❌ Found '**{best_match.get('title', 'Unknown')}**' but it has no ID.", reply_markup=get_main_keyboard())
                 return
@@ -1112,15 +1206,7 @@ Longitude: {location_data['longitude']}
                     print("📖 Navigation Agent: Reading page...")
                     loader = await update.message.reply_text("📖 Reading page content...", reply_markup=get_main_keyboard())
                     
-                    loop = asyncio.get_running_loop()
-                    try:
-                        result = await asyncio.wait_for(
-                            loop.run_in_executor(None, browser_control.read_page),
-                            timeout=8.0
-                        )
-                    except asyncio.TimeoutError:
-                        await loader.edit_text("❌ Read timeout. Native Host not responding.")
-                        return
+                    result = await browser_async.read_page(timeout=8.0)
 
                     if result and result.get("success"):
                         title = result.get("title", "No Title")
@@ -1148,7 +1234,7 @@ Longitude: {location_data['longitude']}
 
                 elif sub_action == "scroll":
                     direction = command_json.get("direction", "down")
-                    browser_control.scroll_page(direction)
+                    await browser_async.scroll_page(direction)
                     try: await update.message.set_reaction(reaction="👇" if direction == "down" else "👆")
                     except: await update.message.reply_text(f"📜 Scrolled {direction}", reply_markup=get_main_keyboard())
 
@@ -1163,8 +1249,7 @@ Longitude: {location_data['longitude']}
                         if not str(target).isdigit():
                             loader = await update.message.reply_text(f"🔍 Finding input '{target}'...", reply_markup=get_main_keyboard())
                             
-                            loop = asyncio.get_running_loop()
-                            scan_result = await loop.run_in_executor(None, browser_control.scan_page)
+                            scan_result = await browser_async.scan_page()
                             
                             if scan_result and scan_result.get("success"):
                                 elements = scan_result.get("elements", [])
@@ -1197,27 +1282,28 @@ Longitude: {location_data['longitude']}
                                 await update.message.reply_text("❌ Scan failed during typing.")
                                 return
 
-                        browser_control.type_text(target_id, text)
-                        await update.message.reply_text(f"⌨️ Typed `{text}` into `{found_label}`", parse_mode='Markdown')
-                        
+                        # Type (and submit searches) in one round trip; the extension waits for the results page
+                        target_lower = str(target).lower()
+                        steps = [{"action": "type", "selector": target_id, "text": text}]
                         if "search" in target_lower or "find" in target_lower:
-                            browser_control.press_key(target_id, "Enter")
-                            await update.message.reply_text("⌨️ Pressed **Enter**", parse_mode='Markdown')
+                            steps.append({"action": "press_key", "selector": target_id, "key": "Enter", "await_navigation": True})
+                        batch = await browser_async.run_batch(steps)
+                        
+                        if batch.get("success"):
+                            await update.message.reply_text(f"⌨️ Typed `{text}` into `{found_label}`", parse_mode='Markdown')
+                            if len(steps) > 1:
+                                await update.message.reply_text("⌨️ Pressed **Enter**", parse_mode='Markdown')
+                        else:
+                            failed = (batch.get("results") or [{}])[-1] or {}
+                            err = batch.get("error") or failed.get("error", "Unknown error")
+                            await update.message.reply_text(f"❌ Typing failed: {err}")
                     else:
                         await update.message.reply_text("❌ Usage: `/type [field] [text]`")
 
                 elif sub_action == "scan":
                     loader = await update.message.reply_text("🔍 Scanning page elements...", reply_markup=get_main_keyboard())
                     
-                    loop = asyncio.get_running_loop()
-                    try:
-                        result = await asyncio.wait_for(
-                            loop.run_in_executor(None, browser_control.scan_page),
-                            timeout=8.0
-                        )
-                    except asyncio.TimeoutError:
-                        await loader.edit_text("❌ Scan timeout.")
-                        return
+                    result = await browser_async.scan_page(timeout=8.0)
 
                     if result and result.get("success"):
                         elements = result.get("elements", [])
@@ -1246,8 +1332,7 @@ Longitude: {location_data['longitude']}
                         if not str(target).isdigit():
                             loader = await update.message.reply_text(f"🔍 Searching for '{target}'...", reply_markup=get_main_keyboard())
                             
-                            loop = asyncio.get_running_loop()
-                            scan_result = await loop.run_in_executor(None, browser_control.scan_page)
+                            scan_result = await browser_async.scan_page()
                             
                             if scan_result and scan_result.get("success"):
                                 elements = scan_result.get("elements", [])
@@ -1341,7 +1426,7 @@ Longitude: {location_data['longitude']}
                                 except: await update.message.reply_text(f"❌ Failed to scan page: {err}")
                                 return
 
-                        browser_control.click_element(target_id)
+                        await browser_async.click_element(target_id)
                         await update.message.reply_text(f"🖱️ Clicked `{clicked_text}`", parse_mode='Markdown')
                     else:
                         await update.message.reply_text("❌ Usage: `/click [text or ID]`")
@@ -1543,26 +1628,33 @@ Longitude: {location_data['longitude']}
                 print(f"Browser Nav Error: {e}")
                 await update.message.reply_text(f"❌ Browser Error: {e}")
 
+        elif action == "web_research":
+            if status_msg:
+                try: await status_msg.delete()
+                except: pass
+            try:
+                await stream_research(update, command_json.get("query"))
+            except Exception as e:
+                await update.message.reply_text(f"❌ Error: {e}", reply_markup=get_main_keyboard())
+
         else:
             # Generic action execution
             try:
                 result = execute_command(command_json)
                 if status_msg: await status_msg.delete()
                 
-                if action == "web_research" and result:
-                    # Professional synthesis delivery
-                    await update.message.reply_text(f"🔍 **Research Result:**\n\n{result}", parse_mode='Markdown', reply_markup=get_main_keyboard())
-                else:
-                    await update.message.reply_text(f"✅ Action Complete: {action}", reply_markup=get_main_keyboard())
+                await update.message.reply_text(f"✅ Action Complete: {action}", reply_markup=get_main_keyboard())
             except Exception as e:
                 if status_msg: await status_msg.delete()
                 await update.message.reply_text(f"❌ Error: {e}", reply_markup=get_main_keyboard())
 
         # --- DELAY BETWEEN CHAINED BROWSER COMMANDS ---
         if total_commands > 1 and cmd_index < total_commands - 1:
-            # Delay for browser actions to allow page to load
+            # Browser actions: let the extension report when the page has loaded
             if action in ["open_url", "browser_nav", "browser_control"]:
-                await asyncio.sleep(2.5)
+                ready = await browser_async.wait_until_ready(timeout=8)
+                if ready.get("code") == browser_control.ERROR_UNREACHABLE:
+                    await asyncio.sleep(2.5)  # No bridge: fall back to a fixed delay
             else:
                 await asyncio.sleep(0.5)
 
@@ -1582,6 +1674,9 @@ if __name__ == "__main__":
         application.add_handler(CallbackQueryHandler(handle_media_callback, pattern="^(media_|vol_)"))
         application.add_handler(MessageHandler(filters.TEXT, handle_message))
         
+        # Sample CPU/RAM/disk/network in the background so health checks answer instantly
+        system_metrics.ensure_started()
+        
         # Run
         print("🤖 Bot is pooling...")
         
@@ -1,8 +1,26 @@
 import ollama
 import json
+import re
 from .memory import get_context_string
 from src.zyron.utils.settings import settings
 
+# "that article about rust I read yesterday", "the page I visited this morning", "sites I browsed"
+PAGE_NOUNS = r"(?:article|page|website|site|link|blog|blog post|post)s?"
+PAGE_VERBS = r"(?:visited|read|saw|seen|browsed|opened|found|looked at|was reading|was on)"
+PAGE_QUERY = re.compile(
+    rf"\b(?:that|the|those)\s+{PAGE_NOUNS}\b.*?\b(?:i|we)\s+(?:had\s+|have\s+)?{PAGE_VERBS}\b"
+    rf"|\b{PAGE_NOUNS}\s+(?:i|we)\s+(?:had\s+|have\s+)?{PAGE_VERBS}\b"
+    rf"|\b(?:i|we)\s+(?:visited|browsed)\b"
+)
+# A file word means the local file finder, not browser history ("that pdf I opened on that site")
+FILE_WORDS = re.compile(r"\b(?:file|files|pdf|pdfs|document|documents|doc|docx|excel|spreadsheet|image|photo|picture|"
+                        r"video|ppt|pptx|presentation|txt|csv|zip)\b")
+
+
+def is_page_query(lower):
+    """Does a lowercase request ask for a web page the user visited before?"""
+    return bool(PAGE_QUERY.search(lower)) and not FILE_WORDS.search(lower)
+
 
 BASE_SYSTEM_PROMPT = """
 You are Zyron, a smart laptop assistant with memory.
@@ -64,6 +82,9 @@ COMMANDS:
 15. Find File: {"action": "find_file", "time_query": "yesterday afternoon", "file_type": "pdf", "keyword": "report"}
     (Triggers: find that file, get me that PDF, that document I opened, file I was working on, send that file, give me that Excel, that image I saw)
 
+15b. Find Page: {"action": "find_page", "query": "that article about rust async I read yesterday"}
+    (Triggers: that article, that page, that website, that link, page I visited, article I read, site I was on)
+
 16. Media Control: 
     - Playback: {"action": "control_media", "media_action": "playpause/nexttrack/prevtrack/volumemute"}
       (Triggers: pause music, next song, previous track, skip song, play music, mute audio)
@@ -79,8 +100,8 @@ ALWAYS use browser_nav with sub_action="click" or "type", NOT browser_control!
 - "type Hello" -> {"action": "browser_nav", "sub_action": "type", "target": "search", "text": "Hello"}
 browser_control is ONLY for "close TAB", "mute TAB", or "screenshot TAB" - operations on the TAB itself!
 
-17. Browser Tab Control: {"action": "browser_control", "command": "close/mute/screenshot", "query": "which tab"}
-    (Triggers: "close youtube TAB", "mute spotify TAB", "screenshot the TAB")
+17. Browser Tab Control: {"action": "browser_control", "command": "close/mute/unmute/reload/screenshot", "query": "which tab"}
+    (Triggers: "close youtube TAB", "mute spotify TAB", "screenshot the TAB", "close all youtube TABS", "mute every TAB playing sound")
     *** ONLY when user explicitly refers to the TAB or its status (close/mute/snap) ***
 
 18. Power Control: 
@@ -210,6 +231,9 @@ def process_command(user_input):
             command = "play" if "play" in lower or "resume" in lower else "pause"
             data = {"action": "browser_control", "command": command, "query": user_input}
 
+        elif ("reload" in lower or "refresh" in lower) and "tab" in lower:
+            data = {"action": "browser_control", "command": "reload", "query": user_input}
+
         elif "screenshot" in lower and ("tab" in lower or "browser" in lower or "page" in lower):
             data = {"action": "browser_control", "command": "screenshot", "query": user_input}
         
@@ -249,6 +273,12 @@ def process_command(user_input):
             # Pass query once - file_finder.py will extract time and type
             data = {"action": "find_file", "query": user_input}
 
+        # 11b. Force Find Page (visited web pages, from browser history)
+        # Only replaces chat or a file search without any file word ("find that article I read")
+        current_action = data[0].get("action") if isinstance(data, list) else data.get("action")
+        if current_action in ("general_chat", "find_file") and is_page_query(lower):
+            data = {"action": "find_page", "query": user_input}
+
         # 11. Force File Send (MERGED LOGIC)
         send_keywords = ["give", "send", "upload", "fetch", "get"]
         safe_to_override = True
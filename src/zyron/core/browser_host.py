@@ -2,67 +2,214 @@ import sys
 import json
 import struct
 import os
+import hmac
+import secrets
+import socket
+import threading
+import time
 from pathlib import Path
 
 # The native messaging host must read and write from/to stdin/stdout.
 # Each message is prefixed by a 32-bit (4-byte) length field.
+# Zyron processes talk to this host over a local socket using the same framing.
+# Every command carries a request_id, and the reply is routed back to the
+# connection that sent it, so several commands can be in flight at once.
+# Bridge frames may carry raw bytes after the JSON (e.g. screenshots): the JSON
+# then has "binary_length", and the bytes come back as message["payload"].
+# Any local process can reach 127.0.0.1, so a connection must open with a
+# {"action": "hello", "token": ...} frame carrying the per-install token kept in
+# saved_media/bridge_token (readable by the owner only).
 
-def get_message():
-    """Reads a message from standard input and decodes it."""
-    raw_length = sys.stdin.buffer.read(4)
-    if not raw_length:
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+BRIDGE_ADDRESS = ('127.0.0.1', int(os.environ.get('ZYRON_BRIDGE_PORT', '47631')))
+TOKEN_FILE = os.path.join(PROJECT_ROOT, 'saved_media', 'bridge_token')
+AUTH_TIMEOUT = 5  # Seconds a new bridge connection gets to send its token
+ROUTE_TTL_SECONDS = 120  # Forget commands the extension never answered
+
+def encode_frame(message, payload=None):
+    """Encodes a message as a length-prefixed JSON frame, optionally followed by raw bytes."""
+    if payload is not None:
+        message = {**message, "binary_length": len(payload)}
+    content = json.dumps(message).encode('utf-8')
+    frame = struct.pack('=I', len(content)) + content
+    return frame + payload if payload is not None else frame
+
+def read_frame(stream):
+    """Reads one length-prefixed JSON frame (and its binary payload, if any) from a binary stream."""
+    raw_length = stream.read(4)
+    if not raw_length or len(raw_length) < 4:
         return None
     message_length = struct.unpack('=I', raw_length)[0]
-    message = sys.stdin.buffer.read(message_length).decode('utf-8')
-    return json.loads(message)
+    message = json.loads(stream.read(message_length).decode('utf-8'))
+    if "binary_length" in message:
+        message["payload"] = stream.read(message.pop("binary_length"))
+    return message
+
+def read_bridge_token():
+    """The per-install bridge token (OSError if the host has not created it yet)."""
+    with open(TOKEN_FILE, 'r', encoding='utf-8') as f:
+        return f.read().strip()
+
+def ensure_bridge_token():
+    """Returns the bridge token, creating it (mode 0600) on the first run."""
+    try:
+        token = read_bridge_token()
+    except OSError:
+        token = ""
+    if not token:
+        token = secrets.token_hex(32)
+        os.makedirs(os.path.dirname(TOKEN_FILE), exist_ok=True)
+        fd = os.open(TOKEN_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(token)
+    os.chmod(TOKEN_FILE, 0o600)  # Also tightens a file created before this check existed
+    return token
+
+stdout_lock = threading.Lock()
+
+def get_message():
+    """Reads a message from standard input and decodes it."""
+    return read_frame(sys.stdin.buffer)
 
 def send_message(message):
     """Encodes and writes a message to standard output."""
-    content = json.dumps(message).encode('utf-8')
-    sys.stdout.buffer.write(struct.pack('=I', len(content)))
-    sys.stdout.buffer.write(content)
-    sys.stdout.buffer.flush()
+    frame = encode_frame(message)
+    with stdout_lock:
+        sys.stdout.buffer.write(frame)
+        sys.stdout.buffer.flush()
 
-import threading
-import time
+def log_error(text):
+    # We can't easily log to a console, so errors go to a file in TEMP
+    log_path = Path(os.environ.get('TEMP', '')) / 'zyron_native_host_error.log'
+    try:
+        with open(log_path, 'a') as f:
+            f.write(f"Error: {text}\n")
+    except OSError:
+        pass
 
-# --- Command Queue Logic ---
-COMMAND_FILE_PATH = Path(os.environ.get('TEMP', '')) / 'zyron_firefox_commands.json'
+# --- Request Routing ---
+client_locks = {}   # connected Zyron socket -> write lock
+tab_subscribers = set()
+routes = {}         # request_id -> (socket, registered_at)
+routes_lock = threading.Lock()
+
+def send_to_client(conn, message, payload=None):
+    """Writes a frame to one connected Zyron process."""
+    lock = client_locks.get(conn)
+    if lock is None:
+        return False
+    try:
+        with lock:
+            conn.sendall(encode_frame(message, payload))
+        return True
+    except OSError:
+        drop_client(conn)
+        return False
+
+def register_route(request_id, conn):
+    now = time.time()
+    with routes_lock:
+        routes[request_id] = (conn, now)
+        stale = [rid for rid, (_, ts) in routes.items() if now - ts > ROUTE_TTL_SECONDS]
+        for rid in stale:
+            del routes[rid]
+
+def route_reply(message, payload=None):
+    """Hands a reply tagged with a request_id back to the process that asked for it."""
+    request_id = message.get("request_id")
+    if not request_id:
+        return False
+    with routes_lock:
+        entry = routes.pop(request_id, None)
+    if entry is None:
+        return False
+    return send_to_client(entry[0], message, payload)
+
+def broadcast_tabs(message):
+    """Forwards tab snapshots and delta events to every subscribed Zyron process."""
+    with routes_lock:
+        subscribers = list(tab_subscribers)
+    for conn in subscribers:
+        send_to_client(conn, message)
+
+def drop_client(conn):
+    with routes_lock:
+        client_locks.pop(conn, None)
+        tab_subscribers.discard(conn)
+        for rid in [rid for rid, (c, _) in routes.items() if c is conn]:
+            del routes[rid]
+    try:
+        conn.close()
+    except OSError:
+        pass
+
+def serve_client(conn, token):
+    """Forwards commands from one Zyron process to the extension."""
+    reader = conn.makefile('rb')
+    try:
+        conn.settimeout(AUTH_TIMEOUT)
+        hello = read_frame(reader)
+        if not hello or hello.get("action") != "hello" or not hmac.compare_digest(str(hello.get("token", "")), token):
+            log_error("Bridge connection rejected: missing or wrong token")
+            return
+        conn.settimeout(None)
+        while True:
+            command = read_frame(reader)
+            if command is None:
+                break
+
+            # Cancelled/timed-out commands: forget the route so a late reply is dropped
+            if command.get("action") == "cancel":
+                with routes_lock:
+                    routes.pop(command.get("request_id"), None)
+                continue
+
+            # New tab subscriber: ask the extension for a fresh snapshot to start from
+            if command.get("action") == "subscribe_tabs":
+                with routes_lock:
+                    tab_subscribers.add(conn)
+                send_message({"action": "sync_tabs"})
+                continue
+
+            if command.get("request_id"):
+                register_route(command["request_id"], conn)
+            send_message(command)
+    except (OSError, ValueError):
+        pass
+    finally:
+        drop_client(conn)
+
+def run_bridge_server():
+    """Accepts connections from Zyron processes on the local bridge socket."""
+    try:
+        token = ensure_bridge_token()
+    except OSError as e:
+        log_error(f"Bridge token unavailable at {TOKEN_FILE}: {e}")
+        return
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        server.bind(BRIDGE_ADDRESS)
+        server.listen()
+    except OSError as e:
+        log_error(f"Bridge socket unavailable on {BRIDGE_ADDRESS}: {e}")
+        return
 
-def poll_command_queue():
-    """Background thread to check for commands from Zyron."""
     while True:
         try:
-            if COMMAND_FILE_PATH.exists():
-                try:
-                    with open(COMMAND_FILE_PATH, 'r') as f:
-                        commands = json.load(f)
-                    
-                    # Clear the file after reading
-                    os.remove(COMMAND_FILE_PATH)
-                    
-                    # Process commands
-                    if isinstance(commands, list):
-                        for cmd in commands:
-                            if cmd:
-                                send_message(cmd)
-                    elif isinstance(commands, dict):
-                        send_message(commands)
-                    
-                except json.JSONDecodeError:
-                    pass
-                except Exception as e:
-                    pass
-            
-            time.sleep(0.5) # Check every 500ms
-        except Exception:
+            conn, _ = server.accept()
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with routes_lock:
+                client_locks[conn] = threading.Lock()
+            threading.Thread(target=serve_client, args=(conn, token), daemon=True).start()
+        except OSError:
             time.sleep(1)
 
 def main():
     """Main loop of the native messaging host."""
-    
-    # Start polling thread
-    t = threading.Thread(target=poll_command_queue, daemon=True)
+
+    # Start bridge server for Zyron processes
+    t = threading.Thread(target=run_bridge_server, daemon=True)
     t.start()
 
     try:
@@ -70,59 +217,65 @@ def main():
             message = get_message()
             if message is None:
                 break
-            
+            action = message.get("action")
+
             # Action: Ping
-            if message.get("action") == "ping":
+            if action == "ping":
                 send_message({"status": "ok", "message": "Zyron Native Host is alive"})
-            
-            # Action: Update Tabs
-            elif message.get("action") == "update_tabs":
-                # For now, we'll just save this to a local file that activity.py can read
-                # In the future, we might use a faster IPC or shared memory
-                temp_path = Path(os.environ.get('TEMP', '')) / 'zyron_firefox_tabs.json'
+
+            # Action: Tab snapshot or delta event (kept in memory by Zyron's tab registry)
+            elif action in ["update_tabs", "tab_event"]:
+                broadcast_tabs(message)
+
+            # Action: Screenshot -> decoded once here and handed over as a binary frame
+            elif action == "capture_result":
+                import base64
+                started = time.perf_counter()
+                data_url = message.pop("data", "") or ""
+                timings = message.setdefault("timings", {})
+                timings["data_url_bytes"] = len(data_url)
                 try:
-                    with open(temp_path, 'w') as f:
-                        json.dump(message.get("tabs", []), f)
-                    send_message({"status": "success", "received": len(message.get("tabs", []))})
-                except Exception as e:
-                    send_message({"status": "error", "message": str(e)})
-            
-            # Action: Save Screenshot
-            elif message.get("action") == "capture_result":
+                    header, encoded = data_url.split(",", 1)
+                    img_data = base64.b64decode(encoded)
+                except ValueError as e:
+                    route_reply({"action": "capture_error", "request_id": message.get("request_id"), "error": f"Bad screenshot data: {e}"})
+                    continue
+                timings["image_bytes"] = len(img_data)
+                timings["host_decode_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                route_reply(message, payload=img_data)
+
+            # Action: Batch tab screenshots -> all images decoded into one binary frame
+            elif action == "tab_batch_result" and message.get("captures"):
                 import base64
-                data_url = message.get("data", "")
-                if data_url and "base64," in data_url:
+                images, offset = [], 0
+                for capture in message["captures"]:
+                    data_url = capture.pop("data", None)
+                    if not data_url:
+                        continue
                     try:
-                        header, encoded = data_url.split(",", 1)
-                        img_data = base64.b64decode(encoded)
-                        
-                        shot_path = Path(os.environ.get('TEMP', '')) / 'zyron_tab_screenshot.png'
-                        with open(shot_path, 'wb') as f:
-                            f.write(img_data)
-                            
-                        # Signal success? Optional.
-                    except Exception as e:
-                        # Log error
-                        pass
-            
-            # Action: Navigation Result
-            elif message.get("action") == "navigation_result" or message.get("action") == "tab_created":
-                # Save the result from the content script or background script to a file
-                nav_path = Path(os.environ.get('TEMP', '')) / 'zyron_nav_result.json'
-                try:
-                    with open(nav_path, 'w') as f:
-                        json.dump(message if message.get("action") == "tab_created" else message.get("data", {}), f)
-                except Exception as e:
-                    send_message({"status": "error", "message": str(e)})
+                        img_data = base64.b64decode(data_url.split(",", 1)[1])
+                    except (ValueError, IndexError) as e:
+                        capture["error"] = f"Bad screenshot data: {e}"
+                        continue
+                    capture["offset"], capture["length"] = offset, len(img_data)
+                    offset += len(img_data)
+                    images.append(img_data)
+                route_reply(message, payload=b"".join(images))
+
+            # Action: Replies to a tagged command (navigation_result, tab_created, command_result...)
+            elif route_reply(message):
+                pass
+
+            elif action in ["navigation_result", "tab_created", "command_result", "capture_error", "tab_batch_result",
+                            "batch_result"]:
+                # Late reply for a command that was cancelled or timed out
+                pass
 
             else:
                 send_message({"status": "unknown_action", "received": message})
-                
+
     except Exception as e:
-        # We can't easily log to a console, so we might want to log to a file
-        log_path = Path(os.environ.get('TEMP', '')) / 'zyron_native_host_error.log'
-        with open(log_path, 'a') as f:
-            f.write(f"Error: {str(e)}\n")
+        log_error(str(e))
 
 if __name__ == "__main__":
     main()
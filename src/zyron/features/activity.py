@@ -1,12 +1,18 @@
 import psutil
+import copy
 import json
 import os
 import subprocess
-import sqlite3
-import shutil
+import threading
 from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
 import time
+import zyron.features.browser_control as browser_control
+import zyron.features.browser_history as browser_history
+import zyron.features.process_snapshot as process_snapshot
+import zyron.features.system_metrics as system_metrics
+import zyron.features.tab_registry as tab_registry
 
 try:
     import win32gui
@@ -26,6 +32,17 @@ BROWSER_PROCESSES = {
     'opera.exe': 'Opera'
 }
 
+ACTIVITY_DEADLINE_SECONDS = 3.0   # Slower collectors are reported from their last result, marked stale
+ACTIVITY_CACHE_SECONDS = 10       # Repeated "what's open" requests within this window are instant
+
+_collector_pool = ThreadPoolExecutor(max_workers=6, thread_name_prefix="activity")
+_activity_lock = threading.Lock()
+_activity_cache = None            # (collected_at, activities)
+_last_results = {}                # collector name -> its last completed result
+_in_flight = {}                   # collector name -> future still running from an earlier request
+_collecting = None                # Future of the collection in progress, shared by concurrent callers
+_cpu_primed = False
+
 def escape_markdown(text):
     """
     Escapes special characters for Telegram Markdown V1 to prevent parse errors.
@@ -42,276 +59,56 @@ def escape_markdown(text):
     
     return text
 
-def get_running_processes():
-    """Get all running processes with their details"""
+def get_running_processes(with_details=False):
+    """
+    Get all running processes (pid, name) from the shared process snapshot.
+    with_details also reads each process's exe and cmdline (slow, cached per process).
+    """
     processes = []
     
     try:
-        for proc in psutil.process_iter(['pid', 'name', 'exe', 'cmdline']):
-            try:
-                processes.append({
-                    'pid': proc.info['pid'],
-                    'name': proc.info['name'],
-                    'exe': proc.info['exe'],
-                    'cmdline': proc.info['cmdline']
-                })
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+        for proc in process_snapshot.get_processes():
+            entry = {'pid': proc['pid'], 'name': proc['name']}
+            if with_details:
+                entry.update(process_snapshot.details(proc))
+            processes.append(entry)
     except Exception as e:
         print(f"Error getting processes: {e}")
     
     return processes
 
 
+def history_tabs(browser, limit=30):
+    """Most recently visited pages of a browser, from the shared incremental history reader"""
+    return [{'title': visit['title'] or visit['url'], 'url': visit['url']}
+            for visit in browser_history.recent(browser, limit)]
+
+
 def get_chrome_tabs():
-    """Get all Chrome tabs from session storage"""
-    tabs = []
-    
-    try:
-        # Chrome user data path
-        chrome_path = os.path.join(
-            os.environ.get('LOCALAPPDATA', ''),
-            'Google', 'Chrome', 'User Data', 'Default'
-        )
-        
-        # Try to read History file
-        history_db = os.path.join(chrome_path, 'History')
-        
-        if os.path.exists(history_db):
-            # Copy to temp to avoid locking
-            temp_db = os.path.join(os.environ.get('TEMP', ''), 'chrome_history_temp.db')
-            try:
-                shutil.copy2(history_db, temp_db)
-                
-                conn = sqlite3.connect(temp_db)
-                cursor = conn.cursor()
-                
-                # Get recent URLs
-                cursor.execute("""
-                    SELECT url, title, last_visit_time 
-                    FROM urls 
-                    ORDER BY last_visit_time DESC 
-                    LIMIT 50
-                """)
-                
-                results = cursor.fetchall()
-                conn.close()
-                
-                # Clean up temp file
-                try:
-                    os.remove(temp_db)
-                except:
-                    pass
-            
-                for url, title, _ in results[:30]:  # Limit to 30 recent
-                    if url:
-                        # Use URL as title if title is missing
-                        display_title = title if title else url
-                        tabs.append({
-                            'title': display_title,
-                            'url': url
-                        })
-                        
-            except Exception as e:
-                print(f"Error reading Chrome history: {e}")
-                
-    except Exception as e:
-        print(f"Error getting Chrome tabs: {e}")
-    
-    return tabs
+    """Get recent Chrome pages from its history"""
+    return history_tabs('chrome')
 
 
 def get_brave_tabs():
-    """Get all Brave tabs from session storage"""
-    tabs = []
-    
-    try:
-        # Brave user data path
-        brave_path = os.path.join(
-            os.environ.get('LOCALAPPDATA', ''),
-            'BraveSoftware', 'Brave-Browser', 'User Data', 'Default'
-        )
-        
-        history_db = os.path.join(brave_path, 'History')
-        
-        if os.path.exists(history_db):
-            temp_db = os.path.join(os.environ.get('TEMP', ''), 'brave_history_temp.db')
-            try:
-                shutil.copy2(history_db, temp_db)
-                
-                conn = sqlite3.connect(temp_db)
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT url, title, last_visit_time 
-                    FROM urls 
-                    ORDER BY last_visit_time DESC 
-                    LIMIT 50
-                """)
-                
-                results = cursor.fetchall()
-                conn.close()
-                
-                try:
-                    os.remove(temp_db)
-                except:
-                    pass
-                
-                for url, title, _ in results[:30]:
-                    if url:
-                        display_title = title if title else url
-                        tabs.append({
-                            'title': display_title,
-                            'url': url
-                        })
-                        
-            except Exception as e:
-                print(f"Error reading Brave history: {e}")
-                
-    except Exception as e:
-        print(f"Error getting Brave tabs: {e}")
-    
-    return tabs
+    """Get recent Brave pages from its history"""
+    return history_tabs('brave')
 
 
 def get_edge_tabs():
-    """Get all Edge tabs from session storage"""
-    tabs = []
-    
-    try:
-        # Edge user data path
-        edge_path = os.path.join(
-            os.environ.get('LOCALAPPDATA', ''),
-            'Microsoft', 'Edge', 'User Data', 'Default'
-        )
-        
-        history_db = os.path.join(edge_path, 'History')
-        
-        if os.path.exists(history_db):
-            temp_db = os.path.join(os.environ.get('TEMP', ''), 'edge_history_temp.db')
-            try:
-                shutil.copy2(history_db, temp_db)
-                
-                conn = sqlite3.connect(temp_db)
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT url, title, last_visit_time 
-                    FROM urls 
-                    ORDER BY last_visit_time DESC 
-                    LIMIT 50
-                """)
-                
-                results = cursor.fetchall()
-                conn.close()
-                
-                try:
-                    os.remove(temp_db)
-                except:
-                    pass
-                
-                for url, title, _ in results[:30]:
-                    if url:
-                        display_title = title if title else url
-                        tabs.append({
-                            'title': display_title,
-                            'url': url
-                        })
-                        
-            except Exception as e:
-                print(f"Error reading Edge history: {e}")
-                
-    except Exception as e:
-        print(f"Error getting Edge tabs: {e}")
-    
-    return tabs
+    """Get recent Edge pages from its history"""
+    return history_tabs('edge')
 
 
 def get_firefox_tabs():
-    """Get Firefox tabs using Native Bridge (temp JSON) or fall back to Places database"""
-    tabs = []
-    
-    # Try Native Bridge first (Real-time data)
-    temp_path = Path(os.environ.get('TEMP', '')) / 'zyron_firefox_tabs.json'
-    if temp_path.exists():
-        try:
-            mtime = temp_path.stat().st_mtime
-            age = time.time() - mtime
-            # Data must be newer than 5 seconds for real-time Focus Mode
-            if age < 5:
-                with open(temp_path, 'r') as f:
-                    tabs = json.load(f)
-                if tabs:
-                    return tabs
-            elif age > 60:
-                # Remove stale data to prevent enforcer acting on zombies
-                try:
-                    os.remove(temp_path)
-                    print(f"🧹 Cleared stale Firefox tab data ({int(age)}s old)")
-                except:
-                    pass
-        except Exception as e:
-            print(f"Error reading Firefox Native Bridge data: {e}")
-
-    try:
-        # Firefox profiles path
-        firefox_path = os.path.join(
-            os.environ.get('APPDATA', ''),
-            'Mozilla', 'Firefox', 'Profiles'
-        )
-        
-        if not os.path.exists(firefox_path):
+    """Get Firefox tabs from the live tab registry (Native Bridge) or fall back to Places database"""
+    # Try Native Bridge first (Real-time data, served from memory)
+    if browser_control.watch_tabs() and tab_registry.wait_until_live(timeout=1.0):
+        tabs = tab_registry.get_tabs()
+        if tabs:
             return tabs
-        
-        # Find default profile
-        profiles = [d for d in os.listdir(firefox_path) if os.path.isdir(os.path.join(firefox_path, d))]
-        
-        for profile in profiles:
-            if 'default' in profile.lower() or 'release' in profile.lower():
-                profile_path = os.path.join(firefox_path, profile)
-                places_db = os.path.join(profile_path, 'places.sqlite')
-                
-                if os.path.exists(places_db):
-                    temp_db = os.path.join(os.environ.get('TEMP', ''), 'firefox_places_temp.db')
-                    try:
-                        shutil.copy2(places_db, temp_db)
-                        
-                        conn = sqlite3.connect(temp_db)
-                        cursor = conn.cursor()
-                        
-                        cursor.execute("""
-                            SELECT url, title, last_visit_date 
-                            FROM moz_places 
-                            WHERE url IS NOT NULL 
-                            ORDER BY last_visit_date DESC 
-                            LIMIT 50
-                        """)
-                        
-                        results = cursor.fetchall()
-                        conn.close()
-                        
-                        try:
-                            os.remove(temp_db)
-                        except:
-                            pass
-                        
-                        for url, title, _ in results[:30]:
-                            if url:
-                                display_title = title if title else url
-                                tabs.append({
-                                    'title': display_title,
-                                    'url': url
-                                })
-                        
-                        break # Found and processed the main profile
-                        
-                    except Exception as e:
-                        print(f"Error reading Firefox places: {e}")
-                        
-    except Exception as e:
-        print(f"Error getting Firefox tabs: {e}")
-    
-    return tabs
+
+    # Places database fallback
+    return history_tabs('firefox')
 
 
 def get_browser_tabs_win32():
@@ -325,9 +122,9 @@ def get_browser_tabs_win32():
         """Get process name for a window"""
         try:
             _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            for proc in psutil.process_iter(['pid', 'name']):
-                if proc.info['pid'] == pid:
-                    return proc.info['name']
+            proc = process_snapshot.get(pid)
+            if proc:
+                return proc['name']
         except:
             pass
         return None
@@ -369,50 +166,37 @@ def get_browser_tabs_win32():
     return dict(tabs_by_browser)
 
 
+def get_running_browsers():
+    """Display names of the browsers that have a running process"""
+    return {BROWSER_PROCESSES[proc['name']] for proc in get_running_processes() if proc['name'] in BROWSER_PROCESSES}
+
+
+# Display name -> tab reader (databases, or the live registry for Firefox)
+BROWSER_TAB_READERS = {
+    'Google Chrome': get_chrome_tabs,
+    'Brave Browser': get_brave_tabs,
+    'Microsoft Edge': get_edge_tabs,
+    'Mozilla Firefox': get_firefox_tabs,
+}
+
+
 def get_browser_tabs_all():
     """Get browser tabs from all detected browsers using their databases"""
     
     tabs_by_browser = defaultdict(list)
     
     # 1. Detect running browsers
-    processes = get_running_processes()
-    running_browsers = set()
-    
-    for proc in processes:
-        if proc['name'] in BROWSER_PROCESSES:
-            browser_name = BROWSER_PROCESSES[proc['name']]
-            running_browsers.add(browser_name)
-    
+    running_browsers = get_running_browsers()
     print(f"   → Detected running browsers: {running_browsers}")
     
     # 2. Fetch tabs for running browsers using Database methods (Gets ALL tabs, not just active)
-    if 'Google Chrome' in running_browsers:
-        print("   → Fetching Chrome tabs...")
-        chrome_tabs = get_chrome_tabs()
-        if chrome_tabs:
-            tabs_by_browser['Google Chrome'] = chrome_tabs
-            print(f"      ✓ Found {len(chrome_tabs)} Chrome tabs")
-    
-    if 'Brave Browser' in running_browsers:
-        print("   → Fetching Brave tabs...")
-        brave_tabs = get_brave_tabs()
-        if brave_tabs:
-            tabs_by_browser['Brave Browser'] = brave_tabs
-            print(f"      ✓ Found {len(brave_tabs)} Brave tabs")
-    
-    if 'Microsoft Edge' in running_browsers:
-        print("   → Fetching Edge tabs...")
-        edge_tabs = get_edge_tabs()
-        if edge_tabs:
-            tabs_by_browser['Microsoft Edge'] = edge_tabs
-            print(f"      ✓ Found {len(edge_tabs)} Edge tabs")
-    
-    if 'Mozilla Firefox' in running_browsers:
-        print("   → Fetching Firefox tabs...")
-        firefox_tabs = get_firefox_tabs()
-        if firefox_tabs:
-            tabs_by_browser['Mozilla Firefox'] = firefox_tabs
-            print(f"      ✓ Found {len(firefox_tabs)} Firefox tabs")
+    for browser_name, reader in BROWSER_TAB_READERS.items():
+        if browser_name in running_browsers:
+            print(f"   → Fetching {browser_name} tabs...")
+            tabs = reader()
+            if tabs:
+                tabs_by_browser[browser_name] = tabs
+                print(f"      ✓ Found {len(tabs)} {browser_name} tabs")
     
     return dict(tabs_by_browser)
 
@@ -587,45 +371,117 @@ def get_desktop_applications():
     return apps
 
 
-def get_current_activities():
-    """
-    Main function to get all current activities
-    Returns a structured dictionary with browsers, desktop apps, and system info
-    """
-    
+def get_system_info():
+    """CPU, RAM and process count"""
+    global _cpu_primed
+    cpu_percent = system_metrics.summary()["cpu"]["current"] if system_metrics.has_data() else None
+    if cpu_percent is None:
+        # No sampler running: the first call needs a short sample, later calls measure since the previous one
+        cpu_percent = psutil.cpu_percent(interval=None if _cpu_primed else 0.5)
+        _cpu_primed = True
+    else:
+        cpu_percent = round(cpu_percent, 1)
+    mem = psutil.virtual_memory()
+    
+    return {
+        'cpu_usage': f"{cpu_percent}%",
+        'ram_usage': f"{mem.percent}%",
+        'ram_available': f"{round(mem.available / (1024**3), 2)} GB",
+        'total_processes': len(process_snapshot.get_processes())
+    }
+
+
+def _run_collector(name, func):
+    result = func()
+    _last_results[name] = result  # Also kept when it finishes after the deadline
+    return result
+
+
+def _collect_activities(deadline):
+    """Runs the collectors in parallel and builds one snapshot. Called by one thread at a time."""
     print("🔍 Collecting current activities...")
+    started = time.perf_counter()
+    
+    # One collector per running browser, plus desktop apps and system info
+    collectors = {f"browser:{name}": BROWSER_TAB_READERS[name]
+                  for name in get_running_browsers() if name in BROWSER_TAB_READERS}
+    collectors['desktop_apps'] = get_desktop_applications
+    collectors['system_info'] = get_system_info
+    
+    futures = {}
+    for name, func in collectors.items():
+        # Still running from last time (a hung profile, a slow bridge): wait on that one
+        running = _in_flight.get(name)
+        futures[name] = running if running and not running.done() else _collector_pool.submit(_run_collector, name, func)
+    wait(futures.values(), timeout=deadline)
+    
+    results, stale = {}, []
+    for name, future in futures.items():
+        if future.done() and not future.exception():
+            results[name] = future.result()
+            continue
+        if future.done():
+            print(f"   ⚠️ {name} failed: {future.exception()}")
+        else:
+            print(f"   ⏱️ {name} missed the {deadline}s deadline")
+        stale.append(name.split(":", 1)[-1].replace("_", " "))
+        results[name] = _last_results.get(name)
+        if not future.done():
+            _in_flight[name] = future
     
     activities = {
-        'browsers': {},
-        'desktop_apps': [],
-        'system_info': {}
+        'browsers': {name.split(":", 1)[1]: tabs for name, tabs in results.items()
+                     if name.startswith("browser:") and tabs},
+        'desktop_apps': results.get('desktop_apps') or [],
+        'system_info': results.get('system_info') or {},
+        'stale': stale
     }
     
-    # 1. Browsers
-    print("   → Checking browsers...")
-    browser_tabs = get_browser_tabs_all()
-    activities['browsers'] = browser_tabs
-    
-    # 2. Desktop Apps
-    print("   → Checking desktop applications...")
-    activities['desktop_apps'] = get_desktop_applications()
+    print(f"✅ Activity collection complete in {(time.perf_counter() - started) * 1000:.0f}ms"
+          + (f" (stale: {', '.join(stale)})" if stale else ""))
+    return activities
+
+
+def get_current_activities(max_age=ACTIVITY_CACHE_SECONDS, deadline=ACTIVITY_DEADLINE_SECONDS):
+    """
+    Main function to get all current activities
+    Returns a structured dictionary with browsers, desktop apps, and system info.
+    Collectors run in parallel; any that miss the deadline are filled in from their
+    last result and listed under 'stale'. Results are reused for max_age seconds.
+    Concurrent callers share one collection, and each gets its own copy to modify.
+    """
+    global _activity_cache, _collecting
+    
+    with _activity_lock:
+        # A partial snapshot is reused only briefly, so the slow collector gets another chance soon
+        if _activity_cache and _activity_cache[1]['stale']:
+            max_age = min(max_age, 2)
+        if _activity_cache and time.time() - _activity_cache[0] < max_age:
+            print("⚡ Activities served from cache")
+            return copy.deepcopy(_activity_cache[1])
+        collecting = _collecting
+        if collecting is None:
+            collecting = _collecting = Future()
+            owner = True
+        else:
+            owner = False
+    
+    if not owner:
+        # Another request is already collecting: wait for its snapshot (lock not held)
+        return copy.deepcopy(collecting.result())
     
-    # 3. System Info
     try:
-        cpu_percent = psutil.cpu_percent(interval=0.5)
-        mem = psutil.virtual_memory()
-        
-        activities['system_info'] = {
-            'cpu_usage': f"{cpu_percent}%",
-            'ram_usage': f"{mem.percent}%",
-            'ram_available': f"{round(mem.available / (1024**3), 2)} GB",
-            'total_processes': len(list(psutil.process_iter()))
-        }
+        activities = _collect_activities(deadline)
     except Exception as e:
-        print(f"Error getting system info: {e}")
-    
-    print("✅ Activity collection complete!")
-    return activities
+        with _activity_lock:
+            _collecting = None
+        collecting.set_exception(e)
+        raise
+    with _activity_lock:
+        _activity_cache = (time.time(), activities)
+        _collecting = None
+    collecting.set_result(activities)
+    return copy.deepcopy(activities)
 
 
 def format_activities_text(activities, max_message_length=4000):
@@ -686,6 +542,9 @@ def format_activities_text(activities, max_message_length=4000):
         lines.append(f"   RAM: {info.get('ram_usage', 'N/A')} (Free: {info.get('ram_available', 'N/A')})")
         lines.append(f"   Processes: {info.get('total_processes', 'N/A')}")
     
+    if activities.get('stale'):
+        lines.append(f"\n_Still loading, showing last known: {escape_markdown(', '.join(activities['stale']))}_")
+    
     full_text = "\n".join(lines)
     
     # Split if too long
@@ -768,6 +627,9 @@ def split_long_message(activities, max_length=4000):
         final_lines.append(f"   RAM: {info.get('ram_usage', 'N/A')} (Free: {info.get('ram_available', 'N/A')})")
         final_lines.append(f"   Processes: {info.get('total_processes', 'N/A')}")
     
+    if activities.get('stale'):
+        final_lines.append(f"\n_Still loading, showing last known: {escape_markdown(', '.join(activities['stale']))}_")
+    
     if final_lines:
         messages.append("\n".join(final_lines))
     
@@ -0,0 +1,94 @@
+"""
+Asyncio client for the browser bridge.
+Same commands as browser_control, but awaitable without tying up a worker thread,
+plus run_batch() to ship several ordered steps to the extension in one message.
+"""
+
+import asyncio
+import functools
+
+import zyron.features.browser_control as browser_control
+from zyron.features.browser_control import DEFAULT_TIMEOUT, element_selector
+
+
+def _cancel(request_id):
+    # cancel_command writes to the bridge socket: keep it off the event loop too
+    asyncio.get_running_loop().run_in_executor(None, browser_control.cancel_command, request_id)
+
+
+def _cancel_once_submitted(submitted):
+    if not submitted.cancelled() and submitted.exception() is None:
+        _cancel(submitted.result().request_id)
+
+
+async def request(action, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """Sends a command and awaits its reply. Timeouts and task cancellation cancel the command."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    # Connecting (up to 2 s) and writing the frame block: run them in a worker thread
+    submitted = loop.run_in_executor(None, functools.partial(browser_control.submit_command, action, **kwargs))
+    try:
+        future = await asyncio.wait_for(asyncio.shield(submitted), timeout)
+    except asyncio.TimeoutError:
+        submitted.add_done_callback(_cancel_once_submitted)
+        return {"success": False, "error": "Timeout waiting for browser response"}
+    except asyncio.CancelledError:
+        submitted.add_done_callback(_cancel_once_submitted)
+        raise
+
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), max(deadline - loop.time(), 0))
+    except asyncio.TimeoutError:
+        _cancel(future.request_id)
+        return {"success": False, "error": "Timeout waiting for browser response"}
+    except asyncio.CancelledError:
+        _cancel(future.request_id)
+        raise
+
+
+def step(action, **kwargs):
+    """Builds one batch step, e.g. step("type", selector="12", text="pikachu")."""
+    if "selector" in kwargs:
+        kwargs["selector"] = element_selector(kwargs["selector"])
+    return {"action": action, **kwargs}
+
+
+async def run_batch(steps, tab_id=None, timeout=30):
+    """
+    Runs ordered steps in the extension with a single message.
+    Returns {"success", "results": [...per step], "failed_step", "tabId"}.
+    """
+    steps = [step(**s) for s in steps]
+    return await request("batch", timeout=timeout, steps=steps, tabId=tab_id)
+
+
+async def wait_until_ready(tab_id=None, grace_ms=1500, timeout=10):
+    """Waits (inside the browser) for a pending navigation in the tab to finish loading."""
+    return await request("wait_ready", timeout=timeout, tabId=tab_id,
+                         grace_ms=grace_ms, timeout_ms=int(timeout * 1000))
+
+
+async def click_element(selector, tab_id=None, timeout=DEFAULT_TIMEOUT):
+    return await request("click", timeout=timeout, selector=element_selector(selector), tabId=tab_id)
+
+
+async def type_text(selector, text, tab_id=None, timeout=DEFAULT_TIMEOUT):
+    return await request("type", timeout=timeout, selector=element_selector(selector), text=text, tabId=tab_id)
+
+
+async def press_key(selector, key, tab_id=None, timeout=DEFAULT_TIMEOUT):
+    return await request("press_key", timeout=timeout, selector=element_selector(selector), key=key, tabId=tab_id)
+
+
+async def scroll_page(direction="down", tab_id=None, timeout=DEFAULT_TIMEOUT):
+    return await request("scroll", timeout=timeout, direction=direction, tabId=tab_id)
+
+
+async def read_page(tab_id=None, timeout=DEFAULT_TIMEOUT):
+    result = await request("read", timeout=timeout, tabId=tab_id, **browser_control.page_cache_hints("read", tab_id))
+    return browser_control.remember_page_result("read", tab_id, result)
+
+
+async def scan_page(tab_id=None, timeout=DEFAULT_TIMEOUT):
+    result = await request("scan", timeout=timeout, tabId=tab_id, **browser_control.page_cache_hints("scan", tab_id))
+    return browser_control.remember_page_result("scan", tab_id, result)
@@ -1,65 +1,240 @@
-import json
-import os
+import socket
+import threading
 import time
-from pathlib import Path
+import uuid
+from concurrent.futures import Future, CancelledError, TimeoutError as FutureTimeoutError
 
-COMMAND_FILE_PATH = Path(os.environ.get('TEMP', '')) / 'zyron_firefox_commands.json'
+from zyron.core.browser_host import BRIDGE_ADDRESS, encode_frame, read_frame, read_bridge_token
+import zyron.features.knowledge_base as knowledge_base
+import zyron.features.tab_registry as tab_registry
 
-def send_browser_command(action, **kwargs):
-    """Writes a command to the shared JSON file for the native host to pick up."""
-    # Ensure tabId is passed if provided
-    command = {"action": action, **kwargs}
-    
+# Actions whose reply the caller waits for; everything else is fire-and-forget
+RESULT_ACTIONS = ["read", "scan", "create_tab", "click", "type", "scroll", "batch", "wait_ready", "wait_for", "tab_batch"]
+TAB_OPERATIONS = ["close", "mute", "unmute", "reload", "screenshot"]
+DEFAULT_TIMEOUT = 10
+RECONNECT_BACKOFF = 3  # Seconds to wait before retrying an offline native host
+ERROR_UNREACHABLE = "bridge_unreachable"  # "code" of replies for commands that never reached the host
+
+# Connection to the native host bridge (shared by every thread in this process)
+_connection = None
+_connection_lock = threading.Lock()
+_retry_after = 0
+_watching_tabs = False
+_subscribed = None  # Connection that carries our tab event subscription
+
+# In-flight commands: request_id -> Future, and the connection each was written to
+_pending = {}
+_sent_on = {}
+_pending_lock = threading.Lock()
+
+# Last read/scan result per (tab id, action). The content script caches per page
+# instance and DOM version; when it reports "unchanged" we reuse this copy instead
+# of shipping the whole result again.
+_page_cache = {}
+
+
+def _connect():
+    """Opens (or reuses) the bridge socket and starts the reply reader. Caller holds _connection_lock."""
+    global _connection, _retry_after, _subscribed
+    if _connection is None:
+        if time.time() < _retry_after:
+            raise OSError("native host offline")
+        try:
+            conn = socket.create_connection(BRIDGE_ADDRESS, timeout=2)
+        except OSError:
+            _retry_after = time.time() + RECONNECT_BACKOFF
+            raise
+        try:
+            # The host drops connections that do not open with the per-install token
+            conn.sendall(encode_frame({"action": "hello", "token": read_bridge_token()}))
+        except OSError:
+            conn.close()
+            _retry_after = time.time() + RECONNECT_BACKOFF
+            raise
+        conn.settimeout(None)
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        _connection = conn
+        threading.Thread(target=_read_replies, args=(conn,), daemon=True).start()
+
+    if _watching_tabs and _subscribed is not _connection:
+        _connection.sendall(encode_frame({"action": "subscribe_tabs"}))
+        _subscribed = _connection
+    return _connection
+
+
+def _send(command):
+    """Writes one command frame to the native host. Returns an error string on failure."""
+    global _connection
+    with _connection_lock:
+        try:
+            conn = _connect()
+            with _pending_lock:
+                if command.get("request_id") in _pending:
+                    _sent_on[command["request_id"]] = conn
+            conn.sendall(encode_frame(command))
+            return None
+        except OSError as e:
+            if _connection is not None:
+                try: _connection.close()
+                except OSError: pass
+                _connection = None
+            return f"Native host not reachable: {e}"
+
+
+def _read_replies(conn):
+    """Background thread resolving pending futures as tagged replies arrive."""
+    global _connection
+    reader = conn.makefile('rb')
     try:
-        commands = []
-        if COMMAND_FILE_PATH.exists():
-            try:
-                with open(COMMAND_FILE_PATH, 'r') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        commands = data
-            except: pass
-            
-        commands.append(command)
-        
-        with open(COMMAND_FILE_PATH, 'w') as f:
-            json.dump(commands, f)
-        
-        # if the action expects a result (like "read" or "scan" or "create_tab"), wait for it
-        if action in ["read", "scan", "create_tab", "click", "type", "scroll"]:
-            return wait_for_result()
-            
-        return True
-    except Exception as e:
-        print(f"❌ Failed to queue browser command: {e}")
+        while True:
+            message = read_frame(reader)
+            if message is None:
+                break
+            if message.get("action") in ["update_tabs", "tab_event"]:
+                tab_registry.apply_event(message)
+                continue
+            if message.get("action") == "navigation_result":
+                result = message.get("data") or {}
+            else:
+                result = message
+            _settle(message.get("request_id"), result)
+    except (OSError, ValueError):
+        pass
+    finally:
+        with _connection_lock:
+            if _connection is conn:
+                _connection = None
+        try: conn.close()
+        except OSError: pass
+        if _subscribed is conn:
+            tab_registry.reset()
+
+        # Nothing can answer the commands sent over this connection anymore. Commands
+        # already written to a newer connection are still in flight and stay pending.
+        with _pending_lock:
+            orphaned = [request_id for request_id, sent_on in _sent_on.items() if sent_on is conn]
+        for request_id in orphaned:
+            _settle(request_id, {"success": False, "error": "Native host disconnected"})
+
+
+def _settle(request_id, result):
+    # Whoever pops the future owns it, so a reply and a cancel can never both win.
+    # An awaiting asyncio wrapper may still cancel it from its side, hence the check.
+    with _pending_lock:
+        future = _pending.pop(request_id, None)
+        _sent_on.pop(request_id, None)
+    if future is not None and future.set_running_or_notify_cancel():
+        future.set_result(result)
+
+
+def watch_tabs():
+    """Subscribes this process to live tab events feeding tab_registry. Returns True if connected."""
+    global _watching_tabs
+    _watching_tabs = True
+    with _connection_lock:
+        try:
+            _connect()
+            return True
+        except OSError:
+            return False
+
+
+def submit_command(action, **kwargs):
+    """Sends a command tagged with a fresh request_id and returns a Future for its reply."""
+    request_id = uuid.uuid4().hex
+    future = Future()
+    future.request_id = request_id
+
+    with _pending_lock:
+        _pending[request_id] = future
+
+    error = _send({"action": action, "request_id": request_id, **kwargs})
+    if error:
+        _settle(request_id, {"success": False, "error": error, "code": ERROR_UNREACHABLE})
+    return future
+
+
+def cancel_command(request_id):
+    """Cancels an in-flight command. A reply arriving later is dropped by the host."""
+    with _pending_lock:
+        future = _pending.pop(request_id, None)
+        _sent_on.pop(request_id, None)
+    if future is None:
         return False
+    future.cancel()
+    _send({"action": "cancel", "request_id": request_id})
+    return True
+
+
+def wait_for_result(future, timeout=DEFAULT_TIMEOUT):
+    """Blocks until the reply for this command arrives, cancelling it on timeout."""
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        cancel_command(future.request_id)
+        return {"success": False, "error": "Timeout waiting for browser response"}
+    except CancelledError:
+        return {"success": False, "error": "Command cancelled"}
+
 
-def wait_for_result(timeout=10):
-    """Polls for the result file from the native host."""
-    nav_path = Path(os.environ.get('TEMP', '')) / 'zyron_nav_result.json'
-    
-    # Clear old result first
-    if nav_path.exists():
-        try: os.remove(nav_path)
-        except: pass
-        
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        if nav_path.exists():
-            try:
-                time.sleep(0.1)
-                with open(nav_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Handle direct message or wrapped data
-                    if not data: continue
-                try: os.remove(nav_path)
-                except: pass
-                return data
-            except:
-                pass
-        time.sleep(0.2)
-        
-    return {"success": False, "error": "Timeout waiting for browser response"}
+def send_browser_command(action, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """Sends a command to the extension through the native host bridge."""
+    if action in RESULT_ACTIONS:
+        return wait_for_result(submit_command(action, **kwargs), timeout)
+
+    # Fire-and-forget: still tagged, but nobody waits for the acknowledgement
+    error = _send({"action": action, "request_id": uuid.uuid4().hex, **kwargs})
+    if error:
+        print(f"❌ Failed to send browser command: {error}")
+        return False
+    return True
+
+def page_cache_hints(action, tab_id):
+    """Tells the content script which page version we already hold for this tab."""
+    cached = _page_cache.get((tab_id, action))
+    if not cached:
+        return {}
+    return {"known_page": cached.get("page_id"), "known_version": cached.get("dom_version")}
+
+
+def remember_page_result(action, tab_id, result):
+    """Stores a fresh read/scan result, or expands an 'unchanged' reply from the cache."""
+    if not isinstance(result, dict):
+        return result
+    cached = _page_cache.get((tab_id, action))
+    if result.get("unchanged") and cached:
+        return {**cached, "cached": True}
+    if result.get("success") and "page_id" in result:
+        _page_cache[(tab_id, action)] = result
+        if action == "read" and not result.get("cached"):
+            # Fresh page text: keep it for answering later questions offline
+            knowledge_base.add_page_async(result.get("url"), result.get("title"), result.get("content"), "browser")
+    return result
+
+
+def _forget_closed_tab(event, tab):
+    if event == "remove" and tab:
+        for action in ["read", "scan"]:
+            _page_cache.pop((tab.get('id'), action), None)
+    elif event == "reset":
+        _page_cache.clear()
+
+tab_registry.add_listener(_forget_closed_tab)
+
+
+def element_selector(selector):
+    """Scan ids (e.g. "12") become a data-zyron-id selector; anything else is a CSS selector."""
+    if str(selector).isdigit():
+        return f'[data-zyron-id="{selector}"]'
+    return selector
+
+def run_batch(steps, tab_id=None, timeout=30):
+    """
+    Runs ordered steps (e.g. type, press_key, read) in the extension with one message.
+    The extension waits for page loads/DOM readiness between steps.
+    """
+    steps = [{**step, "selector": element_selector(step["selector"])} if "selector" in step else step for step in steps]
+    return send_browser_command("batch", timeout=timeout, steps=steps, tabId=tab_id)
 
 def close_tab(tab_id):
     return send_browser_command("close_tab", tabId=tab_id)
@@ -67,39 +242,109 @@ def close_tab(tab_id):
 def mute_tab(tab_id, mute=True):
     return send_browser_command("mute_tab", tabId=tab_id, value=mute)
 
-def create_tab(url, active=True):
-    """Returns the tabId of the created tab."""
-    result = send_browser_command("create_tab", url=url, active=active)
+def create_tab(url, active=True, hidden=False):
+    """Returns the tabId of the created tab. Hidden tabs stay out of the tab strip."""
+    result = send_browser_command("create_tab", url=url, active=active, hidden=hidden)
     if isinstance(result, dict) and "tabId" in result:
         return result["tabId"]
     return None
 
+def capture_tab(tab_id, window_id=None, max_width=None, jpeg_quality=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Screenshots a tab fully in memory.
+    The PNG arrives as a binary frame; with max_width/jpeg_quality it is downscaled
+    and re-encoded as JPEG before upload.
+    Returns {"success", "image" (bytes), "format", "stats"} where stats has bytes and ms per step.
+    """
+    started = time.perf_counter()
+    reply = wait_for_result(submit_command("capture_tab", tabId=tab_id, windowId=window_id), timeout)
+    if reply.get("action") != "capture_result" or not reply.get("payload"):
+        return {"success": False, "error": reply.get("error", "Screenshot failed")}
+
+    image = reply["payload"]
+    stats = dict(reply.get("timings", {}))
+    stats["round_trip_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    image_format = "png"
+
+    if max_width or jpeg_quality:
+        try:
+            import io
+            from PIL import Image
+
+            encode_start = time.perf_counter()
+            img = Image.open(io.BytesIO(image))
+            if max_width and img.width > max_width:
+                img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+            out = io.BytesIO()
+            img.convert("RGB").save(out, format="JPEG", quality=jpeg_quality or 85, optimize=True)
+            image = out.getvalue()
+            image_format = "jpeg"
+            stats["reencode_ms"] = round((time.perf_counter() - encode_start) * 1000, 1)
+        except Exception as e:
+            print(f"⚠️ Screenshot re-encode skipped: {e}")
+
+    stats["output_bytes"] = len(image)
+    return {"success": True, "image": image, "format": image_format, "stats": stats}
+
+def batch_tabs(operation, host=None, title=None, audible=None, muted=None, window_id=None,
+               tab_ids=None, limit=None, timeout=30):
+    """
+    Runs one operation (close, mute, unmute, reload, screenshot) on every tab matching
+    the predicate, in a single message to the extension.
+    host also matches subdomains; title is a case-insensitive regex.
+    Returns {"success", "matched": [tabs], "results": [{"tabId", "success", "error"}]};
+    screenshots add "images": [{"tabId", "title", "image" (PNG bytes)}].
+    """
+    if operation not in TAB_OPERATIONS:
+        return {"success": False, "error": f"Unsupported tab operation: {operation}", "matched": [], "results": []}
+
+    match = {"host": host, "title": title, "audible": audible, "muted": muted,
+             "window_id": window_id, "tab_ids": tab_ids}
+    match = {key: value for key, value in match.items() if value is not None}
+    if not match:
+        # An empty predicate would hit every open tab
+        return {"success": False, "error": "No tab filter given", "matched": [], "results": []}
+
+    reply = send_browser_command("tab_batch", timeout=timeout, operation=operation, match=match, limit=limit)
+    reply.setdefault("matched", [])
+    reply.setdefault("results", [])
+
+    if operation == "screenshot":
+        payload = reply.pop("payload", b"")
+        titles = {tab.get('id'): tab.get('title') for tab in reply["matched"]}
+        reply["images"] = [
+            {"tabId": c["tabId"], "title": titles.get(c["tabId"]), "image": payload[c["offset"]:c["offset"] + c["length"]]}
+            for c in reply.pop("captures", []) if "offset" in c
+        ]
+    return reply
+
+def capture_tab_with_window(tab_id, window_id):
+    return capture_tab(tab_id, window_id)
+
 def navigate(url, tab_id=None):
     if tab_id:
         return send_browser_command("navigate", url=url, tabId=tab_id)
     return send_browser_command("create_tab", url=url)
 
 def click_element(selector, tab_id=None):
-    if str(selector).isdigit():
-        selector = f'[data-zyron-id="{selector}"]'
+    selector = element_selector(selector)
     return send_browser_command("click", selector=selector, tabId=tab_id)
 
 def type_text(selector, text, tab_id=None):
-    if str(selector).isdigit():
-        selector = f'[data-zyron-id="{selector}"]'
+    selector = element_selector(selector)
     return send_browser_command("type", selector=selector, text=text, tabId=tab_id)
 
 def scroll_page(direction="down", tab_id=None):
     return send_browser_command("scroll", direction=direction, tabId=tab_id)
 
-def read_page(tab_id=None):
-    return send_browser_command("read", tabId=tab_id)
+def read_page(tab_id=None, timeout=DEFAULT_TIMEOUT):
+    result = send_browser_command("read", timeout=timeout, tabId=tab_id, **page_cache_hints("read", tab_id))
+    return remember_page_result("read", tab_id, result)
 
-def scan_page(tab_id=None):
-    return send_browser_command("scan", tabId=tab_id)
+def scan_page(tab_id=None, timeout=DEFAULT_TIMEOUT):
+    result = send_browser_command("scan", timeout=timeout, tabId=tab_id, **page_cache_hints("scan", tab_id))
+    return remember_page_result("scan", tab_id, result)
 
 def press_key(selector, key, tab_id=None):
-    if str(selector).isdigit():
-        selector = f'[data-zyron-id="{selector}"]'
+    selector = element_selector(selector)
     return send_browser_command("press_key", selector=selector, key=key, tabId=tab_id)
-
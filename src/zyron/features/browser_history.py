@@ -0,0 +1,222 @@
+"""
+Browser History Reader for Zyron Desktop Assistant
+One incremental reader for the Chromium (Chrome, Edge, Brave) History and
+Firefox places.sqlite databases.
+Databases are opened read-only in place (immutable when the browser holds a lock);
+a temp copy is made only when that fails, and only again after the file changes.
+Each poll reads just the visits newer than the last one seen, and nothing at all
+when the database file has not changed since the previous poll.
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+CHROMIUM_EPOCH_OFFSET = 11644473600   # Seconds from 1601-01-01 (Chromium/WebKit time) to 1970-01-01
+RECENT_LIMIT = 200                    # Distinct URLs kept in memory per browser
+INITIAL_VISITS = 1000                 # Visits read on the first poll of a database
+PROFILE_CACHE_SECONDS = 300
+
+LOCAL_APP_DATA = os.environ.get('LOCALAPPDATA', '')
+BROWSERS = {
+    'chrome': {'kind': 'chromium', 'root': os.path.join(LOCAL_APP_DATA, 'Google', 'Chrome', 'User Data')},
+    'edge': {'kind': 'chromium', 'root': os.path.join(LOCAL_APP_DATA, 'Microsoft', 'Edge', 'User Data')},
+    'brave': {'kind': 'chromium', 'root': os.path.join(LOCAL_APP_DATA, 'BraveSoftware', 'Brave-Browser', 'User Data')},
+    'firefox': {'kind': 'firefox', 'root': os.path.join(os.environ.get('APPDATA', ''), 'Mozilla', 'Firefox', 'Profiles')},
+}
+PROCESS_BROWSERS = {'chrome.exe': 'chrome', 'msedge.exe': 'edge', 'brave.exe': 'brave', 'firefox.exe': 'firefox'}
+
+# Visits after the watermark (raw browser time, microseconds), newest first
+VISIT_QUERIES = {
+    'chromium': """
+        SELECT urls.url, urls.title, visits.visit_time
+        FROM visits JOIN urls ON urls.id = visits.url
+        WHERE visits.visit_time > ?
+        ORDER BY visits.visit_time DESC LIMIT ?
+    """,
+    'firefox': """
+        SELECT moz_places.url, moz_places.title, moz_historyvisits.visit_date
+        FROM moz_historyvisits JOIN moz_places ON moz_places.id = moz_historyvisits.place_id
+        WHERE moz_historyvisits.visit_date > ?
+        ORDER BY moz_historyvisits.visit_date DESC LIMIT ?
+    """,
+}
+
+_lock = threading.RLock()
+_profiles = {}        # browser -> (discovered_at, [history db paths])
+_databases = {}       # db path -> {"mode", "stamp", "watermark", "copy", "copy_stamp"}
+_recent = {}          # browser -> OrderedDict(url -> visit), newest last
+_listeners = []
+
+
+def to_unix(browser, value):
+    """Converts a raw visit time (microseconds) to Unix seconds."""
+    if not value:
+        return 0.0
+    seconds = value / 1_000_000
+    return seconds - CHROMIUM_EPOCH_OFFSET if BROWSERS[browser]['kind'] == 'chromium' else seconds
+
+
+def get_profiles(browser):
+    """History database paths of a browser's profiles (discovery cached for a few minutes)."""
+    with _lock:
+        cached = _profiles.get(browser)
+        if cached and time.time() - cached[0] < PROFILE_CACHE_SECONDS:
+            return cached[1]
+
+        config = BROWSERS.get(browser)
+        paths = []
+        if config and os.path.isdir(config['root']):
+            root = Path(config['root'])
+            if config['kind'] == 'chromium':
+                candidates = [root / 'Default'] + sorted(root.glob('Profile *'))
+                paths = [str(p / 'History') for p in candidates if (p / 'History').exists()]
+            else:
+                # Same rule as before: the first 'default' or 'release' profile
+                for profile in sorted(root.iterdir()):
+                    name = profile.name.lower()
+                    if ('default' in name or 'release' in name) and (profile / 'places.sqlite').exists():
+                        paths = [str(profile / 'places.sqlite')]
+                        break
+        _profiles[browser] = (time.time(), paths)
+        return paths
+
+
+def _stamp(path):
+    """(mtime, size) of the database and its WAL: changes whenever the browser writes."""
+    stamp = []
+    for name in (path, path + '-wal'):
+        try:
+            st = os.stat(name)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def _connect_uri(path, immutable):
+    uri = Path(path).absolute().as_uri() + '?mode=ro' + ('&immutable=1' if immutable else '')
+    conn = sqlite3.connect(uri, uri=True, timeout=0.5)
+    conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()  # Fails here if locked or unreadable
+    return conn
+
+
+def _copy(path, state, stamp):
+    """Temp copy of the database (and WAL), refreshed only when the original changed (stamp)."""
+    if state.get('copy') is None:
+        digest = hashlib.md5(path.encode('utf-8')).hexdigest()[:10]
+        state['copy'] = os.path.join(tempfile.gettempdir(), f"zyron_history_{digest}.db")
+    if state.get('copy_stamp') != stamp or not os.path.exists(state['copy']):
+        shutil.copy2(path, state['copy'])
+        if os.path.exists(path + '-wal'):
+            shutil.copy2(path + '-wal', state['copy'] + '-wal')
+        elif os.path.exists(state['copy'] + '-wal'):
+            os.remove(state['copy'] + '-wal')
+        state['copy_stamp'] = stamp
+    return sqlite3.connect(state['copy'], timeout=0.5)
+
+
+def _open(path, state, stamp):
+    """
+    Opens the database the cheapest way that works, remembering it for next time:
+    read-only in place, then immutable (ignores the browser's lock), then a temp copy.
+    """
+    modes = ['ro', 'immutable', 'copy']
+    if os.path.exists(path + '-wal') and os.path.getsize(path + '-wal') > 0:
+        modes.remove('immutable')  # immutable=1 ignores the WAL, where the newest visits are
+    if state.get('mode') in modes:
+        modes.remove(state['mode'])
+        modes.insert(0, state['mode'])
+    error = None
+    for mode in modes:
+        try:
+            conn = _copy(path, state, stamp) if mode == 'copy' else _connect_uri(path, mode == 'immutable')
+            state['mode'] = mode
+            return conn
+        except (sqlite3.Error, OSError) as e:
+            error = e
+    raise sqlite3.OperationalError(f"cannot open {path}: {error}")
+
+
+def _read_new(browser, path):
+    state = _databases.setdefault(path, {'watermark': 0})
+    stamp = _stamp(path)
+    if stamp == state.get('stamp'):
+        return []  # Unchanged since the last poll
+
+    kind = BROWSERS[browser]['kind']
+    limit = INITIAL_VISITS if not state['watermark'] else RECENT_LIMIT * 5
+    conn = _open(path, state, stamp)
+    try:
+        try:
+            rows = conn.execute(VISIT_QUERIES[kind], (state['watermark'], limit)).fetchall()
+        except sqlite3.DatabaseError:
+            if state['mode'] != 'immutable':
+                raise
+            # The browser wrote mid-read under immutable=1: read a copy this time
+            conn.close()
+            state['mode'] = 'copy'
+            conn = _copy(path, state, stamp)
+            rows = conn.execute(VISIT_QUERIES[kind], (state['watermark'], limit)).fetchall()
+    finally:
+        conn.close()
+    # Only now: a locked database or failed copy is retried on the next poll
+    state['stamp'] = stamp
+
+    if rows:
+        state['watermark'] = max(state['watermark'], rows[0][2] or 0)
+    visits = [{'url': url, 'title': title or '', 'visit_time': to_unix(browser, raw), 'browser': browser}
+              for url, title, raw in reversed(rows) if url]
+    return visits
+
+
+def poll(browser):
+    """Reads the visits added since the last poll (oldest first) and notifies listeners."""
+    new = []
+    with _lock:
+        for path in get_profiles(browser):
+            try:
+                new.extend(_read_new(browser, path))
+            except (sqlite3.Error, OSError) as e:
+                print(f"⚠️ Could not read {browser} history: {e}")
+        if new:
+            new.sort(key=lambda v: v['visit_time'])
+            recent = _recent.setdefault(browser, OrderedDict())
+            for visit in new:
+                recent.pop(visit['url'], None)
+                recent[visit['url']] = visit
+            while len(recent) > RECENT_LIMIT:
+                recent.popitem(last=False)
+
+    if new:
+        for callback in list(_listeners):
+            try:
+                callback(browser, new)
+            except Exception as e:
+                print(f"⚠️ Browser history listener error: {e}")
+    return new
+
+
+def recent(browser, limit=30):
+    """Most recently visited distinct URLs, newest first: [{"url", "title", "visit_time", "browser"}]."""
+    poll(browser)
+    with _lock:
+        visits = list(_recent.get(browser, {}).values())
+    return visits[::-1][:limit]
+
+
+def add_listener(callback):
+    """callback(browser, visits) runs after each poll that found new visits."""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def get_stats():
+    with _lock:
+        return {path: {'mode': s.get('mode'), 'watermark': s.get('watermark')} for path, s in _databases.items()}
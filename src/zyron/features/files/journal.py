@@ -0,0 +1,213 @@
+"""
+File Activity Journal for Zyron Desktop Assistant
+Append-only storage for the file activity log: one JSON-lines segment per day
+(file_activity_log/2024-05-01.jsonl) of compact records
+    {"t": epoch seconds, "p": path, "a": app, "d": duration}
+Duration updates of the latest entry are appended as {"d": seconds} lines and
+folded into the entry when the segment is compacted. Recording an event costs
+one appended line however long the history is, and retention deletes whole
+day files instead of parsing every entry.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+JOURNAL_DIR = "file_activity_log"
+LEGACY_LOG = "file_activity_log.json"
+COMPACT_AFTER_UPDATES = 40    # Duration lines in a segment before it is rewritten
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_lock = threading.Lock()
+_pending_updates = {}         # segment day -> duration lines appended since its last compaction
+_tail_checked = set()         # Segment days whose last line is known to end with a newline
+
+
+def _day(epoch):
+    return datetime.fromtimestamp(epoch).strftime('%Y-%m-%d')
+
+
+def _segment_path(day):
+    return os.path.join(JOURNAL_DIR, f"{day}.jsonl")
+
+
+def list_days():
+    """Days that have a segment, oldest first."""
+    if not os.path.isdir(JOURNAL_DIR):
+        return []
+    return sorted(name[:-6] for name in os.listdir(JOURNAL_DIR) if name.endswith('.jsonl'))
+
+
+def to_entry(record):
+    """Expands a compact record to the activity log entry format used by the finder."""
+    path = record['p']
+    return {
+        'timestamp': datetime.fromtimestamp(record['t']).strftime(TIMESTAMP_FORMAT),
+        'time': record['t'],
+        'file_path': path,
+        'file_name': os.path.basename(path),
+        'file_type': os.path.splitext(path)[1].lower().replace('.', ''),
+        'app_used': record['a'],
+        'duration_seconds': record.get('d', 0),
+    }
+
+
+def _read_segment(day):
+    """Records of one segment with duration updates folded in, oldest first."""
+    records = []
+    try:
+        with open(_segment_path(day), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line after a crash
+                if 'p' in record:
+                    records.append(record)
+                elif records and 'd' in record:
+                    records[-1]['d'] = record['d']
+    except OSError:
+        pass
+    return records
+
+
+def _append_line(day, record):
+    os.makedirs(JOURNAL_DIR, exist_ok=True)
+    path = _segment_path(day)
+    line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+    if day not in _tail_checked:
+        # A crash can leave a torn last line without its newline: start a fresh line
+        # instead of gluing this record onto it (once per segment per run)
+        try:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    line = '\n' + line
+        except OSError:
+            pass  # New or empty segment
+        _tail_checked.add(day)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(line)
+
+
+def append(path, app, epoch=None, duration=0):
+    """Appends a new entry and returns its record."""
+    record = {'t': int(epoch if epoch is not None else time.time()), 'p': path, 'a': app, 'd': duration}
+    with _lock:
+        _append_line(_day(record['t']), record)
+    return record
+
+
+def update_duration(record, duration):
+    """Records a new duration for the latest entry (appended now, folded in at compaction)."""
+    record['d'] = duration
+    day = _day(record['t'])
+    with _lock:
+        _append_line(day, {'d': duration})
+        _pending_updates[day] = _pending_updates.get(day, 0) + 1
+        if _pending_updates[day] >= COMPACT_AFTER_UPDATES:
+            _compact(day)
+
+
+def _write_segment(day, records):
+    """Replaces a segment atomically, so lock-free readers see the old or the new file."""
+    os.makedirs(JOURNAL_DIR, exist_ok=True)
+    path = _segment_path(day)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+    os.replace(tmp, path)
+
+
+def _compact(day):
+    _write_segment(day, _read_segment(day))
+    _pending_updates.pop(day, None)
+
+
+def compact(day=None):
+    """Folds duration updates into their entries; all segments with pending updates by default."""
+    with _lock:
+        for d in ([day] if day else list(_pending_updates)):
+            try:
+                _compact(d)
+            except OSError as e:
+                print(f"Error compacting file activity segment {d}: {e}")
+
+
+def read(start=None, end=None):
+    """
+    Entries between two datetimes (either may be None), oldest first.
+    Only the segments of the days in range are opened. Runs without _lock: segments
+    are only appended to or atomically replaced, and a torn last line is skipped.
+    """
+    first = start.strftime('%Y-%m-%d') if start else None
+    last = end.strftime('%Y-%m-%d') if end else None
+    lo = start.timestamp() if start else float('-inf')
+    hi = end.timestamp() if end else float('inf')
+    entries = []
+    for day in list_days():
+        if (first and day < first) or (last and day > last):
+            continue
+        entries.extend(to_entry(r) for r in _read_segment(day) if lo <= r['t'] <= hi)
+    return entries
+
+
+def last_record():
+    """The newest record, read from the newest segment only."""
+    with _lock:
+        for day in reversed(list_days()):
+            records = _read_segment(day)
+            if records:
+                return records[-1]
+    return None
+
+
+def cleanup(days=30):
+    """Deletes the segments older than N days. Returns how many were removed."""
+    cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    removed = 0
+    with _lock:
+        for day in list_days():
+            if day < cutoff:
+                try:
+                    os.remove(_segment_path(day))
+                    _pending_updates.pop(day, None)
+                    removed += 1
+                except OSError as e:
+                    print(f"Error removing file activity segment {day}: {e}")
+    return removed
+
+
+def migrate_legacy():
+    """One-time import of the old single-file JSON log into daily segments."""
+    if not os.path.exists(LEGACY_LOG):
+        return 0
+    try:
+        with open(LEGACY_LOG, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except Exception as e:
+        print(f"Error reading old file activity log: {e}")
+        return 0
+
+    by_day = {}
+    for entry in entries:
+        try:
+            epoch = int(datetime.strptime(entry['timestamp'], TIMESTAMP_FORMAT).timestamp())
+        except (KeyError, ValueError):
+            continue
+        record = {'t': epoch, 'p': entry['file_path'], 'a': entry.get('app_used', ''),
+                  'd': entry.get('duration_seconds', 0)}
+        by_day.setdefault(_day(epoch), []).append(record)
+
+    with _lock:
+        for day, records in by_day.items():
+            records = _read_segment(day) + records
+            records.sort(key=lambda r: r['t'])
+            _write_segment(day, records)
+            _pending_updates.pop(day, None)
+    os.replace(LEGACY_LOG, LEGACY_LOG + '.migrated')
+    print(f"📁 Moved {len(entries)} file activity records to daily segments")
+    return len(entries)
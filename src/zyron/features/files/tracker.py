@@ -1,31 +1,35 @@
 """
 File Tracker Module for Zyron Desktop Assistant
 Tracks all file opens/access in real-time and logs activity
+(stored as daily append-only segments, see journal.py)
 """
 
 import os
-import json
 import time
 import threading
-import sqlite3
-import shutil
 import urllib.parse
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import win32gui
 import win32process
 import psutil
+import zyron.features.browser_history as browser_history
+import zyron.features.files.journal as journal
 
 # Configuration
-FILE_ACTIVITY_LOG = "file_activity_log.json"
 MAX_LOG_DAYS = 30  # Keep last 30 days of activity
 CHECK_INTERVAL = 2  # Check every 2 seconds
+RESOLVE_CACHE_SIZE = 64  # Windows whose resolved file is remembered
+NO_FILE_RECHECK = 10  # Seconds before a window that showed no file is resolved again
+STATS_REPORT_INTERVAL = 600  # Seconds between cache statistics lines in the console
 
 # Global state
-file_activity_log = []
+last_record = None  # Newest journal record (its duration is updated while the file stays open)
 tracking_active = False
 tracker_thread = None
 currently_open_files = {}  # Track files currently being accessed
+resolve_cache = OrderedDict()  # (pid, create_time, window title) -> (file_path, app_name, resolved_at)
+resolve_stats = {'hits': 0, 'misses': 0, 'hit_seconds': 0.0, 'miss_seconds': 0.0}
 
 # List of apps that are browsers (need special handling for local files)
 BROWSER_APPS = {
@@ -74,28 +78,22 @@ TRACKED_EXTENSIONS = [
 
 
 def load_activity_log():
-    """Load existing activity log from file"""
-    global file_activity_log
+    """Load the newest record of the activity journal (importing the old JSON log once)"""
+    global last_record
     
-    if os.path.exists(FILE_ACTIVITY_LOG):
-        try:
-            with open(FILE_ACTIVITY_LOG, 'r', encoding='utf-8') as f:
-                file_activity_log = json.load(f)
-                print(f"📁 Loaded {len(file_activity_log)} file activity records")
-        except Exception as e:
-            print(f"Error loading file activity log: {e}")
-            file_activity_log = []
-    else:
-        file_activity_log = []
-        # Create empty file immediately to ensure it exists
-        save_activity_log()
+    try:
+        journal.migrate_legacy()
+        last_record = journal.last_record()
+        print(f"📁 File activity journal: {len(journal.list_days())} day(s) of records")
+    except Exception as e:
+        print(f"Error loading file activity log: {e}")
+        last_record = None
 
 
 def save_activity_log():
-    """Save activity log to file"""
+    """Fold pending duration updates into the journal segments"""
     try:
-        with open(FILE_ACTIVITY_LOG, 'w', encoding='utf-8') as f:
-            json.dump(file_activity_log, f, indent=2, ensure_ascii=False)
+        journal.compact()
     except Exception as e:
         print(f"Error saving file activity log: {e}")
 
@@ -124,62 +122,32 @@ def get_browser_local_file(browser_process_name, window_title):
     to see if the user is looking at a local file (file:///...)
     """
     try:
-        history_db = None
-        user_data_dir = os.environ.get('LOCALAPPDATA', '')
-
-        # Define paths to History DB based on browser
-        if browser_process_name == 'chrome.exe':
-            history_db = os.path.join(user_data_dir, 'Google', 'Chrome', 'User Data', 'Default', 'History')
-        elif browser_process_name == 'msedge.exe':
-            history_db = os.path.join(user_data_dir, 'Microsoft', 'Edge', 'User Data', 'Default', 'History')
-        elif browser_process_name == 'brave.exe':
-            history_db = os.path.join(user_data_dir, 'BraveSoftware', 'Brave-Browser', 'User Data', 'Default', 'History')
-        
-        if not history_db or not os.path.exists(history_db):
+        browser = browser_history.PROCESS_BROWSERS.get(browser_process_name)
+        if browser not in ('chrome', 'edge', 'brave'):
             return None
 
-        # Copy DB to temp to avoid locking issues
-        temp_db = os.path.join(os.environ.get('TEMP', ''), 'tracker_history_temp.db')
-        try:
-            shutil.copy2(history_db, temp_db)
-            
-            conn = sqlite3.connect(temp_db)
-            cursor = conn.cursor()
-            
-            # IMPROVEMENT: Get last 20 items, not just 1.
-            # This helps if the user opened 3 tabs and we want to find the one matching the window title.
-            cursor.execute("SELECT url, title FROM urls ORDER BY last_visit_time DESC LIMIT 20")
-            rows = cursor.fetchall()
-            conn.close()
-            
-            for row in rows:
-                url, db_title = row
-                if not url: continue
-
-                # CHECK: Is it a local file?
-                if url.startswith('file:///'):
-                    # Convert file:///C:/Users/Name%20Here/Doc.pdf -> C:\Users\Name Here\Doc.pdf
-                    # 1. Unquote removes %20 and other URL encoding
-                    decoded_url = urllib.parse.unquote(url)
-                    # 2. Strip prefix and fix slashes
-                    clean_path = decoded_url.replace('file:///', '').replace('/', '\\')
-                    
-                    # 3. Fuzzy Match: Check if the filename appears in the Window Title
-                    # Window Title: "Project Proposal.pdf - Google Chrome"
-                    # File Name: "Project Proposal.pdf"
-                    filename = os.path.basename(clean_path)
-                    
-                    if filename and (filename.lower() in window_title.lower()):
-                        # Verify file actually exists
-                        if os.path.exists(clean_path):
-                            return clean_path
-        except Exception as e:
-            # print(f"DB Error: {e}")
-            pass
-        finally:
-            if os.path.exists(temp_db):
-                try: os.remove(temp_db)
-                except: pass
+        # Last 20 pages, not just 1: the user may have opened several tabs and we want
+        # the one matching the window title. Only visits since the last poll are read.
+        for visit in browser_history.recent(browser, limit=20):
+            url = visit['url']
+
+            # CHECK: Is it a local file?
+            if url.startswith('file:///'):
+                # Convert file:///C:/Users/Name%20Here/Doc.pdf -> C:\Users\Name Here\Doc.pdf
+                # 1. Unquote removes %20 and other URL encoding
+                decoded_url = urllib.parse.unquote(url)
+                # 2. Strip prefix and fix slashes
+                clean_path = decoded_url.replace('file:///', '').replace('/', '\\')
+                
+                # 3. Fuzzy Match: Check if the filename appears in the Window Title
+                # Window Title: "Project Proposal.pdf - Google Chrome"
+                # File Name: "Project Proposal.pdf"
+                filename = os.path.basename(clean_path)
+                
+                if filename and (filename.lower() in window_title.lower()):
+                    # Verify file actually exists
+                    if os.path.exists(clean_path):
+                        return clean_path
 
     except Exception as e:
         print(f"Error checking browser file: {e}")
@@ -187,8 +155,76 @@ def get_browser_local_file(browser_process_name, window_title):
     return None
 
 
+def resolve_window_file(process, window_title):
+    """Find the file shown by a window: browser history, command line, open handles, then the title"""
+    app_name = process.name().lower()
+    potential_paths = []
+
+    # DEBUG: Un-comment this line if you want to see every window check in console
+    # print(f"[DEBUG] Checking: '{window_title}' ({app_name})")
+
+    # --- METHOD 0: Browser Detection (ENHANCED) ---
+    # If app is a browser, check if it's viewing a local file via History
+    if app_name in BROWSER_APPS:
+        browser_file_path = get_browser_local_file(app_name, window_title)
+        if browser_file_path:
+            # Return immediately if we found a browser file
+            return browser_file_path, BROWSER_APPS[app_name]
+
+    # --- METHOD 1: Command Line Arguments (Most Reliable for Notepad, etc.) ---
+    try:
+        cmdline = process.cmdline()
+        if cmdline:
+            # Skip the first argument (executable itself)
+            for arg in cmdline[1:]:
+                clean_arg = arg.strip('"').strip("'")
+                if os.path.exists(clean_arg) and os.path.isfile(clean_arg):
+                     # FIX: Get filename without extension to match Notepad titles
+                     filename = os.path.basename(clean_arg)      # e.g., "hahahaha.txt"
+                     name_no_ext = os.path.splitext(filename)[0] # e.g., "hahahaha"
+                     
+                     # Check if either full name OR name without extension is in title
+                     if (name_no_ext.lower() in window_title.lower()) or (filename.lower() in window_title.lower()) or len(cmdline) == 2:
+                         potential_paths.append(clean_arg)
+    except (psutil.AccessDenied, IndexError, Exception):
+        pass
+
+    # --- METHOD 2: Open Files Handle (Reliable if Admin, flaky otherwise) ---
+    try:
+        open_files = process.open_files()
+        for f in open_files:
+            if not should_ignore_file(f.path):
+                filename = os.path.basename(f.path)
+                name_no_ext = os.path.splitext(filename)[0]
+                
+                # FIX: Check if name without extension is in title
+                if name_no_ext.lower() in window_title.lower():
+                    potential_paths.append(f.path)
+    except (psutil.AccessDenied, psutil.NoSuchProcess):
+        pass
+
+    # --- METHOD 3: Window Title Parsing (Fallback) ---
+    if ':\\' in window_title:
+        parts = window_title.split(' ')
+        for part in parts:
+            if ':\\' in part and os.path.exists(part):
+                 potential_paths.append(part)
+
+    # --- FINAL SELECTION ---
+    for path in potential_paths:
+        if not should_ignore_file(path):
+            # print(f"[DEBUG] MATCH FOUND: {path}")  # Debug print
+            return path, app_name
+
+    return None, None
+
+
 def get_active_window_file():
-    """Get file path from currently active window using multiple detection methods"""
+    """
+    Get file path from currently active window.
+    Results are cached per (pid, process start time, window title), so the
+    expensive detection methods only run when the foreground window or its title changes.
+    """
     try:
         # Get active window handle
         hwnd = win32gui.GetForegroundWindow()
@@ -205,65 +241,26 @@ def get_active_window_file():
         
         # Get process info
         try:
+            started = time.perf_counter()
             process = psutil.Process(pid)
-            app_name = process.name().lower()
-            potential_paths = []
-
-            # DEBUG: Un-comment this line if you want to see every window check in console
-            # print(f"[DEBUG] Checking: '{window_title}' ({app_name})")
-
-            # --- METHOD 0: Browser Detection (ENHANCED) ---
-            # If app is a browser, check if it's viewing a local file via History
-            if app_name in BROWSER_APPS:
-                browser_file_path = get_browser_local_file(app_name, window_title)
-                if browser_file_path:
-                    # Return immediately if we found a browser file
-                    return browser_file_path, BROWSER_APPS[app_name]
-
-            # --- METHOD 1: Command Line Arguments (Most Reliable for Notepad, etc.) ---
-            try:
-                cmdline = process.cmdline()
-                if cmdline:
-                    # Skip the first argument (executable itself)
-                    for arg in cmdline[1:]:
-                        clean_arg = arg.strip('"').strip("'")
-                        if os.path.exists(clean_arg) and os.path.isfile(clean_arg):
-                             # FIX: Get filename without extension to match Notepad titles
-                             filename = os.path.basename(clean_arg)      # e.g., "hahahaha.txt"
-                             name_no_ext = os.path.splitext(filename)[0] # e.g., "hahahaha"
-                             
-                             # Check if either full name OR name without extension is in title
-                             if (name_no_ext.lower() in window_title.lower()) or (filename.lower() in window_title.lower()) or len(cmdline) == 2:
-                                 potential_paths.append(clean_arg)
-            except (psutil.AccessDenied, IndexError, Exception):
-                pass
-
-            # --- METHOD 2: Open Files Handle (Reliable if Admin, flaky otherwise) ---
-            try:
-                open_files = process.open_files()
-                for f in open_files:
-                    if not should_ignore_file(f.path):
-                        filename = os.path.basename(f.path)
-                        name_no_ext = os.path.splitext(filename)[0]
-                        
-                        # FIX: Check if name without extension is in title
-                        if name_no_ext.lower() in window_title.lower():
-                            potential_paths.append(f.path)
-            except (psutil.AccessDenied, psutil.NoSuchProcess):
-                pass
-
-            # --- METHOD 3: Window Title Parsing (Fallback) ---
-            if ':\\' in window_title:
-                parts = window_title.split(' ')
-                for part in parts:
-                    if ':\\' in part and os.path.exists(part):
-                         potential_paths.append(part)
-
-            # --- FINAL SELECTION ---
-            for path in potential_paths:
-                if not should_ignore_file(path):
-                    # print(f"[DEBUG] MATCH FOUND: {path}")  # Debug print
-                    return path, app_name
+            # create_time tells a reused PID apart from the process that had it before
+            key = (pid, process.create_time(), window_title)
+            
+            cached = resolve_cache.get(key)
+            if cached and (cached[0] or time.time() - cached[2] < NO_FILE_RECHECK):
+                resolve_cache.move_to_end(key)
+                resolve_stats['hits'] += 1
+                resolve_stats['hit_seconds'] += time.perf_counter() - started
+                return cached[0], cached[1]
+            
+            file_path, app_name = resolve_window_file(process, window_title)
+            resolve_cache[key] = (file_path, app_name, time.time())
+            resolve_cache.move_to_end(key)
+            while len(resolve_cache) > RESOLVE_CACHE_SIZE:
+                resolve_cache.popitem(last=False)
+            resolve_stats['misses'] += 1
+            resolve_stats['miss_seconds'] += time.perf_counter() - started
+            return file_path, app_name
                 
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             pass
@@ -274,47 +271,57 @@ def get_active_window_file():
     return None, None
 
 
+def get_resolution_stats():
+    """Cache hit rate and average cost per check of the active window resolution"""
+    hits, misses = resolve_stats['hits'], resolve_stats['misses']
+    checks = hits + misses
+    total = resolve_stats['hit_seconds'] + resolve_stats['miss_seconds']
+    return {
+        'checks': checks,
+        'hit_rate': hits / checks if checks else 0.0,
+        'avg_check_ms': total / checks * 1000 if checks else 0.0,
+        'avg_hit_ms': resolve_stats['hit_seconds'] / hits * 1000 if hits else 0.0,
+        'avg_miss_ms': resolve_stats['miss_seconds'] / misses * 1000 if misses else 0.0,
+        'cached_windows': len(resolve_cache),
+    }
+
+
+def report_resolution_stats():
+    stats = get_resolution_stats()
+    if stats['checks']:
+        print(f"📊 File tracker: {stats['hit_rate']:.0%} of {stats['checks']} checks cached, "
+              f"{stats['avg_check_ms']:.1f} ms/check (hit {stats['avg_hit_ms']:.2f} ms, miss {stats['avg_miss_ms']:.1f} ms)")
+
+
 def log_file_activity(file_path, app_name, duration=None):
-    """Log file access activity"""
-    global file_activity_log
+    """Log file access activity (one appended journal line per call)"""
+    global last_record
     
     if should_ignore_file(file_path):
         return
     
-    # Create log entry
-    entry = {
-        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'file_path': file_path,
-        'file_name': os.path.basename(file_path),
-        'file_type': os.path.splitext(file_path)[1].lower().replace('.', ''),
-        'app_used': app_name,
-        'duration_seconds': duration if duration else 0
-    }
+    now = int(time.time())
     
     # Check if this is a duplicate of the most recent entry
-    if file_activity_log:
-        last_entry = file_activity_log[-1]
+    if last_record and last_record['p'] == file_path and last_record['a'] == app_name:
+        time_diff = now - last_record['t']
+        
         # If same file accessed within 5 minutes, update duration instead of adding new entry
-        if (last_entry['file_path'] == file_path and 
-            last_entry['app_used'] == app_name):
-            
-            last_time = datetime.strptime(last_entry['timestamp'], '%Y-%m-%d %H:%M:%S')
-            current_time = datetime.strptime(entry['timestamp'], '%Y-%m-%d %H:%M:%S')
-            time_diff = (current_time - last_time).total_seconds()
-            
-            if time_diff < 300:  # 5 minutes
-                # Update existing entry's duration
-                last_entry['duration_seconds'] = int(time_diff)
-                save_activity_log()
-                return
+        if 0 <= time_diff < 300:  # 5 minutes
+            try:
+                journal.update_duration(last_record, int(time_diff))
+            except Exception as e:
+                print(f"Error saving file activity log: {e}")
+            return
     
     # Add new entry
-    file_activity_log.append(entry)
-    
-    # FIXED: Save immediately after adding new entry
-    save_activity_log()
+    try:
+        last_record = journal.append(file_path, app_name, now, duration if duration else 0)
+    except Exception as e:
+        print(f"Error saving file activity log: {e}")
+        return
     
-    print(f"📁 Tracked: {entry['file_name']} ({app_name})")
+    print(f"📁 Tracked: {os.path.basename(file_path)} ({app_name})")
 
 
 def track_files():
@@ -322,11 +329,7 @@ def track_files():
     global tracking_active, currently_open_files
     
     print("👁️ File tracking started...")
-    
-    # Ensure log file exists at start
-    if not os.path.exists(FILE_ACTIVITY_LOG):
-        print("[DEBUG] Creating initial JSON log file...")
-        save_activity_log()
+    last_report = time.time()
     
     while tracking_active:
         try:
@@ -365,6 +368,10 @@ def track_files():
             for file_key in closed_files:
                 del currently_open_files[file_key]
             
+            if current_time - last_report >= STATS_REPORT_INTERVAL:
+                report_resolution_stats()
+                last_report = current_time
+            
             # Check every N seconds
             time.sleep(CHECK_INTERVAL)
             
@@ -404,6 +411,7 @@ def stop_tracking():
     
     tracking_active = False
     save_activity_log()
+    report_resolution_stats()
     print("🛑 File tracking deactivated")
 
 
@@ -412,12 +420,7 @@ def get_recent_files(hours=24, file_type=None):
     cutoff_time = datetime.now() - timedelta(hours=hours)
     recent_files = []
     
-    for entry in reversed(file_activity_log):  # Start from most recent
-        entry_time = datetime.strptime(entry['timestamp'], '%Y-%m-%d %H:%M:%S')
-        
-        if entry_time < cutoff_time:
-            break  # Stop if we've gone past the time range
-        
+    for entry in reversed(journal.read(start=cutoff_time)):  # Start from most recent
         # Filter by file type if specified
         if file_type and entry['file_type'] != file_type.lower():
             continue
@@ -429,34 +432,16 @@ def get_recent_files(hours=24, file_type=None):
 
 def get_files_by_timerange(start_time, end_time):
     """Get files accessed within a specific time range"""
-    files_in_range = []
-    
-    for entry in file_activity_log:
-        entry_time = datetime.strptime(entry['timestamp'], '%Y-%m-%d %H:%M:%S')
-        
-        if start_time <= entry_time <= end_time:
-            files_in_range.append(entry)
-    
-    return files_in_range
+    # Only the day segments overlapping the range are read
+    return journal.read(start_time, end_time)
 
 
 def cleanup_old_logs(days=30):
-    """Remove log entries older than N days"""
-    global file_activity_log
-    
-    cutoff_date = datetime.now() - timedelta(days=days)
-    original_count = len(file_activity_log)
-    
-    file_activity_log = [
-        entry for entry in file_activity_log
-        if datetime.strptime(entry['timestamp'], '%Y-%m-%d %H:%M:%S') > cutoff_date
-    ]
-    
-    removed_count = original_count - len(file_activity_log)
+    """Remove the day segments older than N days"""
+    removed_count = journal.cleanup(days)
     
     if removed_count > 0:
-        print(f"🗑️ Cleaned up {removed_count} old file activity records")
-        save_activity_log()
+        print(f"🗑️ Cleaned up {removed_count} day(s) of old file activity records")
 
 
 def format_file_activity_text(entries, limit=20):
@@ -7,7 +7,7 @@ import json
 import os
 import time
 import threading
-import psutil
+import zyron.features.process_snapshot as process_snapshot
 from datetime import datetime
 
 # Define paths - Use project root directly, similar to other log files
@@ -151,22 +151,25 @@ def get_blacklist_status():
         f"_Examples: `/blacklist add spotify` or `/blacklist add youtube.com`_"
     )
 
+def _kill(handle):
+    try:
+        handle.kill()
+        return True
+    except Exception:  # Exited meanwhile, or not ours to kill
+        return False
+
 def kill_process(proc_name):
     """Kill a process by name with robust matching."""
     try:
         # Normalize: spotify.exe -> spotify
         clean_target = proc_name.lower().replace(".exe", "")
         
-        for proc in psutil.process_iter(['pid', 'name']):
-            try:
-                curr_name = proc.info['name'].lower()
-                # Check for exact match or name containing target (e.g. Spotify.exe matches spotify)
-                if clean_target == curr_name or clean_target == curr_name.replace(".exe", ""):
-                    proc.kill()
-                    print(f"💀 Focus Mode killed: {proc.info['name']} (PID: {proc.info['pid']})")
-                    return True
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+        # Exact match, with or without .exe (e.g. Spotify.exe matches spotify)
+        for proc in process_snapshot.find(clean_target):
+            handle = process_snapshot.get_handle(proc)
+            if handle and _kill(handle):
+                print(f"💀 Focus Mode killed: {proc['name']} (PID: {proc['pid']})")
+                return True
     except Exception as e:
         print(f"Error killing process {proc_name}: {e}")
     return False
@@ -175,8 +178,10 @@ def check_and_block():
     """Main Enforcer Loop - Optimized for performance."""
     import zyron.features.activity as activity_monitor
     import zyron.features.browser_control as browser_control
+    import zyron.features.tab_registry as tab_registry
     
     print("🛡️ Focus Mode Enforcer Started.")
+    last_checked = None  # (tab registry version, blacklisted sites) of the last site check
     
     while not stop_event.is_set():
         try:
@@ -204,28 +209,30 @@ def check_and_block():
                     if a in APP_MAPPINGS:
                         expanded_targets.extend(APP_MAPPINGS[a])
                 
-                for proc in psutil.process_iter(['pid', 'name']):
-                    try:
-                        curr_name = proc.info['name'].lower()
-                        curr_base = curr_name.replace(".exe", "")
-                        
-                        should_kill = False
-                        for target in expanded_targets:
-                            # Fuzzy Match: exact base match OR target in base name
-                            if target == curr_base or target == curr_name or (len(target) > 3 and target in curr_base):
-                                should_kill = True
-                                break
-                        
-                        if should_kill:
-                            proc.kill()
-                            print(f"💀 Focus Mode killed: {proc.info['name']} (PID: {proc.info['pid']})")
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
+                # Shared snapshot: no process scan of our own every 3 seconds
+                for proc in process_snapshot.get_processes():
+                    curr_name = proc['name'].lower()
+                    curr_base = curr_name.replace(".exe", "")
+                    
+                    should_kill = False
+                    for target in expanded_targets:
+                        # Fuzzy Match: exact base match OR target in base name
+                        if target == curr_base or target == curr_name or (len(target) > 3 and target in curr_base):
+                            should_kill = True
+                            break
+                    
+                    if should_kill:
+                        handle = process_snapshot.get_handle(proc)
+                        if handle and _kill(handle):
+                            print(f"💀 Focus Mode killed: {proc['name']} (PID: {proc['pid']})")
 
             # 2. Block Websites (Firefox Native Bridge)
             if sites_to_block:
-                tabs = activity_monitor.get_firefox_tabs()
-                if tabs:
+                # Nothing changed since the last pass: skip re-matching every tab
+                state = (tab_registry.get_version(), tuple(sites_to_block))
+                if not (tab_registry.is_live() and state == last_checked):
+                    tabs = activity_monitor.get_firefox_tabs() or []
+                    all_closed = True
                     for tab in tabs:
                         url = tab.get('url', '').lower()
                         title = tab.get('title', '').lower()
@@ -234,8 +241,13 @@ def check_and_block():
                         for site in sites_to_block:
                             if site and (site in url or site in title):
                                 print(f"🚫 Focus Mode: Blocking site '{site}' in tab '{title}'")
-                                if tab_id:
-                                    browser_control.close_tab(tab_id)
+                                if tab_id and not browser_control.close_tab(tab_id):
+                                    all_closed = False
+                                break
+                    # Only a pass whose closes all went out is skipped next time; a failed
+                    # close (bridge down) leaves the state unrecorded so the tab is retried
+                    if all_closed:
+                        last_checked = state
         except Exception as e:
             print(f"⚠️ Focus Mode: Loop Error: {e}")
             
@@ -251,6 +263,7 @@ def start_focus_mode():
         
     focus_mode_active = True
     stop_event.clear()
+    process_snapshot.start()
     enforcer_thread = threading.Thread(target=check_and_block, daemon=True)
     enforcer_thread.start()
     return "🔴 **Focus Mode ACTIVATED!**\nDistractions will be blocked immediately."
@@ -0,0 +1,130 @@
+"""
+HTML to Text for Zyron Desktop Assistant
+Incremental extractor built on html.parser: fed chunk by chunk while a page
+downloads, it drops script/style/navigation subtrees as it goes and reports
+when enough readable text has been collected so the download can stop early.
+"""
+
+import codecs
+import re
+from html.parser import HTMLParser
+
+# Subtrees that never hold the answer (no "form": ASP.NET WebForms pages wrap the whole body in one)
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "nav", "aside", "footer",
+             "button", "select", "head", "title"}
+# Tags allowed inside <head>; any other start tag means the head ended without </head> (valid HTML5)
+HEAD_TAGS = {"title", "meta", "link", "style", "script", "noscript", "base", "template"}
+# Tags that end a line of text
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "ul", "ol", "tr", "td", "th", "table", "br",
+              "blockquote", "pre", "dd", "dt", "h1", "h2", "h3", "h4", "h5", "h6", "header"}
+HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+MIN_BLOCK_CHARS = 20   # Shorter blocks are menu items, buttons and labels (article pages only)
+FEED_SIZE = 64 * 1024
+
+
+class TextExtractor(HTMLParser):
+    """Collects readable text blocks; check .full after each feed() to stop early."""
+
+    def __init__(self, max_chars=None, min_block_chars=MIN_BLOCK_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.min_block_chars = min_block_chars
+        self.blocks = []
+        self.chars = 0
+        self._skip = []       # Open skipped tags (text inside is ignored)
+        self._current = []    # Text of the block being read
+        self._pending = 0     # Its length so far (a single giant block must still stop early)
+        self._kind = None     # 'h' or 'li' for the current block
+
+    @property
+    def full(self):
+        return self.max_chars is not None and self.chars + self._pending >= self.max_chars
+
+    def _flush(self):
+        text = re.sub(r"\s+", " ", "".join(self._current)).strip()
+        self._current, self._pending = [], 0
+        kind, self._kind = self._kind, None
+        if not text or (len(text) < self.min_block_chars and kind != "h"):
+            return
+        if kind == "h":
+            text = f"# {text}"
+        elif kind == "li":
+            text = f"• {text}"
+        self.blocks.append(text)
+        self.chars += len(text)
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip == ["head"] and tag not in HEAD_TAGS:
+            self._skip.pop()  # <body> or body content: the head is over even without </head>
+        if self._skip or tag in SKIP_TAGS:
+            if tag in SKIP_TAGS:
+                self._skip.append(tag)
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+            self._kind = "h" if tag in HEADINGS else "li" if tag == "li" else None
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/>, <img/>: never opens a skipped subtree
+        if not self._skip and tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if self._skip:
+            # Unbalanced markup: closing an outer skipped tag also closes the ones inside it
+            if tag in self._skip:
+                while self._skip.pop() != tag:
+                    pass
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._current.append(data)
+            self._pending += len(data)
+
+    def text(self):
+        self.close()  # Hands over any text still buffered after the last tag
+        self._flush()
+        return "\n".join(self.blocks)
+
+
+def extract_text(html, max_chars=None, min_block_chars=MIN_BLOCK_CHARS):
+    """
+    Readable text of an HTML string, stopping once max_chars of text are collected.
+    Pass min_block_chars=0 for search result pages, where answers like "Sam Altman" are short.
+    """
+    parser = TextExtractor(max_chars, min_block_chars)
+    for start in range(0, len(html or ""), FEED_SIZE):
+        parser.feed(html[start:start + FEED_SIZE])
+        if parser.full:
+            break
+    text = parser.text()
+    return text[:max_chars] if max_chars else text
+
+
+def extract_stream(chunks, encoding="utf-8", max_chars=None):
+    """
+    Extracts text from an iterable of byte chunks (e.g. response.iter_content()),
+    stopping as soon as max_chars of text are collected.
+    Returns (text, bytes_read, stopped_early).
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parser = TextExtractor(max_chars)
+    bytes_read, stopped_early = 0, False
+
+    for chunk in chunks:
+        bytes_read += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.full:
+            stopped_early = True
+            break
+    else:
+        parser.feed(decoder.decode(b"", final=True))
+
+    text = parser.text()
+    return (text[:max_chars] if max_chars else text), bytes_read, stopped_early
@@ -0,0 +1,204 @@
+"""
+Knowledge Base for Zyron Desktop Assistant
+Keeps the text of pages Zyron has read (research result pages, read_page results)
+as passages in a local SQLite FTS5 index, so follow-up questions can be answered
+from disk in milliseconds before going to the network.
+The oldest pages are evicted once the stored text passes MAX_TEXT_CHARS.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import zyron.features.passage_rank as passage_rank
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+DB_FILE = os.path.join(PROJECT_ROOT, "saved_media", "knowledge_base.db")
+MAX_TEXT_CHARS = 30_000_000   # ~30 MB of page text, then the oldest pages go
+MIN_PAGE_CHARS = 300          # Shorter reads (errors, consent walls) are not worth keeping
+
+_lock = threading.Lock()
+_ready = None                 # None = not initialised yet, False = FTS5 unavailable
+_writes = queue.Queue()
+_writer = None
+
+
+def _connect():
+    conn = sqlite3.connect(DB_FILE, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _init():
+    """Creates the tables on first use. Returns False if this SQLite build has no FTS5."""
+    global _ready
+    if _ready is not None:
+        return _ready
+    try:
+        os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
+        conn = _connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                title TEXT,
+                source TEXT,
+                fetched_at REAL NOT NULL,
+                chars INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_fetched_at ON pages(fetched_at);
+            CREATE TABLE IF NOT EXISTS passages (
+                id INTEGER PRIMARY KEY,
+                page_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS passages_page ON passages(page_id);
+            -- Full-text index over passages.text, kept in sync by the triggers below
+            CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5(
+                text, content='passages', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS passages_ai AFTER INSERT ON passages BEGIN
+                INSERT INTO passages_fts(rowid, text) VALUES (new.id, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS passages_ad AFTER DELETE ON passages BEGIN
+                INSERT INTO passages_fts(passages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+        """)
+        conn.close()
+        _ready = True
+    except sqlite3.Error as e:
+        print(f"⚠️ Knowledge base disabled: {e}")
+        _ready = False
+    return _ready
+
+
+def _evict(conn):
+    total = conn.execute("SELECT COALESCE(SUM(chars), 0) FROM pages").fetchone()[0]
+    if total <= MAX_TEXT_CHARS:
+        return 0
+    evicted = 0
+    for page_id, chars in conn.execute("SELECT id, chars FROM pages ORDER BY fetched_at").fetchall():
+        conn.execute("DELETE FROM passages WHERE page_id = ?", (page_id,))
+        conn.execute("DELETE FROM pages WHERE id = ?", (page_id,))
+        total -= chars
+        evicted += 1
+        if total <= MAX_TEXT_CHARS * 0.9:  # Some headroom so we don't evict on every insert
+            break
+    return evicted
+
+
+def add_page(url, title, text, source="research"):
+    """Stores (or replaces) a page's text as passages. Returns the number of passages stored."""
+    if not url or not text or len(text) < MIN_PAGE_CHARS or not _init():
+        return 0
+    passages = passage_rank.split_passages(text)
+    with _lock:
+        conn = _connect()
+        try:
+            with conn:
+                old = conn.execute("SELECT id FROM pages WHERE url = ?", (url,)).fetchone()
+                if old:
+                    conn.execute("DELETE FROM passages WHERE page_id = ?", (old[0],))
+                    conn.execute("DELETE FROM pages WHERE id = ?", (old[0],))
+                page_id = conn.execute(
+                    "INSERT INTO pages (url, title, source, fetched_at, chars) VALUES (?, ?, ?, ?, ?)",
+                    (url, title or "", source, time.time(), len(text))
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO passages (page_id, position, text) VALUES (?, ?, ?)",
+                    [(page_id, p["position"], p["text"]) for p in passages]
+                )
+                _evict(conn)
+        except sqlite3.Error as e:
+            print(f"⚠️ Knowledge base write failed: {e}")
+            return 0
+        finally:
+            conn.close()
+    return len(passages)
+
+
+def _write_loop():
+    while True:
+        args = _writes.get()
+        try:
+            add_page(*args)
+        except Exception as e:
+            print(f"⚠️ Knowledge base write failed: {e}")
+
+
+def add_page_async(url, title, text, source="browser"):
+    """Queues a page for storing on a background thread (safe to call from the event loop)."""
+    global _writer
+    if _writer is None:
+        _writer = threading.Thread(target=_write_loop, daemon=True, name="knowledge-base")
+        _writer.start()
+    _writes.put((url, title, text, source))
+
+
+def _match_expression(query, require_all):
+    terms = sorted(set(passage_rank.tokenize(query)))
+    if not terms:
+        return None
+    quoted = ['"' + term.replace('"', '') + '"' for term in terms]
+    return (" AND " if require_all else " OR ").join(quoted)
+
+
+def search(query, limit=8, max_age=None, require_all=False):
+    """
+    Best matching stored passages, best first:
+    [{"text", "title", "url", "fetched_at", "score"}]. max_age is in seconds.
+    """
+    expression = _match_expression(query, require_all)
+    if not expression or not _init():
+        return []
+    min_time = time.time() - max_age if max_age else 0
+    with _lock:
+        conn = _connect()
+        try:
+            rows = conn.execute("""
+                SELECT passages.text, pages.title, pages.url, pages.fetched_at, bm25(passages_fts) AS score
+                FROM passages_fts
+                JOIN passages ON passages.id = passages_fts.rowid
+                JOIN pages ON pages.id = passages.page_id
+                WHERE passages_fts MATCH ? AND pages.fetched_at >= ?
+                ORDER BY score LIMIT ?
+            """, (expression, min_time, limit)).fetchall()
+        except sqlite3.Error as e:
+            print(f"⚠️ Knowledge base search failed: {e}")
+            rows = []
+        finally:
+            conn.close()
+    return [{"text": text, "title": title, "url": url, "fetched_at": fetched_at, "score": -score}
+            for text, title, url, fetched_at, score in rows]
+
+
+def local_context(query, token_budget, max_age=None, min_passages=2):
+    """
+    Context for answering from stored pages, or None if they don't clearly cover the question
+    (fewer than min_passages passages contain every query term).
+    """
+    hits = search(query, limit=20, max_age=max_age, require_all=True)
+    if len(hits) < min_passages:
+        return None
+    documents = {}
+    for hit in hits:
+        documents.setdefault(f"{hit['title'] or 'Saved page'}: {hit['url']}", []).append(hit["text"])
+    context, _ = passage_rank.build_context(query, [(source, "\n\n".join(texts)) for source, texts in documents.items()], token_budget)
+    return context
+
+
+def get_stats():
+    if not _init():
+        return {"enabled": False}
+    with _lock:
+        conn = _connect()
+        try:
+            pages, chars = conn.execute("SELECT COUNT(*), COALESCE(SUM(chars), 0) FROM pages").fetchone()
+            passages = conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+        finally:
+            conn.close()
+    size = os.path.getsize(DB_FILE) if os.path.exists(DB_FILE) else 0
+    return {"enabled": True, "pages": pages, "passages": passages, "text_chars": chars, "db_bytes": size}
@@ -0,0 +1,228 @@
+"""
+Page Finder for Zyron Desktop Assistant
+Finds web pages the user visited ("that article about rust async I read yesterday").
+Visits from the browser history reader are kept in a local SQLite index with
+full-text search over page titles and URL words; time ranges are parsed by
+the file finder's parse_time_query, and results are ranked by text match,
+recency and how often the page was visited.
+"""
+
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse, unquote
+
+import zyron.features.browser_history as browser_history
+from zyron.features.activity import escape_markdown
+from zyron.features.files.finder import parse_time_query
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+DB_FILE = os.path.join(PROJECT_ROOT, "saved_media", "visited_pages.db")
+RECENCY_HALF_LIFE_DAYS = 3    # A page visited 3 days ago weighs half as much as one visited now
+CANDIDATES = 200              # Text matches re-ranked by recency and visit count
+
+# Words that describe the request rather than the page
+FILLER_WORDS = {
+    "find", "get", "show", "open", "give", "send", "me", "that", "the", "a", "an", "this", "those", "these",
+    "article", "page", "site", "website", "link", "tab", "post", "blog", "video", "thing",
+    "articles", "pages", "sites", "websites", "links", "tabs", "posts", "videos", "did", "have",
+    "i", "was", "were", "read", "reading", "saw", "seen", "visited", "looked", "looking", "watched", "at",
+    "about", "on", "in", "of", "for", "from", "to", "with", "my", "which", "what", "where", "is",
+    "yesterday", "today", "morning", "afternoon", "evening", "night", "last", "week", "month", "ago",
+    "hours", "hour", "minutes", "days", "day", "recent", "recently", "earlier", "just", "am", "pm",
+    "chrome", "edge", "brave", "firefox", "browser",
+}
+
+_lock = threading.Lock()
+_ready = None
+
+
+def _connect():
+    conn = sqlite3.connect(DB_FILE, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _init():
+    """Creates the index on first use. Returns False if this SQLite build has no FTS5."""
+    global _ready
+    if _ready is not None:
+        return _ready
+    try:
+        os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
+        conn = _connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                title TEXT,
+                words TEXT,
+                browser TEXT,
+                last_visit REAL NOT NULL,
+                visit_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS visits (
+                page_id INTEGER NOT NULL,
+                visit_time REAL NOT NULL,
+                UNIQUE (page_id, visit_time)
+            );
+            CREATE INDEX IF NOT EXISTS visits_time ON visits(visit_time);
+            CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+                title, words, content='pages', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+                INSERT INTO pages_fts(rowid, title, words) VALUES (new.id, new.title, new.words);
+            END;
+            CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE OF title, words ON pages BEGIN
+                INSERT INTO pages_fts(pages_fts, rowid, title, words) VALUES ('delete', old.id, old.title, old.words);
+                INSERT INTO pages_fts(rowid, title, words) VALUES (new.id, new.title, new.words);
+            END;
+        """)
+        conn.close()
+        _ready = True
+    except sqlite3.Error as e:
+        print(f"⚠️ Page finder disabled: {e}")
+        _ready = False
+    return _ready
+
+
+def url_words(url):
+    """Searchable words of a URL: host parts and path segments ('rust-lang.org/async-book' -> 'rust lang org async book')."""
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return ""
+    text = f"{parsed.hostname or ''} {unquote(parsed.path)}"
+    return " ".join(w for w in re.split(r"[^\w]+|_", text) if w and w not in ("www", "html", "htm", "php"))
+
+
+def add_visits(browser, visits):
+    """Adds visits [{"url", "title", "visit_time"}] to the index (browser_history listener)."""
+    if not visits or not _init():
+        return
+    with _lock:
+        conn = _connect()
+        try:
+            with conn:
+                for visit in visits:
+                    url = visit["url"]
+                    if not url.startswith(("http://", "https://", "file://")):
+                        continue
+                    conn.execute("""
+                        INSERT INTO pages (url, title, words, browser, last_visit) VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(url) DO UPDATE SET
+                            title = CASE WHEN excluded.title != '' THEN excluded.title ELSE pages.title END,
+                            browser = excluded.browser,
+                            last_visit = MAX(pages.last_visit, excluded.last_visit)
+                    """, (url, visit.get("title") or "", url_words(url), browser, visit["visit_time"]))
+                    page_id = conn.execute("SELECT id FROM pages WHERE url = ?", (url,)).fetchone()[0]
+                    # Visits re-read after a restart are ignored by the UNIQUE constraint
+                    if conn.execute("INSERT OR IGNORE INTO visits (page_id, visit_time) VALUES (?, ?)",
+                                    (page_id, visit["visit_time"])).rowcount:
+                        conn.execute("UPDATE pages SET visit_count = visit_count + 1 WHERE id = ?", (page_id,))
+        except sqlite3.Error as e:
+            print(f"⚠️ Page finder index write failed: {e}")
+        finally:
+            conn.close()
+
+
+browser_history.add_listener(add_visits)
+
+
+def sync():
+    """Pulls new visits from every browser's history into the index (cheap when nothing changed)."""
+    for browser in browser_history.BROWSERS:
+        browser_history.poll(browser)
+
+
+def extract_terms(query):
+    """Words of the query that describe the page itself."""
+    query = re.sub(r"\d{1,2}[:.]\d{2}", " ", query.lower())
+    return [w for w in re.findall(r"\w+", query) if w not in FILLER_WORDS and len(w) > 1 and not w.isdigit()]
+
+
+def find_pages(query, limit=5):
+    """
+    Pages matching a natural language query, best first:
+    [{"url", "title", "browser", "last_visit", "visit_count", "score"}].
+    """
+    if not _init():
+        return []
+    sync()
+    started = time.perf_counter()
+    time_range = parse_time_query(query)
+    terms = extract_terms(query)
+    start, end = (time_range[0].timestamp(), time_range[1].timestamp()) if time_range else (0, time.time() + 60)
+
+    # Prefix match on each term, any term may match; bm25 favours pages matching more of them
+    match = " OR ".join(f'"{term}"*' for term in terms)
+    in_range = "EXISTS (SELECT 1 FROM visits WHERE visits.page_id = pages.id AND visit_time BETWEEN ? AND ?)"
+    with _lock:
+        conn = _connect()
+        try:
+            if match:
+                rows = conn.execute(f"""
+                    SELECT pages.url, pages.title, pages.browser, pages.last_visit, pages.visit_count,
+                           bm25(pages_fts, 3.0, 1.0) AS rank
+                    FROM pages_fts JOIN pages ON pages.id = pages_fts.rowid
+                    WHERE pages_fts MATCH ? AND {in_range}
+                    ORDER BY rank LIMIT ?
+                """, (match, start, end, CANDIDATES)).fetchall()
+            else:
+                # Only a time ("what did I read this morning"): most recent pages in range
+                rows = conn.execute(f"""
+                    SELECT url, title, browser, last_visit, visit_count, -1.0
+                    FROM pages WHERE {in_range}
+                    ORDER BY last_visit DESC LIMIT ?
+                """, (start, end, CANDIDATES)).fetchall()
+        except sqlite3.Error as e:
+            print(f"⚠️ Page search failed: {e}")
+            rows = []
+        finally:
+            conn.close()
+
+    now = time.time()
+    results = []
+    for url, title, browser, last_visit, visit_count, rank in rows:
+        age_days = max(now - last_visit, 0) / 86400
+        recency = 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+        # Small floor so equally matching pages (a word on every page scores ~0) still order by recency
+        score = (max(-rank, 0) + 0.1) * (0.5 + recency) * (1 + 0.25 * math.log1p(visit_count))
+        results.append({"url": url, "title": title or url, "browser": browser,
+                        "last_visit": last_visit, "visit_count": visit_count, "score": score})
+    results.sort(key=lambda r: r["score"], reverse=True)
+    print(f"🔎 Page search {terms} {'(time filtered) ' if time_range else ''}"
+          f"→ {len(rows)} candidates in {(time.perf_counter() - started) * 1000:.1f}ms")
+    return results[:limit]
+
+
+def format_page_results(results):
+    """Telegram text for find_pages results."""
+    if not results:
+        return "🔍 **PAGE SEARCH**\n\n❌ No matching pages in your browser history.\n\nTry:\n• 'that article about python I read yesterday'\n• 'the page about flights this morning'"
+    lines = [f"🔍 **PAGE SEARCH** (Found {len(results)} match{'es' if len(results) > 1 else ''})\n"]
+    for i, page in enumerate(results, 1):
+        title = escape_markdown(page["title"][:80])
+        visited = datetime.fromtimestamp(page["last_visit"]).strftime("%b %d at %I:%M %p")
+        visits = f", {page['visit_count']} visits" if page["visit_count"] > 1 else ""
+        lines.append(f"{i}. **{title}**")
+        lines.append(f"   📅 {visited} ({page['browser']}{visits})")
+        lines.append(f"   🔗 {escape_markdown(page['url'][:200])}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def get_stats():
+    if not _init():
+        return {"enabled": False}
+    with _lock:
+        conn = _connect()
+        try:
+            pages, visits = conn.execute("SELECT (SELECT COUNT(*) FROM pages), (SELECT COUNT(*) FROM visits)").fetchone()
+        finally:
+            conn.close()
+    return {"enabled": True, "pages": pages, "visits": visits}
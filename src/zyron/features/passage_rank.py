@@ -0,0 +1,126 @@
+"""
+Passage Ranking for Zyron Desktop Assistant
+Splits extracted page text into short passages, ranks them against the question
+with BM25 and packs the best ones into a token budget, so the LLM reads the
+relevant sentences instead of the first N characters of every page.
+"""
+
+import math
+import re
+from collections import Counter
+
+PASSAGE_WORDS = 80      # Target passage length
+CHARS_PER_TOKEN = 4     # Rough estimate, good enough for budgeting
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOP_WORDS = {"the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "is", "are", "was", "were", "be",
+              "by", "with", "as", "at", "it", "its", "this", "that", "from", "what", "who", "how", "when",
+              "where", "which", "does", "do", "did", "me", "tell", "about", "please"}
+
+
+def tokenize(text):
+    return [t for t in re.findall(r"\w+", text.lower()) if t not in STOP_WORDS]
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_passages(text, source=None, target_words=PASSAGE_WORDS):
+    """
+    Cuts text into passages of about target_words words, breaking at paragraph
+    and sentence boundaries. Returns [{"text", "source", "position"}].
+    """
+    pieces = []
+    for block in re.split(r"\n\s*\n|\n(?=[#•])", text or ""):
+        block = re.sub(r"\s+", " ", block).strip()
+        if not block:
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])", block):
+            words = sentence.split()
+            # Text without sentence breaks (menus, collapsed page dumps) is cut into plain word windows
+            for start in range(0, len(words), target_words * 2):
+                pieces.append(" ".join(words[start:start + target_words * 2]))
+
+    passages, current, words = [], [], 0
+    for piece in pieces:
+        count = len(piece.split())
+        if current and words + count > target_words:
+            passages.append(" ".join(current))
+            current, words = [], 0
+        current.append(piece)
+        words += count
+    if current:
+        passages.append(" ".join(current))
+
+    return [{"text": p, "source": source, "position": i} for i, p in enumerate(passages)]
+
+
+def rank(query, passages):
+    """Scores passages against the query with Okapi BM25. Returns them best first, with "score" set."""
+    terms = set(tokenize(query))
+    if not passages:
+        return []
+    docs = [Counter(tokenize(p["text"])) for p in passages]
+    avg_len = sum(sum(d.values()) for d in docs) / len(docs) or 1
+    doc_freq = Counter(term for d in docs for term in terms if term in d)
+
+    for passage, doc in zip(passages, docs):
+        length = sum(doc.values())
+        score = 0.0
+        for term in terms:
+            tf = doc.get(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(docs) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len))
+        passage["score"] = score
+    return sorted(passages, key=lambda p: p["score"], reverse=True)
+
+
+def pack(ranked, token_budget):
+    """
+    Takes the best passages until the token budget is used up, then restores
+    reading order within each source so the context still reads naturally.
+    Returns the packed text.
+    """
+    chosen, used = [], 0
+    for passage in ranked:
+        if passage.get("score", 0) <= 0 and chosen:
+            break  # The rest shares no word with the question (menus, footers, boilerplate)
+        cost = estimate_tokens(passage["text"])
+        if used + cost > token_budget:
+            continue  # A shorter passage further down may still fit
+        chosen.append(passage)
+        used += cost
+
+    sources = []
+    for passage in chosen:
+        if passage["source"] not in sources:
+            sources.append(passage["source"])
+
+    sections = []
+    for source in sources:
+        texts = [p["text"] for p in sorted(chosen, key=lambda p: p["position"]) if p["source"] == source]
+        sections.append(f"[{source}]\n" + "\n".join(texts) if source else "\n".join(texts))
+    return "\n\n".join(sections)
+
+
+def build_context(query, documents, token_budget):
+    """
+    documents: [(source label, text), ...]. Returns (context, stats) where stats
+    has the passage count and the size before and after ranking.
+    """
+    passages = []
+    for source, text in documents:
+        passages.extend(split_passages(text, source))
+    context = pack(rank(query, passages), token_budget)
+    full_chars = sum(len(text) for _, text in documents)
+    return context, {
+        "passages": len(passages),
+        "chars_before": full_chars,
+        "chars_after": len(context),
+        "tokens_before": full_chars // CHARS_PER_TOKEN,
+        "tokens_after": estimate_tokens(context),
+    }
@@ -0,0 +1,189 @@
+"""
+Process Snapshot for Zyron Desktop Assistant
+One shared process list for every feature that needs to know what is running
+(focus mode, zombie reaper, activity report, research, app closing).
+A single psutil pass per tick records pid, name, create_time and RSS, indexed by
+pid and by lowercase name; exe and cmdline are read on demand and cached per
+process. Listeners get the started/exited diff after every refresh.
+"""
+
+import threading
+import time
+
+import psutil
+
+INTERVAL_SECONDS = 3.0      # Sampler tick; on-demand reads accept a snapshot this old
+SAMPLE_ATTRS = ['pid', 'name', 'create_time', 'memory_info']
+
+# Latest snapshot (replaced as a whole, so readers never need the lock)
+_processes = {}             # pid -> {"pid", "name", "create_time", "rss"}
+_by_name = {}               # lowercase name -> [pid, ...]
+_taken_at = 0.0
+_version = 0                # Bumped on every refresh that changed the process set
+
+_details = {}               # (pid, create_time) -> {"exe", "cmdline"}
+_refresh_lock = threading.Lock()
+_listeners = []
+_sampler = None
+_stop = threading.Event()
+
+
+def _key(proc):
+    return proc["pid"], proc["create_time"]
+
+
+def _notify(started, exited):
+    for callback in list(_listeners):
+        try:
+            callback(started, exited)
+        except Exception as e:
+            print(f"⚠️ Process snapshot listener error: {e}")
+
+
+def refresh(max_age=None):
+    """
+    Takes a new snapshot now (or, with max_age, only if the current one is older).
+    Returns the number of processes seen.
+    """
+    global _processes, _by_name, _taken_at, _version, _details
+
+    with _refresh_lock:
+        if max_age is not None and time.time() - _taken_at <= max_age:
+            return len(_processes)  # Another thread refreshed while we waited
+        processes, by_name = {}, {}
+        for proc in psutil.process_iter(SAMPLE_ATTRS):
+            info = proc.info
+            memory = info.get('memory_info')
+            entry = {
+                "pid": info['pid'],
+                "name": info.get('name') or "",
+                "create_time": info.get('create_time') or 0.0,
+                "rss": memory.rss if memory else 0,
+            }
+            processes[entry["pid"]] = entry
+            by_name.setdefault(entry["name"].lower(), []).append(entry["pid"])
+
+        # A pid reused by a new process counts as one exit and one start
+        old_keys = {_key(p): p for p in _processes.values()}
+        new_keys = {_key(p): p for p in processes.values()}
+        started = [p for key, p in new_keys.items() if key not in old_keys]
+        exited = [p for key, p in old_keys.items() if key not in new_keys]
+
+        _processes, _by_name, _taken_at = processes, by_name, time.time()
+        if started or exited:
+            _version += 1
+            _details = {key: value for key, value in _details.items() if key in new_keys}
+
+    if started or exited:
+        _notify(started, exited)
+    return len(processes)
+
+
+def _fresh(max_age):
+    if max_age is None:
+        max_age = INTERVAL_SECONDS
+    if time.time() - _taken_at > max_age:
+        refresh(max_age)
+
+
+def get_processes(max_age=None):
+    """All processes as [{"pid", "name", "create_time", "rss"}], at most max_age seconds old."""
+    _fresh(max_age)
+    return list(_processes.values())
+
+
+def get(pid, max_age=None):
+    _fresh(max_age)
+    return _processes.get(pid)
+
+
+def find(name, max_age=None):
+    """Processes whose name is exactly name (case-insensitive, '.exe' optional)."""
+    _fresh(max_age)
+    name = name.lower()
+    pids = _by_name.get(name) or _by_name.get(f"{name}.exe") or _by_name.get(name.removesuffix(".exe")) or []
+    return [_processes[pid] for pid in pids if pid in _processes]
+
+
+def find_containing(text, max_age=None):
+    """Processes whose lowercase name contains text."""
+    _fresh(max_age)
+    text = text.lower()
+    return [_processes[pid] for name, pids in _by_name.items() if text in name for pid in pids]
+
+
+def is_running(name, max_age=None):
+    return bool(find_containing(name, max_age))
+
+
+def details(proc):
+    """exe and cmdline of a snapshot entry, read once per process."""
+    key = _key(proc)
+    cached = _details.get(key)
+    if cached is None:
+        try:
+            handle = psutil.Process(proc["pid"])
+            with handle.oneshot():
+                cached = {"exe": handle.exe(), "cmdline": handle.cmdline()}
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            cached = {"exe": None, "cmdline": None}
+        _details[key] = cached
+    return cached
+
+
+def get_handle(proc):
+    """
+    psutil.Process for a snapshot entry, or None if it has exited since
+    (also when its pid now belongs to a different process).
+    """
+    try:
+        handle = psutil.Process(proc["pid"])
+        if abs(handle.create_time() - proc["create_time"]) > 1:
+            return None
+        return handle
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return None
+
+
+def get_version():
+    return _version
+
+
+def get_stats():
+    return {"processes": len(_processes), "age_seconds": round(time.time() - _taken_at, 1),
+            "version": _version, "sampler": bool(_sampler and _sampler.is_alive())}
+
+
+def add_listener(callback):
+    """callback(started, exited) runs on the refreshing thread after each change."""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def remove_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def _sample_loop():
+    while not _stop.is_set():
+        try:
+            if time.time() - _taken_at >= INTERVAL_SECONDS * 0.9:
+                refresh()
+        except Exception as e:
+            print(f"⚠️ Process snapshot failed: {e}")
+        _stop.wait(INTERVAL_SECONDS)
+
+
+def start():
+    """Starts the background sampler (idempotent). Reads work without it, refreshing on demand."""
+    global _sampler
+    if _sampler and _sampler.is_alive():
+        return
+    _stop.clear()
+    _sampler = threading.Thread(target=_sample_loop, daemon=True, name="process-snapshot")
+    _sampler.start()
+
+
+def stop():
+    _stop.set()
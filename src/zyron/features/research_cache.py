@@ -0,0 +1,174 @@
+"""
+Research Answer Cache for Zyron Desktop Assistant
+Remembers synthesized research answers by normalized query.
+How long an answer stays fresh depends on the kind of question (prices go stale
+in minutes, biographies in weeks). Stale answers are served right away while a
+background refresh runs, except for live data (prices, scores, weather), which
+is looked up again instead.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+CACHE_FILE = os.path.join(PROJECT_ROOT, "saved_media", "research_cache.json")
+MAX_ENTRIES = 500
+STALE_FACTOR = 4  # A stale answer is still served (and refreshed) until ttl * STALE_FACTOR
+NO_STALE_CLASSES = {"live"}  # Too volatile to answer from an expired entry
+
+# TTL classes, checked in order; the first class whose pattern matches wins.
+# ttl 0 means never cache (the answer depends on the current moment).
+TTL_CLASSES = [
+    ("clock", 0, r"\b(time|date|day|today's date|what day)\b"),
+    ("live", 5 * 60, r"\b(price|stock|share|bitcoin|btc|eth|crypto|exchange rate|rate|score|live|weather|forecast|traffic)\b"),
+    ("role", 24 * 60 * 60, r"\b(ceo|president|prime minister|leader|owner|founder|head of|version|champion|winner)\b"),
+    ("news", 60 * 60, r"\b(news|latest|today|tonight|now|current|currently|this week|update|released?)\b"),
+    ("evergreen", 30 * 24 * 60 * 60, r"\b(who was|born|biography|history|meaning|define|definition|what is a|capital of|how to|formula|invented)\b"),
+]
+DEFAULT_TTL_CLASS = ("general", 6 * 60 * 60)
+
+FILLER_WORDS = {"please", "tell", "me", "can", "you", "could", "search", "google", "find", "out", "look", "up",
+                "the", "a", "an", "what", "what's", "whats", "is", "are", "hey", "zyron", "about"}
+
+_entries = None  # normalized query -> {"query", "answer", "method", "ttl_class", "created", "expires"}
+_lock = threading.Lock()
+_refreshing = set()
+stats = {"fresh_hits": 0, "stale_hits": 0, "misses": 0, "uncacheable": 0, "refreshes": 0, "refresh_failures": 0}
+
+
+def normalize(query):
+    """'What is the Bitcoin price??' and 'bitcoin price' share one key."""
+    words = re.findall(r"[\w'$€£.-]+", (query or "").lower())
+    words = [w.strip(".-") for w in words if w.strip(".-") not in FILLER_WORDS]
+    return " ".join(w for w in words if w)
+
+
+def classify(query):
+    """Returns (ttl_class, ttl_seconds) for a query."""
+    text = (query or "").lower()
+    for name, ttl, pattern in TTL_CLASSES:
+        if re.search(pattern, text):
+            return name, ttl
+    return DEFAULT_TTL_CLASS
+
+
+def _load():
+    global _entries
+    if _entries is not None:
+        return _entries
+    _entries = {}
+    if os.path.exists(CACHE_FILE):
+        try:
+            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+                _entries = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Failed to load research cache: {e}")
+    return _entries
+
+
+def _save():
+    """Writes the cache atomically, dropping the oldest entries beyond MAX_ENTRIES. Caller holds _lock."""
+    if len(_entries) > MAX_ENTRIES:
+        for key in sorted(_entries, key=lambda k: _entries[k]["created"])[:len(_entries) - MAX_ENTRIES]:
+            del _entries[key]
+    try:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        tmp_path = CACHE_FILE + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(_entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, CACHE_FILE)
+    except Exception as e:
+        print(f"⚠️ Failed to save research cache: {e}")
+
+
+def _count(name):
+    with _lock:
+        stats[name] += 1
+
+
+def lookup(query):
+    """
+    Returns (entry, state) where state is 'fresh', 'stale', 'miss' or 'uncacheable'.
+    entry is None unless the state is fresh or stale.
+    """
+    ttl_class, ttl = classify(query)
+    now = time.time()
+    with _lock:
+        if ttl == 0:
+            stats["uncacheable"] += 1
+            return None, "uncacheable"
+
+        entry = _load().get(normalize(query))
+        if entry and now < entry["expires"]:
+            stats["fresh_hits"] += 1
+            return entry, "fresh"
+        if (entry and entry["ttl_class"] not in NO_STALE_CLASSES
+                and now < entry["created"] + (entry["expires"] - entry["created"]) * STALE_FACTOR):
+            stats["stale_hits"] += 1
+            return entry, "stale"
+        stats["misses"] += 1
+        return None, "miss"
+
+
+def store(query, answer, method=None):
+    """Caches a successful answer under its TTL class."""
+    ttl_class, ttl = classify(query)
+    if ttl == 0:
+        return
+    now = time.time()
+    with _lock:
+        _load()[normalize(query)] = {
+            "query": query, "answer": answer, "method": method,
+            "ttl_class": ttl_class, "created": now, "expires": now + ttl,
+        }
+        _save()
+
+
+def refresh_async(query, research_func):
+    """
+    Re-runs research in the background and stores the result.
+    research_func(query) returns (answer, method); a None method means it failed.
+    Only one refresh per query runs at a time.
+    """
+    key = normalize(query)
+    with _lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+
+    def worker():
+        try:
+            answer, method = research_func(query)
+            if method:
+                store(query, answer, method)
+                _count("refreshes")
+            else:
+                _count("refresh_failures")
+        except Exception as e:
+            _count("refresh_failures")
+            print(f"⚠️ Background research refresh failed: {e}")
+        finally:
+            with _lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=worker, daemon=True).start()
+    return True
+
+
+def get_stats():
+    """Hit/miss counters since start, plus the number of cached answers and the hit rate."""
+    with _lock:
+        entries = len(_load())
+        counters = dict(stats)
+    lookups = counters["fresh_hits"] + counters["stale_hits"] + counters["misses"]
+    hit_rate = (counters["fresh_hits"] + counters["stale_hits"]) / lookups if lookups else 0.0
+    return {**counters, "entries": entries, "hit_rate": round(hit_rate, 3)}
+
+
+def clear():
+    with _lock:
+        _load().clear()
+        _save()
@@ -0,0 +1,146 @@
+"""
+Research Page Fetcher for Zyron Desktop Assistant
+Pulls the top result links out of a search page and downloads them in parallel
+over one shared requests.Session (keep-alive, pooled per host).
+Every page has a byte cap and the whole fetch has one deadline; whatever arrived
+in time is used, the rest is dropped.
+"""
+
+import re
+import time
+import html as html_lib
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse, parse_qs, urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import zyron.features.html_text as html_text
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+MAX_PAGES = 4
+PAGE_BYTE_CAP = 512 * 1024   # Enough for the article text of almost any page
+PAGE_TEXT_CHARS = 20000      # Stop downloading once this much readable text is in
+DEADLINE_SECONDS = 6         # For all result pages together
+CHUNK_SIZE = 16 * 1024
+
+# Hosts whose links on a results page are never results themselves
+SKIP_HOSTS = ["google.", "gstatic.com", "googleusercontent.com", "youtube.com", "accounts.", "support.google",
+              "maps.google", "policies.google", "webcache."]
+
+_session = None
+_executor = ThreadPoolExecutor(max_workers=MAX_PAGES, thread_name_prefix="research-fetch")
+
+
+def get_session():
+    """The shared HTTP session (created on first use)."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=MAX_PAGES)
+        _session.mount("http://", adapter)
+        _session.mount("https://", adapter)
+        _session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.8"})
+    return _session
+
+
+def _unwrap(href, base_url=None):
+    """Resolves Google's '/url?q=<target>' redirect links to the target URL."""
+    href = html_lib.unescape(href or "")
+    if href.startswith("/url?"):
+        href = parse_qs(urlparse(href).query).get("q", [""])[0]
+    elif base_url and href.startswith("/"):
+        href = urljoin(base_url, href)
+    return href
+
+
+def filter_result_links(urls, limit=MAX_PAGES):
+    """Keeps the first http(s) result links, one per site (host and port), skipping search engine pages."""
+    links, sites = [], set()
+    for url in urls:
+        url = _unwrap(url)
+        try:
+            parsed = urlparse(url)
+            host, site = (parsed.hostname or "").lower(), parsed.netloc.lower()
+        except ValueError:
+            continue
+        if not url.startswith(("http://", "https://")) or not host:
+            continue
+        if any(skip in host for skip in SKIP_HOSTS) or site in sites:
+            continue
+        sites.add(site)
+        links.append(url.split("#")[0])
+        if len(links) >= limit:
+            break
+    return links
+
+
+def extract_result_links(html, limit=MAX_PAGES):
+    """Top result links from search results HTML."""
+    return filter_result_links(re.findall(r'<a[^>]+href="([^"]+)"', html or ""), limit)
+
+
+def fetch_page(url, deadline, max_bytes=PAGE_BYTE_CAP, max_chars=PAGE_TEXT_CHARS):
+    """
+    Downloads one page and extracts its text while it streams in, stopping at
+    max_chars of text, max_bytes or the deadline (a time.monotonic() value).
+    Returns {"url", "success", "text", "bytes", "truncated", "ms"} or an error dict.
+    """
+    started = time.perf_counter()
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return {"url": url, "success": False, "error": "deadline passed"}
+    try:
+        with get_session().get(url, stream=True, timeout=(min(3, remaining), remaining)) as response:
+            content_type = response.headers.get("Content-Type", "")
+            if response.status_code != 200:
+                return {"url": url, "success": False, "error": f"status {response.status_code}"}
+            if "html" not in content_type and "text" not in content_type:
+                return {"url": url, "success": False, "error": f"skipped {content_type or 'unknown type'}"}
+
+            capped = {"hit": False}
+
+            def chunks():
+                size = 0
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    yield chunk[:max_bytes - size]
+                    size += len(chunk)
+                    if size >= max_bytes or time.monotonic() >= deadline:
+                        capped["hit"] = True
+                        return
+
+            encoding = response.encoding or "utf-8"
+            if encoding.lower() == "iso-8859-1" and "charset" not in content_type.lower():
+                encoding = "utf-8"  # requests' default for text/* without a charset; real pages are UTF-8
+            text, size, enough = html_text.extract_stream(chunks(), encoding, max_chars)
+            return {
+                "url": url, "success": True, "text": text,
+                "bytes": size, "truncated": enough or capped["hit"],
+                "ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+    except requests.RequestException as e:
+        return {"url": url, "success": False, "error": str(e)}
+
+
+def fetch_pages(urls, deadline_seconds=DEADLINE_SECONDS, max_bytes=PAGE_BYTE_CAP, max_chars=PAGE_TEXT_CHARS):
+    """
+    Fetches pages concurrently. Returns the pages that finished before the
+    deadline, in the order of urls, plus stats about the whole fetch.
+    """
+    started = time.perf_counter()
+    deadline = time.monotonic() + deadline_seconds
+    futures = [_executor.submit(fetch_page, url, deadline, max_bytes, max_chars) for url in urls]
+    done, _ = wait(futures, timeout=deadline_seconds + 0.5)
+
+    pages = [f.result() for f in futures if f in done]
+    ok = [page for page in pages if page.get("success")]
+    stats = {
+        "requested": len(urls),
+        "fetched": len(ok),
+        "late": len(futures) - len(done),
+        "failed": len(pages) - len(ok),
+        "bytes": sum(page["bytes"] for page in ok),
+        "stopped_early": sum(1 for page in ok if page["truncated"]),
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    return ok, stats
@@ -0,0 +1,172 @@
+"""
+Research Tab Pool for Zyron Desktop Assistant
+A few hidden background tabs, created once and reused across research queries.
+Each fetch is one batch message: navigate, wait for the load-complete event in the
+extension, then read. No fixed sleeps, and at most POOL_SIZE fetches at a time.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import zyron.features.browser_control as browser_control
+import zyron.features.tab_registry as tab_registry
+
+POOL_SIZE = int(os.environ.get("ZYRON_RESEARCH_TABS", "2"))
+IDLE_CLOSE_SECONDS = 300   # Close the pool after this long without research
+LOAD_TIMEOUT = 15          # Seconds for navigate + read of one page
+CONTENT_SELECTOR = "#search, #rso, main, article"  # Wait for results to render, not just the load event
+
+_idle = []                 # Pooled tab ids not in use
+_all = set()               # Every tab id owned by the pool
+_slots = threading.BoundedSemaphore(POOL_SIZE)
+_lock = threading.Lock()
+_idle_timer = None
+_timings = deque(maxlen=50)  # Recent time-to-content samples
+
+
+def _forget_tab(event, tab):
+    # A pooled tab closed by the user (or the browser going away) must not be handed out again
+    with _lock:
+        if event == "remove" and tab:
+            _all.discard(tab.get('id'))
+            if tab.get('id') in _idle:
+                _idle.remove(tab.get('id'))
+        elif event == "reset":
+            _all.clear()
+            _idle.clear()
+
+tab_registry.add_listener(_forget_tab)
+
+
+def _take_tab():
+    with _lock:
+        if _idle:
+            return _idle.pop()
+    browser_control.watch_tabs()
+    tab_id = browser_control.create_tab("about:blank", active=False, hidden=True)
+    if tab_id:
+        with _lock:
+            _all.add(tab_id)
+    return tab_id
+
+
+def _discard_tab(tab_id):
+    with _lock:
+        _all.discard(tab_id)
+    browser_control.close_tab(tab_id)
+
+
+def _release_tab(tab_id, broken=False):
+    """
+    Gives a fetch's tab and slot back. Parking the tab is a browser round trip, so it
+    runs on a background thread and the slot is freed once the tab is idle again.
+    """
+    if broken:
+        _discard_tab(tab_id)
+        _slots.release()
+        return
+    threading.Thread(target=_park_tab, args=(tab_id,), daemon=True, name="research-tab-park").start()
+
+
+def _park_tab(tab_id):
+    global _idle_timer
+    try:
+        # Park the tab on a blank page so it stops running the last site's scripts and media
+        parked = browser_control.run_batch([{"action": "navigate", "url": "about:blank", "timeout_ms": 3000}],
+                                           tab_id=tab_id, timeout=5)
+        if not (isinstance(parked, dict) and parked.get("success")):
+            # A tab we cannot park may keep playing the last page: don't hand it out again
+            print(f"⚠️ Research tab {tab_id} could not be parked: {(parked or {}).get('error', 'no reply')}")
+            _discard_tab(tab_id)
+            return
+        with _lock:
+            if tab_id in _all:
+                _idle.append(tab_id)
+            if _idle_timer:
+                _idle_timer.cancel()
+            _idle_timer = threading.Timer(IDLE_CLOSE_SECONDS, close_all)
+            _idle_timer.daemon = True
+            _idle_timer.start()
+    except Exception as e:
+        print(f"⚠️ Research tab {tab_id} could not be parked: {e}")
+        _discard_tab(tab_id)
+    finally:
+        _slots.release()
+
+
+def close_all():
+    """Closes every idle pooled tab."""
+    with _lock:
+        tabs = list(_idle)
+        _idle.clear()
+        _all.difference_update(tabs)
+    for tab_id in tabs:
+        browser_control.close_tab(tab_id)
+
+
+def fetch(url, timeout=LOAD_TIMEOUT, with_links=False):
+    """
+    Loads a URL in a pooled background tab and returns the read result.
+    The result gets a "timings" dict: wait_ms (for a free tab), load_ms and
+    time_to_content_ms (from the call until the text was back in Python).
+    with_links also scans the page and adds the main-area link URLs as "links".
+    """
+    started = time.perf_counter()
+    if not _slots.acquire(timeout=timeout):
+        return {"success": False, "error": "All research tabs are busy"}
+    try:
+        tab_id = _take_tab()
+    except Exception:
+        _slots.release()
+        raise
+    if not tab_id:
+        _slots.release()
+        return {"success": False, "error": "Could not create a research tab"}
+    acquired = time.perf_counter()
+
+    batch = {}
+    try:
+        steps = [
+            {"action": "navigate", "url": url, "timeout_ms": int(timeout * 1000)},
+            {"action": "wait_for", "selector": CONTENT_SELECTOR, "timeout_ms": 3000, "optional": True},
+            {"action": "read"},
+        ]
+        if with_links:
+            steps.append({"action": "scan", "optional": True})
+        batch = browser_control.run_batch(steps, tab_id=tab_id, timeout=timeout + 5)
+        done = time.perf_counter()
+    finally:
+        # Navigation throwing (rather than timing out) means the tab is gone. The slot is
+        # freed by _release_tab once the tab is parked, after this fetch has returned.
+        results = batch.get("results") or []
+        _release_tab(tab_id, broken=batch.get("failed_step") == 0 and bool((results[0] or {}).get("error")))
+
+    if batch.get("success") and len(results) >= 3:
+        result = dict(results[2])
+        if with_links:
+            scan = (results[3] if len(results) > 3 else None) or {}
+            result["links"] = [e.get("url") for e in scan.get("elements", []) if e.get("area") == "main" and e.get("url")]
+    else:
+        failed = (results[-1] if results else None) or {}
+        result = {"success": False, "error": failed.get("error") or batch.get("error", "Page did not load")}
+    result["timings"] = {
+        "wait_ms": round((acquired - started) * 1000, 1),
+        "load_ms": round((done - acquired) * 1000, 1),
+        "time_to_content_ms": round((done - started) * 1000, 1),
+    }
+    if result.get("success"):
+        _timings.append(result["timings"]["time_to_content_ms"])
+    return result
+
+
+def get_stats():
+    """Pool size and recent time-to-content (median and worst, in ms)."""
+    samples = sorted(_timings)
+    with _lock:
+        stats = {"pool_tabs": len(_all), "idle_tabs": len(_idle), "samples": len(samples)}
+    if samples:
+        stats["p50_ms"] = samples[len(samples) // 2]
+        stats["max_ms"] = samples[-1]
+    return stats
@@ -0,0 +1,240 @@
+"""
+System Metrics for Zyron Desktop Assistant
+A background thread samples CPU (total and per core), RAM, swap, disk I/O,
+network and battery every few seconds into fixed-size NumPy ring buffers, so
+"how is the pc" is answered instantly with current values, 1/5/15-minute
+averages and p95, and short history graphs can be drawn for Telegram.
+"""
+
+import io
+import threading
+import time
+
+import numpy as np
+import psutil
+
+SAMPLE_SECONDS = 2
+HISTORY_SECONDS = 15 * 60
+SLOTS = HISTORY_SECONDS // SAMPLE_SECONDS
+BATTERY_EVERY = 15            # Battery changes slowly and is slow to read on some laptops: every 15th sample
+WINDOWS = {"1m": 60, "5m": 300, "15m": 900}
+
+# metric -> (label, unit)
+METRICS = {
+    "cpu": ("CPU", "%"),
+    "ram": ("RAM", "%"),
+    "swap": ("Swap", "%"),
+    "disk_read": ("Disk read", "MB/s"),
+    "disk_write": ("Disk write", "MB/s"),
+    "net_recv": ("Download", "MB/s"),
+    "net_sent": ("Upload", "MB/s"),
+    "battery": ("Battery", "%"),
+}
+
+# Ring buffers: row i is written at sample number i % SLOTS; NaN = no reading
+_times = np.full(SLOTS, np.nan)
+_values = {name: np.full(SLOTS, np.nan) for name in METRICS}
+_per_core = np.full((SLOTS, psutil.cpu_count() or 1), np.nan)
+_written = 0                  # Samples written so far
+_lock = threading.Lock()         # Guards the buffers for readers
+_sample_lock = threading.Lock()  # One sample at a time (sampler thread and on-demand reads)
+_previous = None              # (time, disk counters, net counters) for rates
+_sampler = None
+_stop = threading.Event()
+
+
+def _rate(now_value, old_value, seconds):
+    return max(now_value - old_value, 0) / seconds / (1024 * 1024)
+
+
+def sample():
+    """Takes one reading of every metric and writes it into the ring buffers."""
+    with _sample_lock:
+        _sample()
+
+
+def _sample():
+    global _written, _previous
+    now = time.time()
+    per_core = psutil.cpu_percent(percpu=True)  # Since the previous call: never blocks
+    ram = psutil.virtual_memory()
+    swap = psutil.swap_memory()
+    disk = psutil.disk_io_counters()
+    net = psutil.net_io_counters()
+
+    row = {"cpu": float(np.mean(per_core)) if per_core else np.nan, "ram": ram.percent, "swap": swap.percent}
+    if _previous and now > _previous[0]:
+        seconds, old_disk, old_net = now - _previous[0], _previous[1], _previous[2]
+        if disk and old_disk:
+            row["disk_read"] = _rate(disk.read_bytes, old_disk.read_bytes, seconds)
+            row["disk_write"] = _rate(disk.write_bytes, old_disk.write_bytes, seconds)
+        if net and old_net:
+            row["net_recv"] = _rate(net.bytes_recv, old_net.bytes_recv, seconds)
+            row["net_sent"] = _rate(net.bytes_sent, old_net.bytes_sent, seconds)
+    _previous = (now, disk, net)
+
+    if _written % BATTERY_EVERY == 0:
+        try:
+            battery = psutil.sensors_battery()
+            row["battery"] = battery.percent if battery else np.nan
+        except Exception:
+            row["battery"] = np.nan
+    else:
+        row["battery"] = _values["battery"][(_written - 1) % SLOTS]
+
+    with _lock:
+        slot = _written % SLOTS
+        _times[slot] = now
+        for name, buffer in _values.items():
+            buffer[slot] = row.get(name, np.nan)
+        cores = min(len(per_core), _per_core.shape[1])
+        _per_core[slot, :] = np.nan
+        _per_core[slot, :cores] = per_core[:cores]
+        _written += 1
+
+
+def _ordered(buffer):
+    """Buffer contents oldest first (only the slots written so far)."""
+    if _written < SLOTS:
+        return buffer[:_written].copy()
+    start = _written % SLOTS
+    return np.concatenate((buffer[start:], buffer[:start]))
+
+
+def history(metric, seconds=HISTORY_SECONDS):
+    """(times, values) of a metric over the last seconds, oldest first."""
+    with _lock:
+        times, values = _ordered(_times), _ordered(_values[metric])
+    keep = times >= time.time() - seconds
+    return times[keep], values[keep]
+
+
+def summary():
+    """
+    Current value, 1/5/15-minute averages and 15-minute p95 of every metric:
+    {metric: {"current", "avg_1m", "avg_5m", "avg_15m", "p95"}} (None where unknown).
+    """
+    with _lock:
+        times = _ordered(_times)
+        columns = {name: _ordered(buffer) for name, buffer in _values.items()}
+    now = time.time()
+    result = {}
+    for name, values in columns.items():
+        known = values[~np.isnan(values)]
+        stats = {"current": float(known[-1]) if known.size else None}
+        for label, seconds in WINDOWS.items():
+            window = values[(times >= now - seconds) & ~np.isnan(values)]
+            stats[f"avg_{label}"] = float(window.mean()) if window.size else None
+        stats["p95"] = float(np.percentile(known, 95)) if known.size else None
+        result[name] = stats
+    return result
+
+
+def per_core_current():
+    with _lock:
+        if not _written:
+            return []
+        row = _per_core[(_written - 1) % SLOTS]
+    return [float(v) for v in row if not np.isnan(v)]
+
+
+def has_data():
+    return _written > 0
+
+
+def _fmt(value, unit):
+    if value is None:
+        return "n/a"
+    return f"{value:.0f}{unit}" if unit == "%" else f"{value:.2f} {unit}"
+
+
+def format_health():
+    """Health report for Telegram: current values plus 1/5/15-minute averages and p95."""
+    if not has_data():
+        ensure_started()
+        time.sleep(0.5)  # Let CPU counters accumulate once, then read
+        sample()
+    stats = summary()
+    lines = ["🖥️ **System Health:**"]
+    for name, (label, unit) in METRICS.items():
+        s = stats[name]
+        if s["current"] is None:
+            continue
+        averages = " / ".join(_fmt(s[f"avg_{w}"], unit) for w in WINDOWS)
+        lines.append(f"{label}: {_fmt(s['current'], unit)}  (avg 1/5/15m: {averages}, p95: {_fmt(s['p95'], unit)})")
+    cores = per_core_current()
+    if cores:
+        lines.append("Cores: " + " ".join(f"{c:.0f}" for c in cores) + " %")
+    ram = psutil.virtual_memory()
+    lines.append(f"RAM free: {round(ram.available / (1024 * 1024 * 1024), 2)} GB")
+    return "\n".join(lines)
+
+
+def render_graph(metrics=("cpu", "ram"), seconds=HISTORY_SECONDS, size=(640, 240)):
+    """
+    Draws a small line chart of percentage metrics over the last seconds.
+    Returns the PNG bytes (in memory, so concurrent requests never share a file),
+    or None without Pillow or with too little history.
+    """
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return None
+
+    series = [(name, *history(name, seconds)) for name in metrics]
+    if not series or len(series[0][1]) < 5:
+        return None
+
+    colors = {"cpu": (231, 76, 60), "ram": (52, 152, 219), "swap": (155, 89, 182), "battery": (46, 204, 113)}
+    width, height = size
+    left, top, bottom = 36, 10, 24
+    img = Image.new("RGB", size, (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    plot_w, plot_h = width - left - 10, height - top - bottom
+
+    for pct in (0, 50, 100):
+        y = top + plot_h - pct / 100 * plot_h
+        draw.line([(left, y), (width - 10, y)], fill=(225, 225, 225))
+        draw.text((4, y - 6), f"{pct}%", fill=(120, 120, 120))
+
+    # x axis spans the history actually recorded (the sampler may have started recently)
+    start = min(times[0] for _, times, _ in series if len(times))
+    span = max(time.time() - start, 1)
+    for i, (name, times, values) in enumerate(series):
+        points = [(left + (t - start) / span * plot_w, top + plot_h - min(max(v, 0), 100) / 100 * plot_h)
+                  for t, v in zip(times, values) if not np.isnan(v)]
+        color = colors.get(name, (90, 90, 90))
+        if len(points) > 1:
+            draw.line(points, fill=color, width=2)
+        draw.text((left + 8 + i * 70, height - bottom + 6), METRICS[name][0], fill=color)
+    draw.text((width - 90, height - bottom + 6), f"last {max(round(span / 60), 1)} min", fill=(120, 120, 120))
+
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _sample_loop():
+    delay = SAMPLE_SECONDS
+    while not _stop.wait(delay):
+        started = time.time()
+        try:
+            sample()
+        except Exception as e:
+            print(f"⚠️ Metrics sample failed: {e}")
+        delay = max(SAMPLE_SECONDS - (time.time() - started), 0.1)
+
+
+def ensure_started():
+    """Starts the sampler thread once."""
+    global _sampler
+    if _sampler and _sampler.is_alive():
+        return
+    psutil.cpu_percent(percpu=True)  # Baseline for the first non-blocking reading
+    _stop.clear()
+    _sampler = threading.Thread(target=_sample_loop, daemon=True, name="system-metrics")
+    _sampler.start()
+
+
+def stop():
+    _stop.set()
@@ -0,0 +1,182 @@
+"""
+Tab Registry for Zyron Desktop Assistant
+Keeps the live Firefox tab list in memory, fed by incremental events from the extension
+"""
+
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
+
+# Live tab state (only touched under _lock)
+_tabs = {}                       # tab id -> tab dict
+_by_window = defaultdict(set)    # window id -> tab ids
+_by_host = defaultdict(set)      # hostname -> tab ids
+_version = 0                     # Bumped on every change so consumers can skip work
+_lock = threading.RLock()
+_live = threading.Event()        # Set once the first snapshot has arrived
+_listeners = []
+
+
+def hostname_of(url):
+    """Returns the hostname of a URL without a leading 'www.'."""
+    try:
+        host = urlparse(url or "").hostname or ""
+    except ValueError:
+        host = ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def _index(tab):
+    tab_id = tab.get('id')
+    _unindex(tab_id)
+    tab['host'] = hostname_of(tab.get('url'))
+    _tabs[tab_id] = tab
+    _by_window[tab.get('windowId')].add(tab_id)
+    _by_host[tab['host']].add(tab_id)
+
+
+def _unindex(tab_id):
+    old = _tabs.pop(tab_id, None)
+    if old is None:
+        return None
+    for index, key in ((_by_window, old.get('windowId')), (_by_host, old.get('host'))):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(tab_id)
+            if not ids:
+                del index[key]
+    return old
+
+
+def _notify(event, tab):
+    for callback in list(_listeners):
+        try:
+            callback(event, tab)
+        except Exception as e:
+            print(f"⚠️ Tab registry listener error: {e}")
+
+
+def apply_event(message):
+    """
+    Applies a message from the extension.
+    'update_tabs' carries a full snapshot; 'tab_event' carries one
+    created/updated/removed/activated delta.
+    """
+    global _version
+    changes = []
+
+    with _lock:
+        if message.get("action") == "update_tabs":
+            _tabs.clear()
+            _by_window.clear()
+            _by_host.clear()
+            for tab in message.get("tabs", []):
+                if tab.get('id') is not None:
+                    _index(dict(tab))
+            changes.append(("snapshot", None))
+
+        elif message.get("action") == "tab_event":
+            event = message.get("event")
+
+            if event in ["created", "updated"]:
+                tab = dict(message.get("tab") or {})
+                if tab.get('id') is None:
+                    return
+                _index(tab)
+                changes.append(("upsert", dict(tab)))
+
+            elif event == "removed":
+                old = _unindex(message.get("tabId"))
+                if old is None:
+                    return
+                changes.append(("remove", old))
+
+            elif event == "activated":
+                active_id = message.get("tabId")
+                for tab_id in _by_window.get(message.get("windowId"), ()):
+                    _tabs[tab_id]['active'] = (tab_id == active_id)
+                changes.append(("activated", dict(_tabs[active_id]) if active_id in _tabs else None))
+            else:
+                return
+        else:
+            return
+
+        _version += 1
+        _live.set()
+
+    for event, tab in changes:
+        _notify(event, tab)
+
+
+def reset():
+    """Forgets all tabs (the extension disconnected)."""
+    global _version
+    with _lock:
+        _tabs.clear()
+        _by_window.clear()
+        _by_host.clear()
+        _version += 1
+        _live.clear()
+    _notify("reset", None)
+
+
+def add_listener(callback):
+    """Registers callback(event, tab) for 'snapshot', 'upsert', 'remove', 'activated' and 'reset'."""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def remove_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def is_live():
+    return _live.is_set()
+
+
+def wait_until_live(timeout=1.0):
+    """Waits for the first snapshot after (re)connecting. Returns True if tabs are available."""
+    return _live.wait(timeout)
+
+
+def get_version():
+    return _version
+
+
+def get_tabs():
+    """
+    Returns a copy of every open tab. Not in browser (tab strip) order: tabs carry no
+    index, and each update re-inserts its tab, so the most recently changed come last.
+    """
+    with _lock:
+        return [dict(tab) for tab in _tabs.values()]
+
+
+def get_tab(tab_id):
+    with _lock:
+        tab = _tabs.get(tab_id)
+        return dict(tab) if tab else None
+
+
+def get_window_tabs(window_id):
+    with _lock:
+        return [dict(_tabs[tab_id]) for tab_id in _by_window.get(window_id, ())]
+
+
+def get_tabs_by_host(hostname):
+    """Tabs on a host or any of its subdomains (e.g. 'youtube.com' matches 'm.youtube.com')."""
+    hostname = hostname_of(f"//{hostname}") or hostname.lower()
+    with _lock:
+        return [
+            dict(_tabs[tab_id])
+            for host, ids in _by_host.items()
+            if host == hostname or host.endswith("." + hostname)
+            for tab_id in ids
+        ]
+
+
+def get_active_tabs():
+    """The active tab of every window."""
+    with _lock:
+        return [dict(tab) for tab in _tabs.values() if tab.get('active')]
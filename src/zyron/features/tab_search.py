@@ -0,0 +1,250 @@
+"""
+Tab Search for Zyron Desktop Assistant
+Fuzzy "the X tab" lookup over the live tab registry.
+Titles, hostnames and URL paths are kept in token postings, and the token
+vocabulary in trigram postings, so typos still find the right tab.
+The index follows tab_registry events instead of being rebuilt per query.
+"""
+
+import re
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import zyron.features.browser_control as browser_control
+import zyron.features.tab_registry as tab_registry
+
+# Score per query word, best match wins (exact host > title token > path token > fuzzy)
+HOST_SCORE = 10
+TITLE_SCORE = 4
+PATH_SCORE = 2
+FUZZY_WEIGHTS = {"host": 3, "title": 3, "path": 1.5}  # Multiplied by typo similarity
+PHRASE_BONUS = 5       # Whole query appears in the title
+MIN_SIMILARITY = 0.5   # Below this a token is not considered a typo of the query word
+
+# "reload all youtube tabs": words that say what to do or how many, never which tabs
+BATCH_WORDS = ["all", "every", "tabs", "everything"]
+AUDIBLE_WORDS = ["playing", "audible", "sound", "noisy", "noise", "loud"]
+BATCH_VERB_WORDS = ["refresh", "screenshots", "capture", "snapshot", "silence", "take", "shot", "shots"]
+BATCH_FILLER_WORDS = ["tab", "the", "my", "with", "and", "that", "are", "from", "for", "open", "opened", "which",
+                      "please", "muted"]
+
+_postings = {"host": defaultdict(set), "title": defaultdict(set), "path": defaultdict(set)}  # field -> token -> tab ids
+_tab_tokens = {}                 # tab id -> {field: set(tokens)}
+_vocab = defaultdict(int)        # token -> number of (tab, field) entries using it
+_trigrams = defaultdict(set)     # trigram -> tokens
+_lock = threading.RLock()
+
+
+def tokenize(text):
+    return [t for t in re.findall(r"[^\W_]+", (text or "").lower()) if len(t) > 1]
+
+
+def trigrams(token):
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _fields(tab):
+    host = tab_registry.hostname_of(tab.get('url'))
+    labels = host.split(".")
+    if len(labels) > 1:
+        labels = labels[:-1]  # 'youtube.com' -> 'youtube'; the TLD never identifies a tab
+    try:
+        path = urlparse(tab.get('url') or "").path
+    except ValueError:
+        path = ""
+    return {
+        "host": ({host} if host else set()) | {label for label in labels if len(label) > 1},
+        "title": set(tokenize(tab.get('title'))),
+        "path": set(tokenize(path)),
+    }
+
+
+def _add_token(token):
+    _vocab[token] += 1
+    if _vocab[token] == 1:
+        for gram in trigrams(token):
+            _trigrams[gram].add(token)
+
+
+def _drop_token(token):
+    _vocab[token] -= 1
+    if _vocab[token] <= 0:
+        del _vocab[token]
+        for gram in trigrams(token):
+            tokens = _trigrams.get(gram)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del _trigrams[gram]
+
+
+def _unindex(tab_id):
+    fields = _tab_tokens.pop(tab_id, None)
+    if not fields:
+        return
+    for field, tokens in fields.items():
+        for token in tokens:
+            ids = _postings[field].get(token)
+            if ids is not None:
+                ids.discard(tab_id)
+                if not ids:
+                    del _postings[field][token]
+            _drop_token(token)
+
+
+def _index(tab):
+    tab_id = tab.get('id')
+    _unindex(tab_id)
+    fields = _fields(tab)
+    _tab_tokens[tab_id] = fields
+    for field, tokens in fields.items():
+        for token in tokens:
+            _postings[field][token].add(tab_id)
+            _add_token(token)
+
+
+def _clear():
+    _tab_tokens.clear()
+    _vocab.clear()
+    _trigrams.clear()
+    for postings in _postings.values():
+        postings.clear()
+
+
+def rebuild():
+    """Re-indexes every tab currently in the registry."""
+    with _lock:
+        _clear()
+        for tab in tab_registry.get_tabs():
+            _index(tab)
+
+
+def _on_tab_event(event, tab):
+    with _lock:
+        if event == "upsert" and tab:
+            _index(tab)
+        elif event == "remove" and tab:
+            _unindex(tab.get('id'))
+        elif event == "reset":
+            _clear()
+    if event == "snapshot":
+        rebuild()
+
+
+def edit_distance(a, b):
+    """Levenshtein distance where swapping two neighbouring letters costs 1 ('gmial' -> 'gmail')."""
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], prev2[j - 2] + 1)
+        prev2, prev = prev, row
+    return prev[-1]
+
+
+def _similar_tokens(word):
+    """Vocabulary tokens that look like a typo of word -> similarity (0..1)."""
+    grams = trigrams(word)
+    shared = defaultdict(int)
+    for gram in grams:
+        for token in _trigrams.get(gram, ()):
+            shared[token] += 1
+
+    similar = {}
+    for token, count in shared.items():
+        similarity = count / (len(grams) + len(trigrams(token)) - count)
+        # Transpositions break most trigrams, so close-length candidates also get an edit distance check
+        if abs(len(token) - len(word)) <= 2:
+            similarity = max(similarity, 1 - edit_distance(word, token) / max(len(word), len(token)))
+        if similarity >= MIN_SIMILARITY:
+            similar[token] = similarity
+    return similar
+
+
+def search(query, limit=5):
+    """
+    Ranks open tabs against a free-text query like "yotube music".
+    Returns [(score, tab), ...] best first; tabs that match nothing are left out.
+    """
+    words = tokenize(query)
+    if not words:
+        return []
+
+    scores = defaultdict(float)
+    with _lock:
+        for word in words:
+            best = defaultdict(float)  # Each word counts once per tab, by its best match
+
+            for tab_id in _postings["host"].get(word, ()):
+                best[tab_id] = max(best[tab_id], HOST_SCORE)
+            for tab_id in _postings["title"].get(word, ()):
+                best[tab_id] = max(best[tab_id], TITLE_SCORE)
+            for tab_id in _postings["path"].get(word, ()):
+                best[tab_id] = max(best[tab_id], PATH_SCORE)
+
+            if len(word) >= 3:
+                for token, similarity in _similar_tokens(word).items():
+                    if token == word:
+                        continue
+                    for field, weight in FUZZY_WEIGHTS.items():
+                        for tab_id in _postings[field].get(token, ()):
+                            best[tab_id] = max(best[tab_id], similarity * weight)
+
+            for tab_id, score in best.items():
+                scores[tab_id] += score
+
+    phrase = " ".join(words)
+    ranked = []
+    for tab_id, score in scores.items():
+        tab = tab_registry.get_tab(tab_id)
+        if tab is None:
+            continue
+        if len(words) > 1 and phrase in " ".join(tokenize(tab.get('title'))):
+            score += PHRASE_BONUS
+        ranked.append((round(score, 2), tab))
+
+    # Ties go to the tab the user is looking at
+    ranked.sort(key=lambda item: (item[0], bool(item[1].get('active'))), reverse=True)
+    return ranked[:limit]
+
+
+def host_for(word):
+    """Hostname of open tabs whose host is named by word ('youtube' -> 'youtube.com'), or None."""
+    with _lock:
+        ids = list(_postings["host"].get(word.lower(), ()))
+    hosts = [tab['host'] for tab in map(tab_registry.get_tab, ids) if tab and tab.get('host')]
+    return min(hosts, key=len) if hosts else None
+
+
+def batch_filter(command, words):
+    """
+    Tab predicate for a batch request like "reload all youtube tabs":
+    {"host", "title", "audible", "muted"}, unset keys None (all None: no site named).
+    Operation verbs, batch and filler words are dropped first; a single word left
+    that names an open tab's site becomes a host filter, any others must all
+    appear in the title.
+    """
+    words = [w.lower() for w in words]
+    audible = True if any(w in AUDIBLE_WORDS for w in words) else None
+    muted = True if command == "unmute" and "muted" in words else None
+    ignored = set(browser_control.TAB_OPERATIONS + BATCH_WORDS + AUDIBLE_WORDS + BATCH_VERB_WORDS + BATCH_FILLER_WORDS)
+    words = [w for w in words if w not in ignored and len(w) > 2]
+
+    host = host_for(words[0]) if len(words) == 1 else None
+    title = None if host or not words else "".join(f"(?=.*{re.escape(w)})" for w in words)
+    return {"host": host, "title": title, "audible": audible, "muted": muted}
+
+
+def best_match(query):
+    """The single best tab for "the X tab", or None."""
+    results = search(query, limit=1)
+    return results[0][1] if results else None
+
+
+tab_registry.add_listener(_on_tab_event)
+rebuild()
@@ -5,6 +5,7 @@ Tracks process activity and identifies "zombies" - high memory usage apps that h
 
 import time
 import psutil
+import zyron.features.process_snapshot as process_snapshot
 import threading
 import json
 import os
@@ -58,11 +59,8 @@ def get_foreground_process_name():
         hwnd = win32gui.GetForegroundWindow()
         if not hwnd: return None
         _, pid = win32process.GetWindowThreadProcessId(hwnd)
-        try:
-            proc = psutil.Process(pid)
-            return proc.name()
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return None
+        proc = process_snapshot.get(pid)
+        return proc['name'] if proc else None
     except Exception:
         return None
 
@@ -101,41 +99,39 @@ def get_zombies():
     # Update current app activity
     track_foreground_window()
     
-    # Scan all processes
-    for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
-        try:
-            pinfo = proc.info
-            name = pinfo['name']
-            pid = pinfo['pid']
-            mem_mb = pinfo['memory_info'].rss / (1024 * 1024)
-            
-            # Skip whitelisted or system apps
-            if name.lower() in [x.lower() for x in whitelist]:
-                continue
+    whitelisted = {x.lower() for x in whitelist}
+    
+    # All processes, from the shared snapshot
+    for proc in process_snapshot.get_processes():
+        name = proc['name']
+        pid = proc['pid']
+        mem_mb = proc['rss'] / (1024 * 1024)
+        
+        # Skip whitelisted or system apps
+        if name.lower() in whitelisted:
+            continue
+        
+        # Skip critical system processes
+        if name.lower() in ['explorer.exe', 'start_zyron.bat', 'python.exe', 'cmd.exe', 'svchost.exe', 'system', 'registry', 'smss.exe', 'csrss.exe', 'wininit.exe', 'services.exe', 'lsass.exe']:
+            continue
+
+        # Check Thresholds
+        if mem_mb > RAM_THRESHOLD_MB:
+            # Check idle time
+            last_active = last_active_timestamps.get(name.lower(), current_time)
+            idle_seconds = current_time - last_active
             
-            # Skip critical system processes
-            if name.lower() in ['explorer.exe', 'start_zyron.bat', 'python.exe', 'cmd.exe', 'svchost.exe', 'system', 'registry', 'smss.exe', 'csrss.exe', 'wininit.exe', 'services.exe', 'lsass.exe']:
-                continue
-
-            # Check Thresholds
-            if mem_mb > RAM_THRESHOLD_MB:
-                # Check idle time
-                last_active = last_active_timestamps.get(name.lower(), current_time)
-                idle_seconds = current_time - last_active
+            if idle_seconds > IDLE_THRESHOLD_SECONDS:
+                # Found a zombie!
+                hours = int(idle_seconds // 3600)
+                minutes = int((idle_seconds % 3600) // 60)
                 
-                if idle_seconds > IDLE_THRESHOLD_SECONDS:
-                    # Found a zombie!
-                    hours = int(idle_seconds // 3600)
-                    minutes = int((idle_seconds % 3600) // 60)
-                    
-                    zombies.append({
-                        'pid': pid,
-                        'name': name,
-                        'ram_mb': round(mem_mb, 1),
-                        'idle_time_str': f"{hours}h {minutes}m"
-                    })
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
+                zombies.append({
+                    'pid': pid,
+                    'name': name,
+                    'ram_mb': round(mem_mb, 1),
+                    'idle_time_str': f"{hours}h {minutes}m"
+                })
             
     return zombies
 
@@ -147,12 +143,9 @@ def reaper_loop(callback_func):
     
     # Initialize process timers
     start_time = time.time()
-    for proc in psutil.process_iter(['name']):
-        try:
-            name = proc.info['name']
-            if name:
-                last_active_timestamps[name.lower()] = start_time
-        except: pass
+    for proc in process_snapshot.get_processes():
+        if proc['name']:
+            last_active_timestamps[proc['name'].lower()] = start_time
     
     while reaper_active:
         track_foreground_window()
@@ -176,6 +169,7 @@ def start_reaper(callback_func=None):
     if reaper_active: return
     
     reaper_active = True
+    process_snapshot.start()
     reaper_thread = threading.Thread(target=reaper_loop, args=(callback_func,), daemon=True)
     reaper_thread.start()
 
@@ -0,0 +1,213 @@
+"""
+Native Host Benchmark
+Spawns core/browser_host.py with piped stdin/stdout and plays the extension side of
+the 4-byte length-prefixed native messaging protocol, so IPC changes can be measured
+on any OS without a browser.
+
+Usage:
+    python -m zyron.scripts.benchmark_native_host [--count 500] [--concurrency 8] [--sizes 1,4,8]
+"""
+
+import argparse
+import base64
+import json
+import os
+import queue
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+HOST_SCRIPT = Path(__file__).resolve().parent.parent / 'core' / 'browser_host.py'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# The bridge port is read at import time, so pick one before importing zyron modules
+os.environ['ZYRON_BRIDGE_PORT'] = str(free_port())
+import zyron.features.browser_control as browser_control  # noqa: E402
+
+
+class FakeExtension:
+    """Reads commands from the host's stdout and answers them like the Firefox extension would."""
+
+    def __init__(self, host):
+        self.host = host
+        self.write_lock = threading.Lock()
+        self.host_replies = queue.Queue()  # Untagged replies from the host (e.g. ping)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def send(self, message):
+        content = json.dumps(message).encode('utf-8')
+        with self.write_lock:
+            self.host.stdin.write(struct.pack('=I', len(content)) + content)
+            self.host.stdin.flush()
+        self.bytes_out += len(content) + 4
+
+    def _read(self):
+        raw = self.host.stdout.read(4)
+        if len(raw) < 4:
+            return None
+        length = struct.unpack('=I', raw)[0]
+        self.bytes_in += length + 4
+        return json.loads(self.host.stdout.read(length))
+
+    def _serve(self):
+        while True:
+            message = self._read()
+            if message is None:
+                return
+            action = message.get("action")
+            request_id = message.get("request_id")
+            size = message.get("bench_bytes", 0)
+
+            if action == "read":
+                self.send({"action": "navigation_result", "request_id": request_id, "data": {
+                    "success": True, "title": "Bench", "url": "https://bench.local/", "content": "x" * size}})
+            elif action == "capture_tab":
+                # A PNG-sized blob of random bytes, base64 encoded like captureVisibleTab's data URL
+                encoded = base64.b64encode(os.urandom(size)).decode('ascii')
+                self.send({"action": "capture_result", "request_id": request_id, "tabId": message.get("tabId"),
+                           "data": "data:image/png;base64," + encoded})
+            elif action == "sync_tabs":
+                self.send({"action": "update_tabs", "tabs": []})
+            elif request_id:
+                self.send({"action": "navigation_result", "request_id": request_id, "data": {"success": True}})
+            else:
+                self.host_replies.put(message)
+
+
+def percentiles(samples_ms):
+    ordered = sorted(samples_ms)
+    pick = lambda p: ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+    return {"p50": pick(50), "p95": pick(95), "p99": pick(99), "max": ordered[-1], "mean": statistics.fmean(ordered)}
+
+
+def report(name, samples_ms, elapsed=None, extra=""):
+    stats = percentiles(samples_ms)
+    rate = f"{len(samples_ms) / elapsed:8.0f} msg/s" if elapsed else " " * 14
+    print(f"  {name:<28} n={len(samples_ms):<5} p50={stats['p50']:7.2f}ms p95={stats['p95']:7.2f}ms "
+          f"p99={stats['p99']:7.2f}ms max={stats['max']:7.2f}ms {rate} {extra}")
+
+
+def bench_ping(extension, count):
+    """stdin -> host -> stdout only (no bridge socket)."""
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        extension.send({"action": "ping"})
+        extension.host_replies.get(timeout=5)
+        samples.append((time.perf_counter() - start) * 1000)
+    report("ping (extension <-> host)", samples)
+
+
+def bench_round_trip(count):
+    """Zyron client -> bridge -> host -> extension -> host -> bridge -> client, one at a time."""
+    samples = []
+    start_all = time.perf_counter()
+    for _ in range(count):
+        start = time.perf_counter()
+        result = browser_control.send_browser_command("click", selector="#bench")
+        if not result.get("success"):
+            raise RuntimeError(f"Round trip failed: {result}")
+        samples.append((time.perf_counter() - start) * 1000)
+    report("round trip (sequential)", samples, time.perf_counter() - start_all)
+
+
+def bench_concurrent(count, concurrency):
+    """Many commands in flight at once, matched back by request_id."""
+    samples = []
+    lock = threading.Lock()
+
+    def worker(n):
+        local = []
+        for _ in range(n):
+            start = time.perf_counter()
+            result = browser_control.send_browser_command("click", selector="#bench")
+            if not result.get("success"):
+                raise RuntimeError(f"Concurrent round trip failed: {result}")
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            samples.extend(local)
+
+    per_worker = max(1, count // concurrency)
+    threads = [threading.Thread(target=worker, args=(per_worker,)) for _ in range(concurrency)]
+    start_all = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    report(f"round trip ({concurrency} in flight)", samples, time.perf_counter() - start_all)
+
+
+def bench_large(sizes_mb, repeat=3):
+    """Multi-megabyte read results and screenshot data URLs."""
+    for size_mb in sizes_mb:
+        size = int(size_mb * 1024 * 1024)
+
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = browser_control.send_browser_command("read", timeout=60, bench_bytes=size)
+            samples.append((time.perf_counter() - start) * 1000)
+            if len(result.get("content", "")) != size:
+                raise RuntimeError("Read payload was truncated")
+        mb_s = size_mb / (statistics.fmean(samples) / 1000)
+        report(f"read result {size_mb:g} MB", samples, extra=f"{mb_s:7.1f} MB/s")
+
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            future = browser_control.submit_command("capture_tab", tabId=1, bench_bytes=size)
+            shot = browser_control.wait_for_result(future, timeout=60)
+            samples.append((time.perf_counter() - start) * 1000)
+            if len(shot.get("payload", b"")) != size:
+                raise RuntimeError(f"Screenshot payload mismatch: {shot.get('error')}")
+        mb_s = size_mb / (statistics.fmean(samples) / 1000)
+        report(f"screenshot {size_mb:g} MB", samples, extra=f"{mb_s:7.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Zyron native messaging host without a browser.")
+    parser.add_argument("--count", type=int, default=500, help="Messages per latency scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Commands in flight for the concurrent scenario")
+    parser.add_argument("--sizes", default="1,4,8", help="Large payload sizes in MB (comma separated)")
+    args = parser.parse_args()
+
+    env = {**os.environ, "TEMP": os.environ.get("TEMP", "") or str(Path.home())}
+    host = subprocess.Popen([sys.executable, "-u", str(HOST_SCRIPT)],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+    try:
+        extension = FakeExtension(host)
+
+        # Wait for the bridge socket to come up
+        deadline = time.time() + 5
+        while not browser_control.watch_tabs():
+            if time.time() > deadline:
+                raise RuntimeError("Native host bridge did not start")
+            browser_control._retry_after = 0
+            time.sleep(0.05)
+
+        print(f"⚡ Native host benchmark (port {browser_control.BRIDGE_ADDRESS[1]}, pid {host.pid})")
+        bench_ping(extension, args.count)
+        bench_round_trip(args.count)
+        bench_concurrent(args.count, args.concurrency)
+        bench_large([float(s) for s in args.sizes.split(",") if s.strip()])
+        print(f"  bytes extension->host: {extension.bytes_out / 1e6:.1f} MB, host->extension: {extension.bytes_in / 1e6:.1f} MB")
+    finally:
+        host.stdin.close()
+        host.wait(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
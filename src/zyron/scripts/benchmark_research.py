@@ -0,0 +1,238 @@
+"""
+Offline Research Benchmark
+Runs researcher.run_research against local fixture sites and a stub Ollama, so the
+research pipeline can be measured without a network, Firefox or a real model.
+
+The fixture sites serve a canned search results page (plus CAPTCHA, slow-page and
+multi-megabyte-page variants) and article pages padded with the usual script/nav
+boilerplate. The stub Ollama streams a canned answer over /api/chat, with a delay
+that grows with the prompt length, like a real model's prompt evaluation.
+Only the headless (requests) path is exercised; Firefox is never used.
+
+Usage:
+    python -m zyron.scripts.benchmark_research [--runs 3] [--budgets 0,1500] [--scenarios normal,slow,big,captcha]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+ARTICLE_SITES = 4
+PREFILL_MS_PER_1K_CHARS = 40   # Stub "prompt evaluation" cost
+TOKEN_DELAY = 0.02             # Stub generation speed (50 tokens/s)
+SLOW_PAGE_SECONDS = 10         # Longer than research_fetch's deadline
+BIG_PAGE_BYTES = 5 * 1024 * 1024
+STUB_ANSWER = "Sam Altman is the CEO of OpenAI. He returned to the role in November 2023 after a brief removal by the board."
+
+counters = {"bytes": 0, "requests": 0, "prompt_chars": 0}
+counters_lock = threading.Lock()
+
+
+def count(**values):
+    with counters_lock:
+        for key, value in values.items():
+            counters[key] += value
+
+
+BOILERPLATE = (
+    "<script>window.dataLayer=[];function track(){}" + "var x=1;" * 400 + "</script>"
+    "<style>body{margin:0}" + ".c{color:red}" * 300 + "</style>"
+    "<nav><ul>" + "".join(f"<li><a href='/s{i}'>Section {i} of the site menu</a></li>" for i in range(40)) + "</ul></nav>"
+)
+FOOTER = "<footer>" + "Copyright Example Media. All rights reserved. Privacy policy and cookie settings. " * 20 + "</footer>"
+
+
+def article_html(site, topic, layout="plain"):
+    """layout: 'plain', 'nohead' (valid HTML5 without </head> and <body>) or 'form' (page-wide WebForms <form>)"""
+    filler = "".join(
+        f"<p>Paragraph {i} on site {site} talks about company history, funding rounds and products in general terms "
+        f"without naming who runs it, which makes it poor context for the question.</p>" for i in range(60)
+    )
+    fact = (f"<p>{topic}: Sam Altman is the chief executive officer (CEO) of OpenAI. He was briefly removed "
+            f"by the board in November 2023 and reinstated as CEO days later.</p>")
+    content = f"<h1>{topic}</h1>{filler[:len(filler) // 2]}{fact}{filler[len(filler) // 2:]}{FOOTER}"
+    if layout == "nohead":
+        return f"<!DOCTYPE html><html><head><title>{topic} - Site {site}</title>{BOILERPLATE}{content}</html>"
+    if layout == "form":
+        content = f"<form method='post' action='./article.aspx' id='form1'><input type='hidden' name='__VIEWSTATE'>{content}</form>"
+    return f"<html><head><title>{topic} - Site {site}</title>{BOILERPLATE}</head><body>{content}</body></html>"
+
+
+def serp_html(query, ports, scenario):
+    links = []
+    for i, port in enumerate(ports, 1):
+        path = f"/article/{i}"
+        if scenario == "slow" and i == 2:
+            path = f"/slow/{i}"
+        elif scenario == "big" and i == 1:
+            path = f"/big/{i}"
+        target = f"http://127.0.0.1:{port}{path}"
+        links.append(f'<div class="g"><a href="/url?q={target}&amp;sa=U"><h3>Result {i} for {query}</h3></a>'
+                     f'<div>Snippet {i}: OpenAI CEO Sam Altman and the company leadership in 2024.</div></div>')
+    # Direct answer box: shorter than the article block filter, must survive extraction
+    answer = "<div class='answer-box'><div>CEO of OpenAI</div><div>Sam Altman</div></div>"
+    return (f"<html><head>{BOILERPLATE}</head><body><div id='search'>{answer}{''.join(links)}</div>"
+            f"<a href='https://www.google.com/preferences'>Settings</a>{FOOTER}</body></html>")
+
+
+def make_site_handler(article_ports):
+    class SiteHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def send_body(self, body, content_type="text/html; charset=utf-8", delay_after=0):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                for start in range(0, len(body), 16384):
+                    chunk = body[start:start + 16384]
+                    self.wfile.write(chunk)
+                    count(bytes=len(chunk))
+                    if delay_after and start == 0:
+                        time.sleep(delay_after)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # The client stopped reading early (byte cap, text cutoff or deadline)
+
+        def do_GET(self):
+            count(requests=1)
+            url = urlparse(self.path)
+            site = self.server.server_address[1]
+
+            if url.path == "/search":
+                query = parse_qs(url.query).get("q", [""])[0]
+                scenario = query.split()[0] if query.split() else "normal"
+                if scenario == "captcha":
+                    body = b"<html><body>Our systems have detected unusual traffic from your computer network.</body></html>"
+                else:
+                    body = serp_html(query, article_ports, scenario).encode()
+                self.send_body(body)
+            elif url.path.startswith("/article/"):
+                # Result 1 is a plain page, 2 omits </head>, 3 is a WebForms page, then repeat
+                number = int(url.path.rsplit("/", 1)[-1] or 1)
+                layout = ("plain", "nohead", "form")[(number - 1) % 3]
+                self.send_body(article_html(site, "OpenAI leadership", layout).encode())
+            elif url.path.startswith("/slow/"):
+                # Headers and the first chunk arrive, then the page stalls past the deadline
+                self.send_body(article_html(site, "OpenAI leadership (slow)").encode(), delay_after=SLOW_PAGE_SECONDS)
+            elif url.path.startswith("/big/"):
+                page = article_html(site, "OpenAI leadership (big)").encode()
+                self.send_body(page + b"<p>" + b"padding text " * (BIG_PAGE_BYTES // 13) + b"</p>")
+            else:
+                self.send_error(404)
+
+    return SiteHandler
+
+
+class OllamaStubHandler(BaseHTTPRequestHandler):
+    """Just enough of Ollama's /api/chat for the ollama client, streaming NDJSON."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        if self.path != "/api/chat":
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = "".join(m.get("content", "") for m in request.get("messages", []))
+        count(prompt_chars=len(prompt))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        time.sleep(len(prompt) / 1000 * PREFILL_MS_PER_1K_CHARS / 1000)
+
+        model = request.get("model", "stub")
+        words = STUB_ANSWER.split(" ")
+        for i, word in enumerate(words):
+            chunk = {"model": model, "created_at": "2024-01-01T00:00:00Z",
+                     "message": {"role": "assistant", "content": word + (" " if i < len(words) - 1 else "")},
+                     "done": False}
+            self.wfile.write((json.dumps(chunk) + "\n").encode())
+            self.wfile.flush()
+            time.sleep(TOKEN_DELAY)
+        final = {"model": model, "created_at": "2024-01-01T00:00:00Z",
+                 "message": {"role": "assistant", "content": ""}, "done": True, "done_reason": "stop",
+                 "prompt_eval_count": len(prompt) // 4, "eval_count": len(words)}
+        self.wfile.write((json.dumps(final) + "\n").encode())
+        self.wfile.flush()
+
+
+def serve(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the research pipeline offline.")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per scenario and budget")
+    parser.add_argument("--budgets", default="0,1500", help="RESEARCH_TOKEN_BUDGET values to compare (0 = unranked)")
+    parser.add_argument("--scenarios", default="normal,slow,big,captcha", help="Fixture scenarios to run")
+    args = parser.parse_args()
+
+    # One server per article site: result links are deduplicated per site
+    article_servers = [serve(make_site_handler([])) for _ in range(ARTICLE_SITES)]
+    ports = [s.server_address[1] for s in article_servers]
+    search_server = serve(make_site_handler(ports))
+    ollama_server = serve(OllamaStubHandler)
+
+    # Both are read when the research modules are imported
+    os.environ["RESEARCH_SEARCH_URL"] = f"http://127.0.0.1:{search_server.server_address[1]}/search?q={{query}}"
+    os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{ollama_server.server_address[1]}"
+    import zyron.agents.researcher as researcher
+    import zyron.features.knowledge_base as knowledge_base
+    researcher.is_firefox_running = lambda: False  # Headless path only
+    kb_dir = tempfile.mkdtemp(prefix="zyron-bench-")
+
+    print(f"🧪 Offline research benchmark (search :{search_server.server_address[1]}, "
+          f"sites {ports}, ollama :{ollama_server.server_address[1]})")
+    rows = []
+    for scenario in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+        for budget in [int(b) for b in args.budgets.split(",") if b.strip()]:
+            researcher.TOKEN_BUDGET = budget
+            samples = []
+            for _ in range(args.runs):
+                with counters_lock:
+                    counters.update(bytes=0, requests=0, prompt_chars=0)
+                researcher.synthesis_timings.clear()
+                # Empty knowledge base per run, so every run goes to the network
+                knowledge_base.DB_FILE = os.path.join(kb_dir, f"kb-{len(rows)}-{len(samples)}.db")
+                knowledge_base._ready = None
+                started = time.perf_counter()
+                answer, method = researcher.run_research(f"{scenario} who is the ceo of openai")
+                elapsed = (time.perf_counter() - started) * 1000
+                timing = researcher.synthesis_timings[-1] if researcher.synthesis_timings else {}
+                samples.append({
+                    "ms": elapsed, "ttft_ms": timing.get("ttft_ms"), "ok": bool(method),
+                    "bytes": counters["bytes"], "requests": counters["requests"], "prompt_chars": counters["prompt_chars"],
+                })
+            rows.append((scenario, budget, samples))
+
+    print()
+    print(f"  {'scenario':<9} {'budget':>6} {'ok':>4} {'e2e p50':>9} {'ttft p50':>9} {'fetched':>10} {'requests':>8} {'prompt':>9}")
+    for scenario, budget, samples in rows:
+        ttfts = [s["ttft_ms"] for s in samples if s["ttft_ms"] is not None]
+        print(f"  {scenario:<9} {budget or 'off':>6} {sum(s['ok'] for s in samples):>2}/{len(samples):<1} "
+              f"{statistics.median(s['ms'] for s in samples):7.0f}ms "
+              f"{(str(round(statistics.median(ttfts))) + 'ms') if ttfts else '-':>9} "
+              f"{statistics.median(s['bytes'] for s in samples) / 1024:8.0f}KB "
+              f"{statistics.median(s['requests'] for s in samples):8.0f} "
+              f"{statistics.median(s['prompt_chars'] for s in samples):9.0f}")
+
+    for server in article_servers + [search_server, ollama_server]:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
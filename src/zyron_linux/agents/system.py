@@ -12,7 +12,7 @@ import requests
 import json
 import zyron_linux.features.activity as activity_monitor
 import zyron_linux.features.clipboard as clipboard_monitor
-# import zyron_linux.features.files.finder as file_finder  # Uses the new smart finder we just created
+import zyron_linux.features.files.finder as file_finder  # Uses the new smart finder we just created
 
 PROCESS_NAMES = {
     # Browsers
@@ -9,7 +9,7 @@ from zyron_linux.agents.system import execute_command, capture_webcam
 import zyron_linux.core.memory as memory
 import zyron_linux.features.activity as activity_monitor  # Needed to format the output text
 import zyron_linux.features.clipboard as clipboard_monitor  # For clipboard history
-# import zyron_linux.features.files.tracker as file_tracker  # <--- NEW IMPORT: THIS STARTS THE FILE TRACKER AUTOMATICALLY
+import zyron_linux.features.files.tracker as file_tracker  # <--- NEW IMPORT: THIS STARTS THE FILE TRACKER AUTOMATICALLY
 import zyron_linux.features.focus_mode as focus_mode # <--- Feature #11: Focus Mode
 
 load_dotenv()
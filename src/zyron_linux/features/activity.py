@@ -7,6 +7,7 @@ import shutil
 from collections import defaultdict
 from pathlib import Path
 import time
+import zyron_linux.features.window_watcher as window_watcher
 
 try:
     import win32gui
@@ -598,6 +599,7 @@ def get_current_activities():
     activities = {
         'browsers': {},
         'desktop_apps': [],
+        'windows': [],
         'system_info': {}
     }
     
@@ -610,6 +612,11 @@ def get_current_activities():
     print("   → Checking desktop applications...")
     activities['desktop_apps'] = get_desktop_applications()
     
+    # 2b. Open windows (X11 window list cached by the watcher, no scan).
+    # A watcher started by this call has not listed the windows yet: wait for its first pass.
+    if window_watcher.start() and window_watcher.wait_until_ready():
+        activities['windows'] = window_watcher.get_windows()
+    
     # 3. System Info
     try:
         cpu_percent = psutil.cpu_percent(interval=0.5)
@@ -628,6 +635,20 @@ def get_current_activities():
     return activities
 
 
+def format_windows_lines(windows, limit=20):
+    """Lines listing open windows, the foreground one marked"""
+    if not windows:
+        return []
+    lines = ["🪟 **OPEN WINDOWS:**"]
+    for window in windows[:limit]:
+        title = escape_markdown(window['title'][:60] or '(untitled)')
+        app = escape_markdown(window['app'] or 'unknown')
+        marker = "▶️" if window['active'] else "•"
+        lines.append(f"   {marker} {title} ({app})")
+    lines.append("")
+    return lines
+
+
 def format_activities_text(activities, max_message_length=4000):
     """
     Format activities into a readable text format for Telegram
@@ -678,6 +699,9 @@ def format_activities_text(activities, max_message_length=4000):
         lines.append("🖥️ **DESKTOP APPLICATIONS:**")
         lines.append("   (No major applications detected)\n")
     
+    # Open windows (X11)
+    lines.extend(format_windows_lines(activities.get('windows')))
+    
     # System Stats
     if activities['system_info']:
         info = activities['system_info']
@@ -761,6 +785,8 @@ def split_long_message(activities, max_length=4000):
             final_lines.append(f"   • {safe_name}")
         final_lines.append("")
     
+    final_lines.extend(format_windows_lines(activities.get('windows')))
+    
     if activities['system_info']:
         info = activities['system_info']
         final_lines.append("⚙️ **SYSTEM STATUS:**")
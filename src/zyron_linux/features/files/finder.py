@@ -4,27 +4,23 @@ Intelligent search engine that understands natural language time/type queries
 Part 2 of Context-Aware File Finder
 """
 
-import json
-import os
 from datetime import datetime, timedelta
 import re
 from typing import List, Dict, Tuple, Optional
 from difflib import SequenceMatcher
 
-# File to load activity logs from
-FILE_ACTIVITY_LOG = "file_activity_log.json"
+import zyron_linux.features.files.journal as journal
 
 
-def load_file_activity_log():
-    """Load file activity log from JSON"""
-    if os.path.exists(FILE_ACTIVITY_LOG):
-        try:
-            with open(FILE_ACTIVITY_LOG, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading file activity log: {e}")
-            return []
-    return []
+def load_file_activity_log(time_range: Optional[Tuple[datetime, datetime]] = None) -> List[Dict]:
+    """Load file activity entries from the journal (only the days in time_range, if given)"""
+    try:
+        if time_range:
+            return journal.read(*time_range)
+        return journal.read()
+    except Exception as e:
+        print(f"Error loading file activity log: {e}")
+        return []
 
 
 def parse_time_query(query_text: str) -> Optional[Tuple[datetime, datetime]]:
@@ -422,17 +418,17 @@ def find_files(time_query: Optional[str] = None, file_type: Optional[str] = None
     Returns:
         List of matching file entries with confidence scores
     """
-    # Load activity log
-    activity_log = load_file_activity_log()
-    
-    if not activity_log:
-        return []
-    
     # Parse time range
     time_range = None
     if time_query:
         time_range = parse_time_query(time_query)
     
+    # Load activity log (entries outside a requested time range would score 0 anyway)
+    activity_log = load_file_activity_log(time_range)
+    
+    if not activity_log:
+        return []
+    
     # Normalize file type
     file_types = None
     if file_type:
@@ -484,8 +480,8 @@ def find_files_from_query(natural_query: str, limit: int = 5) -> List[Dict]:
     elif "code" in q_lower or "vscode" in q_lower: target_app = "code"
     elif "notepad" in q_lower: target_app = "notepad"
     
-    # Load logs
-    activity_log = load_file_activity_log()
+    # Load logs (only the days in the requested time range)
+    activity_log = load_file_activity_log(time_range)
     if not activity_log:
         return []
         
@@ -1,59 +1,78 @@
 """
-File Tracker Module for Zyron Desktop Assistant
-Tracks all file opens/access in real-time and logs activity
+File Tracker Module for Zyron Desktop Assistant (Linux)
+Tracks all file opens/access in real-time and logs activity.
+The foreground window comes from the X11 _NET_ACTIVE_WINDOW property:
+pushed by the window watcher's PropertyNotify events when python-xlib is
+installed (checks then run on focus/title changes), polled with the xprop tool
+otherwise. Its files are resolved from /proc/<pid>/fd and the command line. Records go to the same
+daily journal as the Windows tracker, so the finder works unchanged.
 """
 
 import os
-import json
+import re
+import shutil
+import subprocess
 import time
 import threading
-import sqlite3
-import shutil
-import urllib.parse
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from collections import defaultdict
-import win32gui
-import win32process
 import psutil
+import zyron_linux.features.files.journal as journal
+import zyron_linux.features.window_watcher as window_watcher
+
+try:
+    from Xlib import X, display as xdisplay
+    from Xlib.error import XError
+    HAS_XLIB = True
+except ImportError:
+    HAS_XLIB = False
 
 # Configuration
-FILE_ACTIVITY_LOG = "file_activity_log.json"
 MAX_LOG_DAYS = 30  # Keep last 30 days of activity
 CHECK_INTERVAL = 2  # Check every 2 seconds
+MAX_CHECK_INTERVAL = 10  # Slowest check rate when ticks keep going over budget
+TICK_CPU_BUDGET = 0.02  # CPU seconds the tracker thread may spend on one check (other threads not counted)
+MAX_FDS_PER_TICK = 512  # Open file descriptors inspected per check
+DURATION_LOG_EVERY = 30  # Seconds between duration updates of an open file
+EVENT_DEBOUNCE = 0.25  # Seconds to let a burst of focus/title events settle before checking
+RESOLVE_CACHE_SIZE = 64  # Windows whose resolved file is remembered
+NO_FILE_RECHECK = 10  # Seconds before a window that showed no file is resolved again
+STATS_REPORT_INTERVAL = 600  # Seconds between cache statistics lines in the console
 
 # Global state
-file_activity_log = []
+last_record = None  # Newest journal record (its duration is updated while the file stays open)
 tracking_active = False
 tracker_thread = None
 currently_open_files = {}  # Track files currently being accessed
+resolve_cache = OrderedDict()  # (pid, create_time, window title) -> (file_path, app_name, resolved_at)
+resolve_stats = {'hits': 0, 'misses': 0, 'hit_seconds': 0.0, 'miss_seconds': 0.0}
+_x_display = None
 
-# List of apps that are browsers (need special handling for local files)
-BROWSER_APPS = {
-    'chrome.exe': 'Google Chrome',
-    'msedge.exe': 'Microsoft Edge',
-    'brave.exe': 'Brave Browser',
-    'firefox.exe': 'Mozilla Firefox',
-    'opera.exe': 'Opera'
-}
-
-# System/temp paths to ignore
+# System/cache paths to ignore
 IGNORE_PATHS = [
-    "\\AppData\\Local\\Temp",
-    "\\Windows\\",
-    "\\System32\\",
-    "\\Program Files\\",
-    "\\ProgramData\\",
-    "\\$Recycle.Bin",
-    "\\.git",
-    "\\node_modules",
-    "\\venv\\",
-    "\\__pycache__",
+    "/proc/",
+    "/sys/",
+    "/dev/",
+    "/run/",
+    "/tmp/",
+    "/usr/",
+    "/opt/",
+    "/snap/",
+    "/var/",
+    "/.cache/",
+    "/.config/",
+    "/.local/share/",
+    "/.mozilla/",
+    "/.git",
+    "/node_modules",
+    "/venv/",
+    "/__pycache__",
 ]
 
 # File extensions we care about
 TRACKED_EXTENSIONS = [
     # Documents
-    '.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt',
+    '.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt', '.md',
     # Spreadsheets
     '.xlsx', '.xls', '.csv', '.ods',
     # Presentations
@@ -69,33 +88,27 @@ TRACKED_EXTENSIONS = [
     # Archives
     '.zip', '.rar', '.7z', '.tar', '.gz',
     # Others
-    '.exe', '.msi', '.apk', '.dmg'
+    '.deb', '.rpm', '.appimage', '.apk'
 ]
 
 
 def load_activity_log():
-    """Load existing activity log from file"""
-    global file_activity_log
-    
-    if os.path.exists(FILE_ACTIVITY_LOG):
-        try:
-            with open(FILE_ACTIVITY_LOG, 'r', encoding='utf-8') as f:
-                file_activity_log = json.load(f)
-                print(f"📁 Loaded {len(file_activity_log)} file activity records")
-        except Exception as e:
-            print(f"Error loading file activity log: {e}")
-            file_activity_log = []
-    else:
-        file_activity_log = []
-        # Create empty file immediately to ensure it exists
-        save_activity_log()
+    """Load the newest record of the activity journal (importing the old JSON log once)"""
+    global last_record
+
+    try:
+        journal.migrate_legacy()
+        last_record = journal.last_record()
+        print(f"📁 File activity journal: {len(journal.list_days())} day(s) of records")
+    except Exception as e:
+        print(f"Error loading file activity log: {e}")
+        last_record = None
 
 
 def save_activity_log():
-    """Save activity log to file"""
+    """Fold pending duration updates into the journal segments"""
     try:
-        with open(FILE_ACTIVITY_LOG, 'w', encoding='utf-8') as f:
-            json.dump(file_activity_log, f, indent=2, ensure_ascii=False)
+        journal.compact()
     except Exception as e:
         print(f"Error saving file activity log: {e}")
 
@@ -104,306 +117,345 @@ def should_ignore_file(file_path):
     """Check if file should be ignored based on path or extension"""
     if not file_path or not isinstance(file_path, str):
         return True
-    
-    # Ignore system/temp paths
+
+    # Ignore system/cache paths
     for ignore_path in IGNORE_PATHS:
-        if ignore_path.lower() in file_path.lower():
+        if ignore_path in file_path:
             return True
-    
+
     # Check if extension is tracked
     _, ext = os.path.splitext(file_path)
     if ext.lower() not in TRACKED_EXTENSIONS:
         return True
-    
+
     return False
 
 
-def get_browser_local_file(browser_process_name, window_title):
+def _xlib_active_window():
+    """(pid, title) of the focused window through python-xlib"""
+    global _x_display
+    if _x_display is None:
+        _x_display = xdisplay.Display()
+    d = _x_display
+    try:
+        root = d.screen().root
+        active = root.get_full_property(d.intern_atom('_NET_ACTIVE_WINDOW'), X.AnyPropertyType)
+        if not active or not active.value or not active.value[0]:
+            return None, None
+        window = d.create_resource_object('window', active.value[0])
+        pid = window.get_full_property(d.intern_atom('_NET_WM_PID'), X.AnyPropertyType)
+        name = window.get_full_property(d.intern_atom('_NET_WM_NAME'), d.intern_atom('UTF8_STRING'))
+        title = name.value if name else window.get_wm_name()
+        if isinstance(title, bytes):
+            title = title.decode('utf-8', 'replace')
+        return (int(pid.value[0]) if pid and pid.value else None), title or None
+    except XError:
+        return None, None  # Window closed between the two reads
+
+
+def _xprop_active_window():
+    """(pid, title) of the focused window through the xprop tool"""
+    out = subprocess.run(['xprop', '-root', '_NET_ACTIVE_WINDOW'], capture_output=True, text=True, timeout=1).stdout
+    match = re.search(r'window id # (0x[0-9a-f]+)', out)
+    if not match or int(match.group(1), 16) == 0:
+        return None, None
+    out = subprocess.run(['xprop', '-id', match.group(1), '_NET_WM_PID', '_NET_WM_NAME'],
+                         capture_output=True, text=True, timeout=1).stdout
+    pid = re.search(r'_NET_WM_PID\(CARDINAL\) = (\d+)', out)
+    title = re.search(r'_NET_WM_NAME\(UTF8_STRING\) = "(.*)"', out)
+    return (int(pid.group(1)) if pid else None), (title.group(1) if title else None)
+
+
+def get_active_window():
+    """(pid, title) of the foreground window, or (None, None) without an X11 display (e.g. pure Wayland)"""
+    if window_watcher.is_running():
+        foreground = window_watcher.get_foreground()  # Cached from X events, no round trip
+        return (foreground['pid'], foreground['title']) if foreground else (None, None)
+    if not os.environ.get('DISPLAY'):
+        return None, None
+    try:
+        if HAS_XLIB:
+            return _xlib_active_window()
+        if shutil.which('xprop'):
+            return _xprop_active_window()
+    except Exception as e:
+        print(f"[DEBUG] Error reading active window: {e}")
+    return None, None
+
+
+def _title_mentions(path, window_title):
+    """Does the window title show this file's name (with or without extension)?"""
+    filename = os.path.basename(path).lower()
+    name_no_ext = os.path.splitext(filename)[0]
+    title = window_title.lower()
+    return bool(name_no_ext) and (name_no_ext in title or filename in title)
+
+
+def get_process_files(pid, window_title, deadline):
     """
-    If the active window is a browser, this checks the history
-    to see if the user is looking at a local file (file:///...)
+    Candidate user files of a process, best first: command line arguments, then
+    open file descriptors whose name appears in the window title.
+    Stops reading descriptors once the CPU deadline (time.thread_time) has passed.
     """
+    candidates = []
+
+    # --- METHOD 1: Command Line Arguments (editors and viewers opened with a file) ---
     try:
-        history_db = None
-        user_data_dir = os.environ.get('LOCALAPPDATA', '')
-
-        # Define paths to History DB based on browser
-        if browser_process_name == 'chrome.exe':
-            history_db = os.path.join(user_data_dir, 'Google', 'Chrome', 'User Data', 'Default', 'History')
-        elif browser_process_name == 'msedge.exe':
-            history_db = os.path.join(user_data_dir, 'Microsoft', 'Edge', 'User Data', 'Default', 'History')
-        elif browser_process_name == 'brave.exe':
-            history_db = os.path.join(user_data_dir, 'BraveSoftware', 'Brave-Browser', 'User Data', 'Default', 'History')
-        
-        if not history_db or not os.path.exists(history_db):
-            return None
-
-        # Copy DB to temp to avoid locking issues
-        temp_db = os.path.join(os.environ.get('TEMP', ''), 'tracker_history_temp.db')
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            cmdline = [a.decode('utf-8', 'replace') for a in f.read().split(b'\0') if a]
+        cwd = os.readlink(f'/proc/{pid}/cwd')
+        for arg in cmdline[1:]:
+            if arg.startswith('-'):
+                continue
+            if arg.startswith('file://'):
+                arg = arg[len('file://'):]
+            path = os.path.normpath(os.path.join(cwd, os.path.expanduser(arg)))
+            if os.path.isfile(path) and (_title_mentions(path, window_title) or len(cmdline) == 2):
+                candidates.append(path)
+    except OSError:
+        pass
+
+    # --- METHOD 2: Open file descriptors (/proc/<pid>/fd) ---
+    try:
+        fds = os.listdir(f'/proc/{pid}/fd')
+    except OSError:
+        fds = []  # Another user's process, or gone
+    for fd in fds[:MAX_FDS_PER_TICK]:
+        if time.thread_time() > deadline:
+            break
         try:
-            shutil.copy2(history_db, temp_db)
-            
-            conn = sqlite3.connect(temp_db)
-            cursor = conn.cursor()
-            
-            # IMPROVEMENT: Get last 20 items, not just 1.
-            # This helps if the user opened 3 tabs and we want to find the one matching the window title.
-            cursor.execute("SELECT url, title FROM urls ORDER BY last_visit_time DESC LIMIT 20")
-            rows = cursor.fetchall()
-            conn.close()
-            
-            for row in rows:
-                url, db_title = row
-                if not url: continue
-
-                # CHECK: Is it a local file?
-                if url.startswith('file:///'):
-                    # Convert file:///C:/Users/Name%20Here/Doc.pdf -> C:\Users\Name Here\Doc.pdf
-                    # 1. Unquote removes %20 and other URL encoding
-                    decoded_url = urllib.parse.unquote(url)
-                    # 2. Strip prefix and fix slashes
-                    clean_path = decoded_url.replace('file:///', '').replace('/', '\\')
-                    
-                    # 3. Fuzzy Match: Check if the filename appears in the Window Title
-                    # Window Title: "Project Proposal.pdf - Google Chrome"
-                    # File Name: "Project Proposal.pdf"
-                    filename = os.path.basename(clean_path)
-                    
-                    if filename and (filename.lower() in window_title.lower()):
-                        # Verify file actually exists
-                        if os.path.exists(clean_path):
-                            return clean_path
-        except Exception as e:
-            # print(f"DB Error: {e}")
-            pass
-        finally:
-            if os.path.exists(temp_db):
-                try: os.remove(temp_db)
-                except: pass
+            path = os.readlink(f'/proc/{pid}/fd/{fd}')
+        except OSError:
+            continue
+        if not path.startswith('/') or path.endswith(' (deleted)'):
+            continue  # Sockets, pipes, anon inodes
+        if not should_ignore_file(path) and _title_mentions(path, window_title):
+            candidates.append(path)
 
-    except Exception as e:
-        print(f"Error checking browser file: {e}")
-    
-    return None
+    # --- METHOD 3: Window Title Parsing (Fallback, e.g. "~/notes/todo.md - Mousepad") ---
+    for part in window_title.split(' '):
+        if part.startswith(('/', '~/')):
+            path = os.path.expanduser(part)
+            if os.path.isfile(path):
+                candidates.append(path)
+
+    return [path for path in candidates if not should_ignore_file(path)]
 
 
 def get_active_window_file():
-    """Get file path from currently active window using multiple detection methods"""
+    """
+    Get file path from currently active window.
+    Results are cached per (pid, process start time, window title), so /proc is
+    only read again when the foreground window or its title changes.
+    """
+    deadline = time.thread_time() + TICK_CPU_BUDGET
     try:
-        # Get active window handle
-        hwnd = win32gui.GetForegroundWindow()
-        if not hwnd:
-            return None, None
-        
-        # Get window title
-        window_title = win32gui.GetWindowText(hwnd)
-        if not window_title:
+        pid, window_title = get_active_window()
+        if not pid or not window_title:
             return None, None
-            
-        # Get process ID
-        _, pid = win32process.GetWindowThreadProcessId(hwnd)
-        
-        # Get process info
+
+        started = time.perf_counter()
         try:
             process = psutil.Process(pid)
-            app_name = process.name().lower()
-            potential_paths = []
-
-            # DEBUG: Un-comment this line if you want to see every window check in console
-            # print(f"[DEBUG] Checking: '{window_title}' ({app_name})")
+            # create_time tells a reused PID apart from the process that had it before
+            key = (pid, process.create_time(), window_title)
 
-            # --- METHOD 0: Browser Detection (ENHANCED) ---
-            # If app is a browser, check if it's viewing a local file via History
-            if app_name in BROWSER_APPS:
-                browser_file_path = get_browser_local_file(app_name, window_title)
-                if browser_file_path:
-                    # Return immediately if we found a browser file
-                    return browser_file_path, BROWSER_APPS[app_name]
+            cached = resolve_cache.get(key)
+            if cached and (cached[0] or time.time() - cached[2] < NO_FILE_RECHECK):
+                resolve_cache.move_to_end(key)
+                resolve_stats['hits'] += 1
+                resolve_stats['hit_seconds'] += time.perf_counter() - started
+                return cached[0], cached[1]
 
-            # --- METHOD 1: Command Line Arguments (Most Reliable for Notepad, etc.) ---
-            try:
-                cmdline = process.cmdline()
-                if cmdline:
-                    # Skip the first argument (executable itself)
-                    for arg in cmdline[1:]:
-                        clean_arg = arg.strip('"').strip("'")
-                        if os.path.exists(clean_arg) and os.path.isfile(clean_arg):
-                             # FIX: Get filename without extension to match Notepad titles
-                             filename = os.path.basename(clean_arg)      # e.g., "hahahaha.txt"
-                             name_no_ext = os.path.splitext(filename)[0] # e.g., "hahahaha"
-                             
-                             # Check if either full name OR name without extension is in title
-                             if (name_no_ext.lower() in window_title.lower()) or (filename.lower() in window_title.lower()) or len(cmdline) == 2:
-                                 potential_paths.append(clean_arg)
-            except (psutil.AccessDenied, IndexError, Exception):
-                pass
-
-            # --- METHOD 2: Open Files Handle (Reliable if Admin, flaky otherwise) ---
-            try:
-                open_files = process.open_files()
-                for f in open_files:
-                    if not should_ignore_file(f.path):
-                        filename = os.path.basename(f.path)
-                        name_no_ext = os.path.splitext(filename)[0]
-                        
-                        # FIX: Check if name without extension is in title
-                        if name_no_ext.lower() in window_title.lower():
-                            potential_paths.append(f.path)
-            except (psutil.AccessDenied, psutil.NoSuchProcess):
-                pass
-
-            # --- METHOD 3: Window Title Parsing (Fallback) ---
-            if ':\\' in window_title:
-                parts = window_title.split(' ')
-                for part in parts:
-                    if ':\\' in part and os.path.exists(part):
-                         potential_paths.append(part)
-
-            # --- FINAL SELECTION ---
-            for path in potential_paths:
-                if not should_ignore_file(path):
-                    # print(f"[DEBUG] MATCH FOUND: {path}")  # Debug print
-                    return path, app_name
-                
+            app_name = process.name().lower()
         except (psutil.NoSuchProcess, psutil.AccessDenied):
-            pass
-    
+            return None, None
+
+        files = get_process_files(pid, window_title, deadline)
+        file_path = files[0] if files else None
+        resolve_cache[key] = (file_path, app_name if file_path else None, time.time())
+        resolve_cache.move_to_end(key)
+        while len(resolve_cache) > RESOLVE_CACHE_SIZE:
+            resolve_cache.popitem(last=False)
+        resolve_stats['misses'] += 1
+        resolve_stats['miss_seconds'] += time.perf_counter() - started
+        if file_path:
+            return file_path, app_name
+
     except Exception as e:
         print(f"[DEBUG] Error in detector: {e}")
-    
+
     return None, None
 
 
+def get_resolution_stats():
+    """Cache hit rate and average cost per check of the active window resolution"""
+    hits, misses = resolve_stats['hits'], resolve_stats['misses']
+    checks = hits + misses
+    total = resolve_stats['hit_seconds'] + resolve_stats['miss_seconds']
+    return {
+        'checks': checks,
+        'hit_rate': hits / checks if checks else 0.0,
+        'avg_check_ms': total / checks * 1000 if checks else 0.0,
+        'avg_hit_ms': resolve_stats['hit_seconds'] / hits * 1000 if hits else 0.0,
+        'avg_miss_ms': resolve_stats['miss_seconds'] / misses * 1000 if misses else 0.0,
+        'cached_windows': len(resolve_cache),
+    }
+
+
+def report_resolution_stats():
+    stats = get_resolution_stats()
+    if stats['checks']:
+        print(f"📊 File tracker: {stats['hit_rate']:.0%} of {stats['checks']} checks cached, "
+              f"{stats['avg_check_ms']:.1f} ms/check (hit {stats['avg_hit_ms']:.2f} ms, miss {stats['avg_miss_ms']:.1f} ms)")
+
+
 def log_file_activity(file_path, app_name, duration=None):
-    """Log file access activity"""
-    global file_activity_log
-    
+    """Log file access activity (one appended journal line per call)"""
+    global last_record
+
     if should_ignore_file(file_path):
         return
-    
-    # Create log entry
-    entry = {
-        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'file_path': file_path,
-        'file_name': os.path.basename(file_path),
-        'file_type': os.path.splitext(file_path)[1].lower().replace('.', ''),
-        'app_used': app_name,
-        'duration_seconds': duration if duration else 0
-    }
-    
+
+    now = int(time.time())
+
     # Check if this is a duplicate of the most recent entry
-    if file_activity_log:
-        last_entry = file_activity_log[-1]
+    if last_record and last_record['p'] == file_path and last_record['a'] == app_name:
+        time_diff = now - last_record['t']
+
         # If same file accessed within 5 minutes, update duration instead of adding new entry
-        if (last_entry['file_path'] == file_path and 
-            last_entry['app_used'] == app_name):
-            
-            last_time = datetime.strptime(last_entry['timestamp'], '%Y-%m-%d %H:%M:%S')
-            current_time = datetime.strptime(entry['timestamp'], '%Y-%m-%d %H:%M:%S')
-            time_diff = (current_time - last_time).total_seconds()
-            
-            if time_diff < 300:  # 5 minutes
-                # Update existing entry's duration
-                last_entry['duration_seconds'] = int(time_diff)
-                save_activity_log()
-                return
-    
+        if 0 <= time_diff < 300:  # 5 minutes
+            try:
+                journal.update_duration(last_record, int(time_diff))
+            except Exception as e:
+                print(f"Error saving file activity log: {e}")
+            return
+
     # Add new entry
-    file_activity_log.append(entry)
-    
-    # FIXED: Save immediately after adding new entry
-    save_activity_log()
-    
-    print(f"📁 Tracked: {entry['file_name']} ({app_name})")
+    try:
+        last_record = journal.append(file_path, app_name, now, duration if duration else 0)
+    except Exception as e:
+        print(f"Error saving file activity log: {e}")
+        return
+
+    print(f"📁 Tracked: {os.path.basename(file_path)} ({app_name})")
 
 
 def track_files():
     """Background thread that tracks file activity"""
     global tracking_active, currently_open_files
-    
+
     print("👁️ File tracking started...")
-    
-    # Ensure log file exists at start
-    if not os.path.exists(FILE_ACTIVITY_LOG):
-        print("[DEBUG] Creating initial JSON log file...")
-        save_activity_log()
-    
+    interval = CHECK_INTERVAL
+    last_report = time.time()
+    watch_version = window_watcher.get_version()
+
     while tracking_active:
         try:
+            cpu_start = time.thread_time()
+
             # Get currently active file
             file_path, app_name = get_active_window_file()
-            
+
             current_time = time.time()
-            
+
             if file_path and app_name:
                 # Track when file was opened
                 file_key = f"{file_path}|{app_name}"
-                
+
                 if file_key not in currently_open_files:
                     # New file opened
                     currently_open_files[file_key] = {
                         'path': file_path,
                         'app': app_name,
-                        'start_time': current_time
+                        'start_time': current_time,
+                        'logged_at': current_time
                     }
                     log_file_activity(file_path, app_name)
                 else:
-                    # File still open, calculate duration
-                    start_t = currently_open_files[file_key]['start_time']
-                    duration = int(current_time - start_t)
-                    
-                    if duration > 0 and duration % 30 == 0:  # Log every 30 seconds
-                        log_file_activity(file_path, app_name, duration)
-            
+                    # File still open, update its duration every DURATION_LOG_EVERY seconds
+                    info = currently_open_files[file_key]
+                    if current_time - info['logged_at'] >= DURATION_LOG_EVERY:
+                        info['logged_at'] = current_time
+                        log_file_activity(file_path, app_name, int(current_time - info['start_time']))
+
             # Clean up closed files
             closed_files = []
             for file_key, info in currently_open_files.items():
                 # If the current active file is NOT this file, consider it "closed"
                 if file_path != info['path']:
                     closed_files.append(file_key)
-            
+
             for file_key in closed_files:
                 del currently_open_files[file_key]
-            
-            # Check every N seconds
-            time.sleep(CHECK_INTERVAL)
-            
+
+            if current_time - last_report >= STATS_REPORT_INTERVAL:
+                report_resolution_stats()
+                last_report = current_time
+
+            # Over the CPU budget (huge fd tables, slow /proc): check less often until it recovers
+            if time.thread_time() - cpu_start > TICK_CPU_BUDGET:
+                interval = min(interval * 2, MAX_CHECK_INTERVAL)
+            else:
+                interval = CHECK_INTERVAL
+
+            if window_watcher.is_running():
+                if interval > CHECK_INTERVAL:
+                    time.sleep(interval)  # Over budget: back off even while events keep coming
+                # Wake on the next focus or title change; the timeout keeps durations and
+                # "no file yet" windows (NO_FILE_RECHECK) moving
+                checked = window_watcher.get_foreground()
+                watch_version = window_watcher.wait_for_change(watch_version, NO_FILE_RECHECK)
+                current = window_watcher.get_foreground()
+                if checked and current and current['window'] == checked['window']:
+                    # Title-only change of the same window (terminal prompts, progress counters,
+                    # clocks): resolve it at most once per CHECK_INTERVAL
+                    time.sleep(max(EVENT_DEBOUNCE, CHECK_INTERVAL - (time.time() - current_time)))
+                else:
+                    time.sleep(EVENT_DEBOUNCE)
+            else:
+                time.sleep(interval)
+
         except Exception as e:
             # Silently handle errors
             print(f"File tracking error: {e}")
             time.sleep(CHECK_INTERVAL)
-    
+
     print("👁️ File tracking stopped.")
 
 
 def start_tracking():
     """Start the file tracking thread"""
     global tracking_active, tracker_thread
-    
+
     if tracking_active:
         print("⚠️ File tracking already active")
         return
-    
+
+    if not window_watcher.start() and not shutil.which('xprop'):
+        print("⚠️ File tracking needs python-xlib or xprop to see the active window")
+
     # Load existing log
     load_activity_log()
-    
+
     # Cleanup old logs
     cleanup_old_logs(MAX_LOG_DAYS)
-    
+
     # Start tracking
     tracking_active = True
     tracker_thread = threading.Thread(target=track_files, daemon=True)
     tracker_thread.start()
-    
+
     print("✅ File tracking activated")
 
 
 def stop_tracking():
     """Stop the file tracking thread"""
     global tracking_active
-    
+
     tracking_active = False
     save_activity_log()
+    report_resolution_stats()
     print("🛑 File tracking deactivated")
 
 
@@ -411,74 +463,51 @@ def get_recent_files(hours=24, file_type=None):
     """Get files accessed in the last N hours, optionally filtered by type"""
     cutoff_time = datetime.now() - timedelta(hours=hours)
     recent_files = []
-    
-    for entry in reversed(file_activity_log):  # Start from most recent
-        entry_time = datetime.strptime(entry['timestamp'], '%Y-%m-%d %H:%M:%S')
-        
-        if entry_time < cutoff_time:
-            break  # Stop if we've gone past the time range
-        
+
+    for entry in reversed(journal.read(start=cutoff_time)):  # Start from most recent
         # Filter by file type if specified
         if file_type and entry['file_type'] != file_type.lower():
             continue
-        
+
         recent_files.append(entry)
-    
+
     return recent_files
 
 
 def get_files_by_timerange(start_time, end_time):
     """Get files accessed within a specific time range"""
-    files_in_range = []
-    
-    for entry in file_activity_log:
-        entry_time = datetime.strptime(entry['timestamp'], '%Y-%m-%d %H:%M:%S')
-        
-        if start_time <= entry_time <= end_time:
-            files_in_range.append(entry)
-    
-    return files_in_range
+    # Only the day segments overlapping the range are read
+    return journal.read(start_time, end_time)
 
 
 def cleanup_old_logs(days=30):
-    """Remove log entries older than N days"""
-    global file_activity_log
-    
-    cutoff_date = datetime.now() - timedelta(days=days)
-    original_count = len(file_activity_log)
-    
-    file_activity_log = [
-        entry for entry in file_activity_log
-        if datetime.strptime(entry['timestamp'], '%Y-%m-%d %H:%M:%S') > cutoff_date
-    ]
-    
-    removed_count = original_count - len(file_activity_log)
-    
+    """Remove the day segments older than N days"""
+    removed_count = journal.cleanup(days)
+
     if removed_count > 0:
-        print(f"🗑️ Cleaned up {removed_count} old file activity records")
-        save_activity_log()
+        print(f"🗑️ Cleaned up {removed_count} day(s) of old file activity records")
 
 
 def format_file_activity_text(entries, limit=20):
     """Format file activity as readable text for display"""
     if not entries:
         return "📁 **FILE ACTIVITY**\n\n❌ No file activity found."
-    
+
     entries = entries[:limit]  # Limit results
     lines = [f"📁 **FILE ACTIVITY** (Last {len(entries)} files)\n"]
-    
+
     for i, entry in enumerate(entries, 1):
         file_name = entry['file_name']
         timestamp = entry['timestamp']
         app_used = entry['app_used']
         duration = entry.get('duration_seconds', 0)
-        
+
         duration_str = f"{duration}s" if duration > 0 else ""
-        
+
         lines.append(f"{i}. **{file_name}**")
         lines.append(f"   📅 {timestamp} | 📱 {app_used} {duration_str}")
         lines.append(f"   📂 {entry['file_path']}\n")
-    
+
     return "\n".join(lines)
 
 
@@ -490,10 +519,10 @@ if __name__ == "__main__":
     # Test the module
     print("Testing file tracker...")
     print("Open some files to test tracking...")
-    
+
     # Keep main thread alive for testing
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
-        stop_tracking()
\ No newline at end of file
+        stop_tracking()
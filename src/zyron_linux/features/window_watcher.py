@@ -0,0 +1,245 @@
+"""
+X11 Window Watcher for Zyron Desktop Assistant (Linux)
+Follows the foreground window through PropertyNotify events instead of polling:
+the root window's _NET_ACTIVE_WINDOW gives focus changes, _NET_CLIENT_LIST the
+open windows, and each window's _NET_WM_NAME its title changes.
+Listeners get (previous, current) on every foreground change, and the window
+list stays cached for the activity listing.
+Needs python-xlib and an X11 display; it runs under Xvfb for testing:
+    xvfb-run python -m zyron_linux.features.window_watcher
+"""
+
+import os
+import select
+import threading
+import time
+import psutil
+
+try:
+    from Xlib import X, display as xdisplay
+    from Xlib.error import XError
+    HAS_XLIB = True
+except ImportError:
+    HAS_XLIB = False
+
+WAKE_SECONDS = 1.0  # How often the event loop checks for stop() while idle
+
+_lock = threading.Lock()
+_changed = threading.Condition(_lock)
+_display = None
+_atoms = {}
+_foreground = None  # {"window", "pid", "app", "title", "since"}
+_windows = {}       # window id -> {"window", "pid", "app", "title"}
+_version = 0        # Bumped on every foreground change (focus or title)
+_listeners = []
+_watcher = None
+_stop = threading.Event()
+_ready = threading.Event()  # Set once the first window list and foreground are read
+
+
+def _atom(name):
+    if name not in _atoms:
+        _atoms[name] = _display.intern_atom(name)
+    return _atoms[name]
+
+
+def _property(window, name, kind=None):
+    prop = window.get_full_property(_atom(name), kind if kind is not None else X.AnyPropertyType)
+    return prop.value if prop else None
+
+
+def _read_window(window_id):
+    """pid, app and title of a client window; None once it is gone."""
+    try:
+        window = _display.create_resource_object('window', window_id)
+        pid = _property(window, '_NET_WM_PID')
+        title = _property(window, '_NET_WM_NAME', _atom('UTF8_STRING'))
+        if title is None:
+            title = window.get_wm_name()
+        # Title changes of this window arrive as PropertyNotify from now on
+        window.change_attributes(event_mask=X.PropertyChangeMask)
+    except XError:
+        return None
+    if isinstance(title, bytes):
+        title = title.decode('utf-8', 'replace')
+    pid = int(pid[0]) if pid is not None and len(pid) else None
+    app = None
+    if pid:
+        try:
+            app = psutil.Process(pid).name().lower()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return {'window': window_id, 'pid': pid, 'app': app, 'title': title or ''}
+
+
+def _update_windows():
+    """Re-reads _NET_CLIENT_LIST; only windows not seen before are queried."""
+    ids = _property(_display.screen().root, '_NET_CLIENT_LIST')
+    ids = [int(w) for w in ids] if ids is not None else []
+    known = dict(_windows)
+    current = {}
+    for window_id in ids:
+        info = known.get(window_id) or _read_window(window_id)
+        if info:
+            current[window_id] = info
+    with _lock:
+        _windows.clear()
+        _windows.update(current)
+
+
+def _set_foreground(info):
+    """Publishes a new foreground window or title to waiters and listeners."""
+    global _foreground, _version
+    with _lock:
+        previous = _foreground
+        same_window = previous and info and previous['window'] == info['window']
+        if same_window and previous['title'] == info['title']:
+            return
+        current = dict(info, since=previous['since'] if same_window else time.time()) if info else None
+        _foreground = current
+        _version += 1
+        _changed.notify_all()
+    for callback in list(_listeners):
+        try:
+            callback(previous, current)
+        except Exception as e:
+            print(f"⚠️ Window watcher listener error: {e}")
+
+
+def _update_foreground():
+    active = _property(_display.screen().root, '_NET_ACTIVE_WINDOW')
+    window_id = int(active[0]) if active is not None and len(active) else 0
+    if not window_id:
+        _set_foreground(None)
+        return
+    info = _windows.get(window_id) or _read_window(window_id)
+    _set_foreground(info)
+
+
+def _handle_event(event):
+    if event.type != X.PropertyNotify:
+        return
+    root = _display.screen().root
+    if event.window.id == root.id:
+        if event.atom == _atom('_NET_ACTIVE_WINDOW'):
+            _update_foreground()
+        elif event.atom == _atom('_NET_CLIENT_LIST'):
+            _update_windows()
+    elif event.atom in (_atom('_NET_WM_NAME'), _atom('WM_NAME')):
+        info = _read_window(event.window.id)
+        if not info:
+            return
+        with _lock:
+            if event.window.id in _windows:
+                _windows[event.window.id] = info
+        if _foreground and _foreground['window'] == event.window.id:
+            _set_foreground(info)
+
+
+def _watch_loop():
+    global _display
+    try:
+        root = _display.screen().root
+        root.change_attributes(event_mask=X.PropertyChangeMask)
+        _update_windows()
+        _update_foreground()
+        _ready.set()
+        while not _stop.is_set():
+            if not _display.pending_events():
+                select.select([_display], [], [], WAKE_SECONDS)
+            while _display.pending_events() and not _stop.is_set():
+                _handle_event(_display.next_event())
+    except Exception as e:
+        print(f"⚠️ Window watcher stopped: {e}")
+    finally:
+        _ready.set()  # Never leave wait_until_ready() callers hanging on a failed start
+        try:
+            _display.close()
+        except Exception:
+            pass
+        _display = None
+        _atoms.clear()
+
+
+def start():
+    """Starts watching (idempotent). Returns False without python-xlib or an X11 display."""
+    global _watcher, _display
+    if is_running():
+        return True
+    if not HAS_XLIB or not os.environ.get('DISPLAY'):
+        return False
+    try:
+        _display = xdisplay.Display()
+    except Exception as e:
+        print(f"⚠️ Window watcher: cannot open display: {e}")
+        return False
+    _stop.clear()
+    _ready.clear()
+    _watcher = threading.Thread(target=_watch_loop, daemon=True, name="window-watcher")
+    _watcher.start()
+    print("🪟 Window watcher: following focus changes via X11 events")
+    return True
+
+
+def stop():
+    _stop.set()
+
+
+def is_running():
+    return _watcher is not None and _watcher.is_alive()
+
+
+def wait_until_ready(timeout=1.0):
+    """Blocks until the watcher has read the initial window list (or timeout). Returns whether it has."""
+    return _ready.wait(timeout)
+
+
+def get_foreground():
+    """The foreground window {"window", "pid", "app", "title", "since"}, or None."""
+    with _lock:
+        return dict(_foreground) if _foreground else None
+
+
+def get_windows():
+    """Open client windows (cached), foreground first: [{"window", "pid", "app", "title", "active"}]."""
+    with _lock:
+        active = _foreground['window'] if _foreground else None
+        windows = [dict(info, active=info['window'] == active) for info in _windows.values()]
+    windows.sort(key=lambda w: not w['active'])
+    return windows
+
+
+def wait_for_change(version, timeout):
+    """Blocks until the foreground differs from version (or timeout); returns the current version."""
+    with _lock:
+        if _version == version:
+            _changed.wait(timeout)
+        return _version
+
+
+def get_version():
+    return _version
+
+
+def add_listener(callback):
+    """callback(previous, current) runs on the watcher thread after each foreground change."""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def remove_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+if __name__ == "__main__":
+    # Manual test: prints focus changes (works under Xvfb with a window manager)
+    add_listener(lambda previous, current: print(f"   → {current}"))
+    if not start():
+        print("❌ Needs python-xlib and an X11 DISPLAY")
+    else:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            stop()
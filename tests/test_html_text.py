@@ -0,0 +1,46 @@
+from zyron.features import html_text
+from zyron.scripts.benchmark_research import article_html, serp_html
+
+FACT = "Sam Altman is the chief executive officer"
+
+
+def test_plain_article_keeps_body_and_drops_head():
+    text = html_text.extract_text(article_html(1, "OpenAI leadership"))
+    assert FACT in text
+    assert "Site 1" not in text          # <title>
+    assert "dataLayer" not in text       # <script> in <head>
+    assert "site menu" not in text       # <nav>
+
+
+def test_html5_page_without_closing_head():
+    text = html_text.extract_text(article_html(1, "OpenAI leadership", layout="nohead"))
+    assert FACT in text
+    assert "dataLayer" not in text
+
+
+def test_head_ends_at_body_tag():
+    html = "<html><head><title>T</title><meta charset='utf-8'><body><p>This paragraph is long enough to keep.</p></body>"
+    assert html_text.extract_text(html) == "This paragraph is long enough to keep."
+
+
+def test_page_wide_form_is_not_skipped():
+    text = html_text.extract_text(article_html(1, "OpenAI leadership", layout="form"))
+    assert FACT in text
+
+
+def test_short_answer_block_kept_on_search_pages():
+    html = serp_html("who is the ceo of openai", [8001], "normal")
+    assert "Sam Altman" not in html_text.extract_text(html).splitlines()
+    assert "Sam Altman" in html_text.extract_text(html, min_block_chars=0).splitlines()
+
+
+def test_short_price_answer_kept():
+    html = "<html><body><div><span>Bitcoin price</span></div><div>67,234.12 USD</div></body></html>"
+    assert "67,234.12 USD" in html_text.extract_text(html, min_block_chars=0)
+
+
+def test_stream_stops_early():
+    page = article_html(1, "OpenAI leadership").encode()
+    chunks = (page[i:i + 4096] for i in range(0, len(page), 4096))
+    text, bytes_read, stopped = html_text.extract_stream(chunks, max_chars=500)
+    assert stopped and len(text) <= 500 and bytes_read < len(page)
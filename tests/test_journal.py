@@ -0,0 +1,102 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+import zyron.features.files.journal as windows_journal
+import zyron_linux.features.files.journal as linux_journal
+
+
+def at(day, hour, minute=0):
+    return int(datetime(2024, 5, day, hour, minute).timestamp())
+
+
+@pytest.fixture(params=[windows_journal, linux_journal], ids=["zyron", "zyron_linux"])
+def journal(request, tmp_path, monkeypatch):
+    module = request.param
+    monkeypatch.setattr(module, "JOURNAL_DIR", str(tmp_path / "file_activity_log"))
+    monkeypatch.setattr(module, "LEGACY_LOG", str(tmp_path / "file_activity_log.json"))
+    monkeypatch.setattr(module, "_pending_updates", {})
+    monkeypatch.setattr(module, "_tail_checked", set())
+    return module
+
+
+def segment_lines(journal, day):
+    with open(journal._segment_path(day), encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_duration_updates_fold_into_their_entry(journal):
+    first = journal.append("/docs/a.txt", "notepad", at(1, 9))
+    journal.update_duration(first, 30)
+    journal.update_duration(first, 60)
+    journal.append("/docs/b.txt", "code", at(1, 10))
+
+    assert len(segment_lines(journal, "2024-05-01")) == 4  # Two entries, two duration lines
+    entries = journal.read()
+    assert [(e["file_name"], e["duration_seconds"]) for e in entries] == [("a.txt", 60), ("b.txt", 0)]
+    assert entries[0]["app_used"] == "notepad"
+    assert entries[0]["file_type"] == "txt"
+    assert journal.last_record()["p"] == "/docs/b.txt"
+
+
+def test_segment_is_compacted_after_enough_updates(journal, monkeypatch):
+    monkeypatch.setattr(journal, "COMPACT_AFTER_UPDATES", 3)
+    record = journal.append("/docs/a.txt", "notepad", at(1, 9))
+    journal.update_duration(record, 10)
+    journal.update_duration(record, 20)
+    assert len(segment_lines(journal, "2024-05-01")) == 3
+
+    journal.update_duration(record, 30)
+    lines = segment_lines(journal, "2024-05-01")
+    assert [json.loads(line) for line in lines] == [{"t": at(1, 9), "p": "/docs/a.txt", "a": "notepad", "d": 30}]
+    assert journal._pending_updates == {}
+    assert not os.path.exists(journal._segment_path("2024-05-01") + ".tmp")
+
+
+def test_torn_last_line_is_skipped_and_not_glued_to_the_next(journal):
+    journal.append("/docs/a.txt", "notepad", at(1, 9))
+    with open(journal._segment_path("2024-05-01"), "a", encoding="utf-8") as f:
+        f.write('{"t":%d,"p":"/docs/to' % at(1, 9, 5))  # Crash mid-write
+    assert [e["file_name"] for e in journal.read()] == ["a.txt"]
+
+    # A new run appends after the torn line
+    journal._tail_checked.clear()
+    record = journal.append("/docs/b.txt", "code", at(1, 10))
+    journal.update_duration(record, 45)
+    entries = journal.read()
+    assert [(e["file_name"], e["duration_seconds"]) for e in entries] == [("a.txt", 0), ("b.txt", 45)]
+
+
+def test_migration_merges_into_existing_segments(journal):
+    journal.append("/docs/existing.txt", "notepad", at(1, 12))
+    legacy = [
+        {"timestamp": "2024-05-01 09:00:00", "file_path": "/docs/early.txt", "app_used": "word", "duration_seconds": 5},
+        {"timestamp": "2024-05-01 15:00:00", "file_path": "/docs/late.txt", "app_used": "word"},
+        {"timestamp": "2024-05-02 08:30:00", "file_path": "/docs/next.pdf", "app_used": "acrobat"},
+        {"timestamp": "not a date", "file_path": "/docs/broken.txt"},
+    ]
+    with open(journal.LEGACY_LOG, "w", encoding="utf-8") as f:
+        json.dump(legacy, f)
+
+    assert journal.migrate_legacy() == 4
+    assert journal.list_days() == ["2024-05-01", "2024-05-02"]
+    entries = journal.read()
+    assert [e["file_name"] for e in entries] == ["early.txt", "existing.txt", "late.txt", "next.pdf"]
+    assert entries[0]["duration_seconds"] == 5
+    assert not os.path.exists(journal.LEGACY_LOG)
+    assert os.path.exists(journal.LEGACY_LOG + ".migrated")
+    assert journal.migrate_legacy() == 0
+
+
+def test_read_filters_by_day_and_time(journal):
+    for day, hour, name in [(1, 9, "one"), (2, 8, "two-early"), (2, 18, "two-late"), (3, 9, "three")]:
+        journal.append(f"/docs/{name}.txt", "code", at(day, hour))
+
+    names = lambda entries: [e["file_name"] for e in entries]
+    assert names(journal.read()) == ["one.txt", "two-early.txt", "two-late.txt", "three.txt"]
+    assert names(journal.read(start=datetime(2024, 5, 2, 12))) == ["two-late.txt", "three.txt"]
+    assert names(journal.read(end=datetime(2024, 5, 2, 12))) == ["one.txt", "two-early.txt"]
+    assert names(journal.read(datetime(2024, 5, 2), datetime(2024, 5, 2, 23, 59))) == ["two-early.txt", "two-late.txt"]
+    assert journal.read(datetime(2024, 6, 1), datetime(2024, 6, 2)) == []
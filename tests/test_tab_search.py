@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+import zyron.features.tab_registry as tab_registry
+import zyron.features.tab_search as tab_search
+
+TABS = [
+    {"id": 1, "windowId": 1, "title": "Lo-fi beats - YouTube", "url": "https://www.youtube.com/watch?v=1", "active": True},
+    {"id": 2, "windowId": 1, "title": "Cat videos - YouTube", "url": "https://m.youtube.com/watch?v=2"},
+    {"id": 3, "windowId": 1, "title": "Pull requests - GitHub", "url": "https://github.com/pulls"},
+    {"id": 4, "windowId": 2, "title": "Quarterly report draft", "url": "https://docs.example.com/d/4"},
+]
+
+
+@pytest.fixture(autouse=True)
+def tabs():
+    tab_registry.apply_event({"action": "update_tabs", "tabs": TABS})
+    yield
+    tab_registry.reset()
+
+
+def words(query):
+    return query.lower().split()
+
+
+@pytest.mark.parametrize("command, query", [
+    ("reload", "reload all youtube tabs"),
+    ("reload", "refresh all my youtube tabs"),
+    ("screenshot", "screenshot all youtube tabs"),
+    ("screenshot", "take screenshots of every youtube tab"),
+    ("close", "close all tabs with youtube"),
+])
+def test_batch_verbs_and_fillers_leave_a_host_filter(command, query):
+    match = tab_search.batch_filter(command, words(query))
+    assert match == {"host": "youtube.com", "title": None, "audible": None, "muted": None}
+
+
+@pytest.mark.parametrize("command", ["reload", "screenshot", "mute"])
+def test_no_site_named_leaves_no_filter(command):
+    match = tab_search.batch_filter(command, words(f"{command} all my tabs"))
+    assert match == {"host": None, "title": None, "audible": None, "muted": None}
+
+
+def test_other_words_filter_by_title():
+    match = tab_search.batch_filter("reload", words("reload all quarterly report tabs"))
+    assert match["host"] is None
+    assert re.search(match["title"], "Quarterly report draft", re.I)
+    assert not re.search(match["title"], "Pull requests - GitHub", re.I)
+
+
+def test_audible_and_muted_flags():
+    assert tab_search.batch_filter("mute", words("mute all tabs playing sound"))["audible"] is True
+    match = tab_search.batch_filter("unmute", words("unmute all muted youtube tabs"))
+    assert match["muted"] is True
+    assert match["host"] == "youtube.com"
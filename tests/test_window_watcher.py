@@ -0,0 +1,120 @@
+import os
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+pytest.importorskip("Xlib")
+if not shutil.which("Xvfb") or not shutil.which("xvfb-run"):
+    pytest.skip("needs Xvfb (xvfb-run)", allow_module_level=True)
+
+from Xlib import X, Xatom, display as xdisplay  # noqa: E402
+
+import zyron_linux.features.window_watcher as window_watcher  # noqa: E402
+
+
+@pytest.fixture
+def xserver(monkeypatch):
+    """A private Xvfb server; DISPLAY points at it for the watcher."""
+    read_fd, write_fd = os.pipe()
+    server = subprocess.Popen(["Xvfb", "-displayfd", str(write_fd), "-screen", "0", "640x480x24", "-nolisten", "tcp"],
+                              pass_fds=(write_fd,), stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        number = f.readline().strip()
+    if not number:
+        server.kill()
+        pytest.skip("Xvfb did not start")
+    monkeypatch.setenv("DISPLAY", f":{number}")
+    yield f":{number}"
+    window_watcher.stop()
+    if window_watcher._watcher:
+        window_watcher._watcher.join(window_watcher.WAKE_SECONDS * 3)
+    server.kill()
+    server.wait()
+
+
+class Client:
+    """Plays the window manager's part: maps windows and publishes the EWMH root properties."""
+
+    def __init__(self, name):
+        self.display = xdisplay.Display(name)
+        self.root = self.display.screen().root
+
+    def atom(self, name):
+        return self.display.intern_atom(name)
+
+    def window(self, title):
+        window = self.root.create_window(0, 0, 100, 100, 0, X.CopyFromParent)
+        window.change_property(self.atom("_NET_WM_PID"), Xatom.CARDINAL, 32, [os.getpid()])
+        self.set_title(window, title)
+        window.map()
+        return window
+
+    def set_title(self, window, title):
+        window.change_property(self.atom("_NET_WM_NAME"), self.atom("UTF8_STRING"), 8, title.encode())
+        self.display.flush()
+
+    def set_clients(self, windows):
+        self.root.change_property(self.atom("_NET_CLIENT_LIST"), Xatom.WINDOW, 32, [w.id for w in windows])
+        self.display.flush()
+
+    def activate(self, window):
+        self.root.change_property(self.atom("_NET_ACTIVE_WINDOW"), Xatom.WINDOW, 32, [window.id])
+        self.display.flush()
+
+
+def test_follows_focus_and_title_changes(xserver):
+    client = Client(xserver)
+    editor = client.window("notes.txt - Editor")
+    terminal = client.window("bash")
+    client.set_clients([editor, terminal])
+    client.activate(editor)
+
+    changes = []
+    changed = threading.Event()
+
+    def listener(previous, current):
+        changes.append((previous, current))
+        changed.set()
+
+    window_watcher.add_listener(listener)
+    try:
+        assert window_watcher.start()
+        assert window_watcher.wait_until_ready(5)
+
+        windows = window_watcher.get_windows()
+        assert [w["window"] for w in windows] == [editor.id, terminal.id]  # Foreground first
+        assert windows[0]["active"] and not windows[1]["active"]
+        assert windows[0]["title"] == "notes.txt - Editor"
+        assert windows[0]["pid"] == os.getpid()
+
+        # Focus moves to the terminal
+        changed.clear()
+        version = window_watcher.get_version()
+        client.activate(terminal)
+        assert window_watcher.wait_for_change(version, 5) != version
+        assert changed.wait(5)
+        previous, current = changes[-1]
+        assert previous["window"] == editor.id
+        assert current["window"] == terminal.id and current["title"] == "bash"
+        assert window_watcher.get_foreground()["window"] == terminal.id
+        assert [w["window"] for w in window_watcher.get_windows()] == [terminal.id, editor.id]
+
+        # Title change of the foreground window keeps its "since"
+        changed.clear()
+        version = window_watcher.get_version()
+        client.set_title(terminal, "vim report.md")
+        assert window_watcher.wait_for_change(version, 5) != version
+        assert changed.wait(5)
+        previous, current = changes[-1]
+        assert current["window"] == terminal.id and current["title"] == "vim report.md"
+        assert current["since"] == previous["since"]
+
+        # Nothing changes: wait_for_change times out with the same version
+        version = window_watcher.get_version()
+        assert window_watcher.wait_for_change(version, 0.3) == version
+    finally:
+        window_watcher.remove_listener(listener)
+        client.display.close()